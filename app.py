@@ -1,9 +1,10 @@
 import streamlit as st
 import os
 import sys
-import json
 from pathlib import Path
 
+from models.settings import ensure_storage
+
 # Configuration de la page - PLACEZ CECI AU DÉBUT AVANT TOUT AUTRE CODE ST
 st.set_page_config(
     page_title="Gestionnaire de Notes Circulaires",
@@ -22,16 +23,8 @@ if 'procedure_generee' not in st.session_state:
 if 'pdf_path' not in st.session_state:
     st.session_state.pdf_path = None
 
-# Création des répertoires nécessaires s'ils n'existent pas
-data_dir = Path("data")
-if not data_dir.exists():
-    data_dir.mkdir(parents=True)
-
-# Vérification ou création du fichier de données
-data_file = data_dir / "donnees.json"
-if not data_file.exists():
-    with open(data_file, 'w') as f:
-        json.dump({"notes_circulaires": [], "procedures": []}, f)
+# Démarrage : répertoires de données et fichier de données initial (voir models.settings)
+ensure_storage()
 
 def main():
     # Titre principal
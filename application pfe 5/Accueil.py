@@ -1,13 +1,13 @@
 import streamlit as st 
 import os
 import sys
-import json
 from pathlib import Path
 
 # Ajout du répertoire utils au chemin Python
 sys.path.append(str(Path(__file__).parent / "utils"))
 
 # Import des styles avec logo
+from models.settings import ensure_storage
 from utils.styles import apply_green_theme, set_page_config
 
 # Configuration de la page - PLACEZ CECI AU DÉBUT AVANT TOUT AUTRE CODE ST
@@ -24,16 +24,8 @@ if 'note_title' not in st.session_state:
 if 'procedure_generee' not in st.session_state:
     st.session_state.procedure_generee = ""
 
-# Création des répertoires nécessaires s'ils n'existent pas
-data_dir = Path("data")
-if not data_dir.exists():
-    data_dir.mkdir(parents=True)
-
-# Vérification ou création du fichier de données
-data_file = data_dir / "donnees.json"
-if not data_file.exists():
-    with open(data_file, 'w') as f:
-        json.dump({"notes_circulaires": [], "procedures": []}, f)
+# Démarrage : répertoires de données et fichier de données initial (voir models.settings)
+ensure_storage()
 
 def main():
     # Affichage de l'état dans la sidebar
@@ -1,24 +1,28 @@
 """
 Configuration centrale pour l'application Streamlit de gestion des notes circulaires et procédures.
 Ce fichier contient les paramètres globaux et les constantes utilisés dans l'ensemble de l'application.
+
+Les paramètres réglables par déploiement (fichier TOML, variables d'environnement) sont
+définis et validés dans models.settings ; les dictionnaires *_CONFIG ci-dessous en sont
+des vues. L'import de ce module n'écrit rien sur le disque : les répertoires sont créés
+au démarrage par ensure_storage().
 """
 
-import os
-from pathlib import Path
+from dataclasses import asdict
+
+from models.models import MODELS  # Modèles de langage disponibles (Groq), réexportés
+from models.settings import BASE_DIR, EMPTY_DATA, Settings, ensure_storage, get_settings, init_storage
+
+SETTINGS = get_settings()
 
 # Chemins de base
-BASE_DIR = Path(__file__).parent.parent
-DATA_DIR = BASE_DIR / "data"
-TEMP_DIR = BASE_DIR / "temp"
+DATA_DIR = SETTINGS.paths.data_dir
+TEMP_DIR = SETTINGS.paths.temp_dir
 
 # Fichiers de données
-DATA_FILE = DATA_DIR / "donnees.json"
-TEMP_PDF_DIR = TEMP_DIR / "pdf"
-
-# Assurez-vous que les répertoires existent
-DATA_DIR.mkdir(exist_ok=True)
-TEMP_DIR.mkdir(exist_ok=True)
-TEMP_PDF_DIR.mkdir(exist_ok=True)
+DATA_FILE = SETTINGS.paths.data_file
+DOSSIERS_FILE = SETTINGS.paths.dossiers_file
+TEMP_PDF_DIR = SETTINGS.paths.temp_pdf_dir
 
 # Configuration de l'application
 APP_TITLE = "Gestionnaire de Notes Circulaires et Procédures"
@@ -45,25 +49,28 @@ COLORS = {
 }
 
 # Configuration du chatbot
-CHATBOT_CONFIG = {
-    "max_history": 50,  # Nombre maximum de messages dans l'historique
-    "min_keywords": 2,  # Nombre minimum de mots-clés pour une recherche
-    "min_keyword_length": 3  # Longueur minimale des mots-clés
-}
+CHATBOT_CONFIG = asdict(SETTINGS.chatbot)
 
 # Configuration du parser PDF
-PDF_CONFIG = {
-    "timeout": 30,  # Délai d'attente maximum pour le traitement d'un PDF (en secondes)
-    "max_size": 10 * 1024 * 1024  # Taille maximale de fichier PDF (10 Mo)
-}
+PDF_CONFIG = asdict(SETTINGS.pdf)
 
 # Configuration du générateur de logigramme
-DIAGRAM_CONFIG = {
-    "node_distance": "1.5",
-    "rankdir": "TB",  # Top to Bottom
-    "fontname": "Arial",
-    "fontsize": "12"
-}
+DIAGRAM_CONFIG = asdict(SETTINGS.diagram)
+
+# Configuration des exports CSV/Excel
+EXPORT_CONFIG = asdict(SETTINGS.export)
+
+# Recherche des notes similaires et génération des procédures
+RETRIEVAL_CONFIG = asdict(SETTINGS.retrieval)
+
+# Découpage des notes circulaires en passages
+CHUNKING_CONFIG = asdict(SETTINGS.chunking)
+
+# Import en masse des PDF
+INGEST_CONFIG = asdict(SETTINGS.ingest)
+
+# Graphe des transmissions entre acteurs
+HANDOFF_CONFIG = asdict(SETTINGS.handoff)
 
 # Modèles pour les structures de données
 CIRCULAIRE_TEMPLATE = {
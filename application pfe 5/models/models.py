@@ -0,0 +1,30 @@
+"""
+Modèles de langage disponibles pour la génération des procédures et le chatbot.
+
+Module sans dépendance : les pages lisent la liste des modèles sans charger
+LangChain ni les paramètres de l'application (voir utils.import_benchmark).
+"""
+
+MODELS = {
+    "mistral-saba-24b": {
+        "name": "Mistral Saba 24B",
+        "description": "Modèle équilibré pour une génération de qualité avec un bon rapport précision/vitesse",
+        "provider": "Groq",
+        "temperature": 0.3,
+        "max_tokens": 4096
+    },
+    "llama-3.3-70b-versatile": {
+        "name": "LLama 3.3 70B Versatile",
+        "description": "Modèle de grande taille avec des capacités avancées de raisonnement et d'analyse",
+        "provider": "Groq",
+        "temperature": 0.25,
+        "max_tokens": 4096
+    },
+    "qwen-qwq-32b": {
+        "name": "Qwen QWQ 32B",
+        "description": "Modèle performant avec une bonne compréhension contextuelle",
+        "provider": "Groq",
+        "temperature": 0.35,
+        "max_tokens": 4096
+    }
+}
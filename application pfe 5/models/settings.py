@@ -0,0 +1,311 @@
+"""
+Paramètres de l'application, chargés une seule fois et validés.
+
+Chaque paramètre a une valeur par défaut (ci-dessous), éventuellement
+remplacée, dans cet ordre de priorité croissante, par :
+    - le fichier TOML de déploiement : config.toml à la racine de
+      l'application, ou le fichier indiqué par la variable PFE_CONFIG_FILE ;
+    - une variable d'environnement PFE_<SECTION>_<PARAMÈTRE>, par exemple
+      PFE_EXPORT_CSV_CHUNK_ROWS=20000 ou PFE_RETRIEVAL_SIMILARITY_THRESHOLD=0.3.
+
+Exemple de config.toml (voir config.example.toml) :
+    [retrieval]
+    similarity_threshold = 0.3
+    max_examples = 3
+
+    [pdf]
+    timeout = 60
+
+Les valeurs sont converties dans le type du paramètre puis contrôlées
+(bornes, cohérence entre paramètres) : une erreur de configuration lève
+ValueError au chargement, avec le nom du paramètre en cause. Les chemins
+relatifs sont résolus par rapport à la racine de l'application.
+
+Le chargement ne touche pas au disque : la création des répertoires et du
+fichier de données est une étape explicite du démarrage (init_storage),
+exécutée une fois par processus par ensure_storage, que l'accueil et chaque
+page appellent.
+"""
+
+import json
+import os
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Mapping, Optional, Union, get_type_hints
+
+try:
+    import tomllib
+except ImportError:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+# Racine de l'application
+BASE_DIR = Path(__file__).parent.parent
+
+# Fichier de déploiement et préfixe des variables d'environnement
+DEFAULT_CONFIG_FILE = BASE_DIR / "config.toml"
+CONFIG_FILE_ENV = "PFE_CONFIG_FILE"
+ENV_PREFIX = "PFE_"
+
+# Contenu initial du fichier de données (data/donnees.json)
+EMPTY_DATA = {"notes_circulaires": [], "procedures": []}
+
+_TRUE_VALUES = {'1', 'true', 'yes', 'oui', 'on'}
+_FALSE_VALUES = {'0', 'false', 'no', 'non', 'off'}
+
+
+def _setting(default, minimum=None, maximum=None):
+    """Paramètre avec bornes (incluses) contrôlées au chargement."""
+    return field(default=default, metadata={'min': minimum, 'max': maximum})
+
+
+@dataclass(frozen=True)
+class PathSettings:
+    data_dir: Path = Path("data")  # Données de l'application (donnees.json, base vectorielle...)
+    temp_dir: Path = Path("temp")  # Fichiers temporaires (PDF téléversés...)
+
+    @property
+    def data_file(self) -> Path:
+        return self.data_dir / "donnees.json"
+
+    @property
+    def dossiers_file(self) -> Path:
+        return self.data_dir / "donnee.json"
+
+    @property
+    def temp_pdf_dir(self) -> Path:
+        return self.temp_dir / "pdf"
+
+
+@dataclass(frozen=True)
+class RetrievalSettings:
+    similarity_threshold: float = _setting(0.2, 0.0, 1.0)  # Score minimal d'une note de référence
+    max_note_length: int = _setting(500, 1)  # Limite la taille des notes de référence
+    max_examples: int = _setting(2, 0)  # Nombre de notes similaires utilisées comme exemples
+    min_procedure_rows: int = _setting(4, 1)  # Nombre minimum de lignes de la procédure générée
+    max_procedure_rows: int = _setting(65, 1)  # Nombre maximum de lignes de la procédure générée
+    vector_store_dir: Path = Path("data/chroma_store")  # Base vectorielle Chroma
+    embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"  # Modèle d'embedding des notes
+
+    def __post_init__(self):
+        if self.min_procedure_rows > self.max_procedure_rows:
+            raise ValueError("retrieval.min_procedure_rows doit être inférieur ou égal à retrieval.max_procedure_rows")
+
+
+@dataclass(frozen=True)
+class ChunkingSettings:
+    min_chars: int = _setting(300, 1)  # En dessous, un passage est fusionné avec le suivant
+    target_chars: int = _setting(1000, 1)  # Taille visée en regroupant des articles courts
+    max_chars: int = _setting(1500, 1)  # Au-delà, un article est redécoupé
+
+    def __post_init__(self):
+        if not self.min_chars <= self.target_chars <= self.max_chars:
+            raise ValueError("chunking : min_chars <= target_chars <= max_chars attendu")
+
+
+@dataclass(frozen=True)
+class ChatbotSettings:
+    max_history: int = _setting(50, 1)  # Nombre maximum de messages dans l'historique
+    min_keywords: int = _setting(2, 0)  # Nombre minimum de mots-clés pour une recherche
+    min_keyword_length: int = _setting(3, 1)  # Longueur minimale des mots-clés
+
+
+@dataclass(frozen=True)
+class PdfSettings:
+    timeout: float = _setting(30, 1)  # Délai maximal de traitement d'un PDF (secondes)
+    max_size: int = _setting(10 * 1024 * 1024, 1)  # Taille maximale d'un fichier PDF (10 Mo)
+    max_memory: int = _setting(512 * 1024 * 1024, 0)  # Mémoire maximale du processus d'extraction (0 : illimitée)
+    max_workers: int = _setting(2, 1)  # Extractions simultanées sur le serveur
+
+
+@dataclass(frozen=True)
+class DiagramSettings:
+    node_distance: str = "1.5"
+    rankdir: str = "TB"  # Top to Bottom
+    fontname: str = "Arial"
+    fontsize: str = "12"
+    cache_dir: Path = Path("temp/logigrammes")  # Cache disque des rendus Graphviz
+    cache_memory_bytes: int = _setting(32 * 1024 * 1024, 0)  # Taille maximale du cache mémoire (32 Mo, 0 : désactivé)
+    cache_disk_bytes: int = _setting(100 * 1024 * 1024, 0)  # Taille maximale du cache disque (100 Mo, 0 : désactivé)
+    render_timeout: float = _setting(10, 1)  # Délai maximal d'un rendu Graphviz (secondes)
+    render_workers: int = _setting(2, 1)  # Rendus Graphviz simultanés sur le serveur
+    fallback_splines: str = "polyline"  # Tracé des arêtes utilisé quand le rendu dépasse le délai
+    page_max_steps: int = _setting(15, 1)  # Nombre maximal d'étapes par page en mode découpé
+
+
+@dataclass(frozen=True)
+class ExportSettings:
+    cache_dir: Path = Path("temp/exports")  # Cache disque des exports, par empreinte du contenu
+    cache_disk_bytes: int = _setting(200 * 1024 * 1024, 0)  # Taille maximale du cache disque (200 Mo)
+    constant_memory_rows: int = _setting(5000, 1)  # Au-delà, classeur Excel écrit ligne par ligne (XlsxWriter)
+    csv_chunk_rows: int = _setting(10000, 1)  # Lignes écrites à la fois dans un export CSV
+
+
+@dataclass(frozen=True)
+class HandoffSettings:
+    pagerank_damping: float = _setting(0.85, 0.0, 1.0)  # Facteur d'amortissement du PageRank
+    pagerank_tolerance: float = _setting(1e-8, 0.0)  # Écart de convergence du PageRank
+    pagerank_max_iterations: int = _setting(100, 1)  # Nombre maximal d'itérations du PageRank
+
+
+@dataclass(frozen=True)
+class IngestSettings:
+    save_every: int = _setting(10, 1)  # Import en masse : sauvegarde tous les N fichiers importés
+
+
+@dataclass(frozen=True)
+class Settings:
+    paths: PathSettings = field(default_factory=PathSettings)
+    retrieval: RetrievalSettings = field(default_factory=RetrievalSettings)
+    chunking: ChunkingSettings = field(default_factory=ChunkingSettings)
+    chatbot: ChatbotSettings = field(default_factory=ChatbotSettings)
+    pdf: PdfSettings = field(default_factory=PdfSettings)
+    diagram: DiagramSettings = field(default_factory=DiagramSettings)
+    export: ExportSettings = field(default_factory=ExportSettings)
+    ingest: IngestSettings = field(default_factory=IngestSettings)
+    handoff: HandoffSettings = field(default_factory=HandoffSettings)
+
+
+def _convert(value, expected: type, name: str):
+    """Convertit une valeur (TOML ou texte d'une variable d'environnement) dans le type du paramètre."""
+    try:
+        if expected is bool:
+            if isinstance(value, bool):
+                return value
+            text = str(value).strip().lower()
+            if text in _TRUE_VALUES | _FALSE_VALUES:
+                return text in _TRUE_VALUES
+            raise ValueError("booléen attendu")
+        if expected is int:
+            if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+                raise ValueError("entier attendu")
+            return int(value)
+        if expected is float:
+            if isinstance(value, bool):
+                raise ValueError("nombre attendu")
+            return float(value)
+        if expected is Path:
+            path = Path(os.path.expanduser(str(value)))
+            return path if path.is_absolute() else BASE_DIR / path
+        return str(value)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Paramètre invalide {name} = {value!r} : {e}") from None
+
+
+def _build_section(cls: type, section: str, overrides: Mapping) -> object:
+    """Construit une section à partir de ses valeurs par défaut et des valeurs fournies."""
+    hints = get_type_hints(cls)
+    known = {item.name: item for item in fields(cls)}
+    unknown = set(overrides) - set(known)
+    if unknown:
+        raise ValueError(f"Paramètre(s) inconnu(s) dans la section [{section}] : {', '.join(sorted(unknown))}")
+
+    values = {}
+    for name, item in known.items():
+        value = overrides[name] if name in overrides else item.default
+        value = _convert(value, hints[name], f"{section}.{name}")
+        minimum, maximum = item.metadata.get('min'), item.metadata.get('max')
+        if minimum is not None and value < minimum:
+            raise ValueError(f"Paramètre invalide {section}.{name} = {value!r} : minimum {minimum}")
+        if maximum is not None and value > maximum:
+            raise ValueError(f"Paramètre invalide {section}.{name} = {value!r} : maximum {maximum}")
+        values[name] = value
+    return cls(**values)
+
+
+def _read_config_file(path: Path) -> Dict:
+    if tomllib is None:
+        raise RuntimeError(f"Lecture de {path} impossible : Python 3.11+ ou le paquet tomli est requis")
+    with open(path, 'rb') as f:
+        return tomllib.load(f)
+
+
+def load_settings(config_file: Optional[Union[str, Path]] = None,
+                  environ: Optional[Mapping[str, str]] = None) -> Settings:
+    """
+    Charge les paramètres : valeurs par défaut, fichier TOML puis variables d'environnement.
+
+    Args:
+        config_file (Optional[Union[str, Path]], optional): Fichier TOML. Defaults to la variable
+            PFE_CONFIG_FILE, sinon config.toml à la racine de l'application (facultatif).
+        environ (Optional[Mapping[str, str]], optional): Variables d'environnement. Defaults to os.environ.
+
+    Returns:
+        Settings: Les paramètres validés.
+
+    Raises:
+        FileNotFoundError: Si le fichier indiqué explicitement n'existe pas.
+        ValueError: Si un paramètre est inconnu, mal typé ou hors bornes.
+    """
+    environ = os.environ if environ is None else environ
+    explicit = config_file or environ.get(CONFIG_FILE_ENV)
+    path = Path(explicit) if explicit else DEFAULT_CONFIG_FILE
+
+    file_values = {}
+    if path.exists():
+        file_values = _read_config_file(path)
+    elif explicit:
+        raise FileNotFoundError(f"Fichier de configuration introuvable : {path}")
+
+    sections = {item.name: item.default_factory for item in fields(Settings)}
+    unknown = set(file_values) - set(sections)
+    if unknown:
+        raise ValueError(f"Section(s) inconnue(s) dans {path} : {', '.join(sorted(unknown))}")
+
+    built = {}
+    for section, cls in sections.items():
+        overrides = dict(file_values.get(section, {}))
+        for item in fields(cls):
+            env_name = f"{ENV_PREFIX}{section}_{item.name}".upper()
+            if env_name in environ:
+                overrides[item.name] = environ[env_name]
+        built[section] = _build_section(cls, section, overrides)
+    return Settings(**built)
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Renvoie les paramètres du processus, chargés au premier appel (get_settings.cache_clear() pour recharger).
+
+    Returns:
+        Settings: Les paramètres validés.
+    """
+    return load_settings()
+
+
+def init_storage(settings: Optional[Settings] = None) -> Settings:
+    """
+    Prépare le disque au démarrage : répertoires de données et temporaires, fichier de données initial.
+
+    Args:
+        settings (Optional[Settings], optional): Paramètres à utiliser. Defaults to get_settings().
+
+    Returns:
+        Settings: Les paramètres utilisés.
+    """
+    settings = settings or get_settings()
+    paths = settings.paths
+    for directory in (paths.data_dir, paths.temp_dir, paths.temp_pdf_dir):
+        directory.mkdir(parents=True, exist_ok=True)
+
+    if not paths.data_file.exists():
+        tmp_path = paths.data_file.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(EMPTY_DATA, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, paths.data_file)
+    return settings
+
+
+@lru_cache(maxsize=1)
+def ensure_storage() -> Settings:
+    """
+    Point d'entrée du démarrage, appelé par l'accueil et chaque page : init_storage une seule fois par processus.
+
+    Returns:
+        Settings: Les paramètres utilisés.
+    """
+    return init_storage()
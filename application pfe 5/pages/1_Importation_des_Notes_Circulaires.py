@@ -9,6 +9,7 @@ import streamlit as st
 import os
 import sys
 import json
+import uuid
 from pathlib import Path
 from utils.styles import apply_green_theme
 from utils.styles import apply_green_theme, set_page_config
@@ -25,8 +26,13 @@ except Exception as e:
 
 # IMPORT DES MODULES UTILITAIRES
 try:
-    from utils.pdf_parser import extract_text_from_pdf
-    from utils.procedure_gen import generate_procedure_with_model, MODELS
+    from utils.pdf_worker import extract_text_isolated
+    from utils.bulk_ingest import ingest_pdfs, save_upload
+    from utils.text_normalizer import normalize_text
+    from models.config import DATA_FILE, MODELS, TEMP_PDF_DIR
+    from models.settings import ensure_storage
+    from utils.procedure_gen import generate_procedure_with_model
+    ensure_storage()
 except ImportError as e:
     st.error(f"Erreur d'importation des modules utilitaires: {e}")
     st.warning("Assurez-vous que les modules dans le dossier 'utils' sont correctement installés.")
@@ -79,7 +85,7 @@ def main():
         💡 **Conseil** : Pour de meilleurs résultats, utilisez des notes circulaires complètes et structurées.
         """)
 
-    tab1, tab2 = st.tabs(["✍️ Saisie Manuelle", "📁 Téléverser un PDF"])
+    tab1, tab2, tab3 = st.tabs(["✍️ Saisie Manuelle", "📁 Téléverser un PDF", "🗂️ Import groupé"])
 
     # Onglet Saisie Manuelle
     with tab1:
@@ -116,10 +122,11 @@ def main():
         
         if st.button("💾 Enregistrer la Note Circulaire", key="save_manual_note", type="primary"):
             if note_title and note_content:
+                note_content = normalize_text(note_content)
                 st.session_state.note_circulaire = note_content
                 st.session_state.note_title = note_title
                 # Sauvegarde
-                data_file = Path("data/donnees.json")
+                data_file = DATA_FILE
                 data_file.parent.mkdir(exist_ok=True)
                 if data_file.exists():
                     with open(data_file, 'r', encoding='utf-8') as f:
@@ -170,16 +177,17 @@ def main():
             with col3:
                 st.metric("📄 Type", "PDF")
             
-            pdf_dir = Path("data/pdf_temp")
-            pdf_dir.mkdir(parents=True, exist_ok=True)
-            pdf_path = pdf_dir / uploaded_file.name
-            
-            with open(pdf_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
+            pdf_dir = TEMP_PDF_DIR
+            pdf_path = save_upload(uploaded_file.getbuffer(), pdf_dir)
             
             try:
                 with st.spinner("🔄 Traitement du PDF en cours..."):
-                    pdf_text = extract_text_from_pdf(pdf_path)
+                    progress_bar = st.progress(0)
+                    pdf_text = extract_text_isolated(
+                        pdf_path,
+                        progress_callback=lambda pages, total: progress_bar.progress(min(pages / max(total, 1), 1.0))
+                    )
+                    progress_bar.empty()
                 
                 st.success("✅ PDF traité avec succès!")
                 
@@ -204,7 +212,7 @@ def main():
                     if pdf_title:
                         st.session_state.note_circulaire = pdf_text
                         st.session_state.note_title = pdf_title
-                        data_file = Path("data/donnees.json")
+                        data_file = DATA_FILE
                         data_file.parent.mkdir(exist_ok=True)
                         if data_file.exists():
                             with open(data_file, 'r', encoding='utf-8') as f:
@@ -230,6 +238,52 @@ def main():
         
         st.markdown('</div>', unsafe_allow_html=True)
 
+    # Onglet Import groupé
+    with tab3:
+        st.markdown('<div class="tab-content fade-in">', unsafe_allow_html=True)
+        
+        st.markdown("### 🗂️ Import groupé de Notes Circulaires en PDF")
+        st.markdown("*Importez plusieurs PDF à la fois : les fichiers déjà importés sont ignorés.*")
+        
+        uploaded_files = st.file_uploader(
+            "📄 Choisissez des fichiers PDF",
+            type="pdf",
+            accept_multiple_files=True,
+            key="bulk_pdf_uploader"
+        )
+        
+        if uploaded_files and st.button("📥 Importer les fichiers", key="bulk_import", type="primary"):
+            pdf_dir = TEMP_PDF_DIR
+            # Fichiers nommés par empreinte : le nom d'origine ne sert qu'à l'affichage
+            upload_names = {}
+            for uploaded in uploaded_files:
+                upload_names.setdefault(str(save_upload(uploaded.getbuffer(), pdf_dir)), uploaded.name)
+            pdf_paths = [Path(path) for path in upload_names]
+            
+            progress_bar = st.progress(0)
+            report = ingest_pdfs(
+                pdf_paths,
+                progress_callback=lambda done, total, entry: progress_bar.progress(done / total),
+                original_names=upload_names
+            )
+            progress_bar.empty()
+            
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("✅ Importées", report['importes'])
+            with col2:
+                st.metric("♻️ Déjà présentes", report['deja_importes'] + report['doublons'])
+            with col3:
+                st.metric("❌ Erreurs", report['erreurs'])
+            with col4:
+                st.metric("⚡ Pages/s", report['pages_par_s'])
+            
+            for entry in report['details']:
+                if entry.get('erreur'):
+                    st.error(f"❌ {upload_names.get(entry['fichier'], Path(entry['fichier']).name)} : {entry['erreur']}")
+        
+        st.markdown('</div>', unsafe_allow_html=True)
+
     # Section Génération de Procédure
     st.markdown('<div class="procedure-section fade-in">', unsafe_allow_html=True)
     st.markdown('<div class="procedure-title">🚀 Génération Automatique de Procédure</div>', unsafe_allow_html=True)
@@ -304,7 +358,7 @@ def main():
                     st.session_state.procedure_generee = procedure
                     
                     # Sauvegarder la procédure
-                    data_file = Path("data/donnees.json")
+                    data_file = DATA_FILE
                     data_file.parent.mkdir(exist_ok=True)
                     if data_file.exists():
                         with open(data_file, 'r', encoding='utf-8') as f:
@@ -313,6 +367,7 @@ def main():
                         data = {"notes_circulaires": [], "procedures": []}
                     
                     data["procedures"].append({
+                        "id": f"proc_{uuid.uuid4().hex[:12]}",  # Identifiant stable (index des acteurs, exports)
                         "titre": f"Procédure pour {st.session_state.get('note_title', 'Note sans titre')}",
                         "contenu": procedure,
                         "note_source": st.session_state.get('note_title', ''),
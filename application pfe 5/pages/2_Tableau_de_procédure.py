@@ -6,6 +6,7 @@ import streamlit as st
 import os
 import sys
 import json
+import uuid
 from pathlib import Path
 
 # CONFIGURATION DE LA PAGE - DOIT ÊTRE LA PREMIÈRE COMMANDE STREAMLIT
@@ -28,14 +29,21 @@ if parent_dir not in sys.path:
 
 # IMPORT DES MODULES UTILITAIRES
 try:
-    from utils.procedure_gen import generate_procedure_with_model, init_vector_store, load_data, find_similar_notes, MODELS
+    from models.config import DATA_FILE, MODELS
+    from models.settings import ensure_storage
+    from utils.procedure_gen import generate_procedure_with_model, init_vector_store, load_data, find_similar_notes
+    from utils.procedure_gen import extract_procedure_components as split_procedure_components
+    from utils.markdown_table import STEP_HEADERS, StreamingTableParser, parse_procedure_steps, render_rows, steps_to_records
+    from utils.actor_index import procedure_source_id, update_actor_index
+    from utils.handoff_graph import update_handoff_graph
+    ensure_storage()
 except ImportError as e:
     st.error(f"Erreur d'importation des modules utilitaires: {e}")
     st.warning("Assurez-vous que les modules dans le dossier 'utils' sont correctement installés.")
 
 # FONCTION POUR SAUVEGARDER LES PROCÉDURES GÉNÉRÉES
 def save_procedure(procedure, model_id, note_title, similar_notes=None):
-    data_file = Path("data/donnees.json")
+    data_file = DATA_FILE
     try:
         # Charger les données existantes
         data = {}
@@ -43,37 +51,14 @@ def save_procedure(procedure, model_id, note_title, similar_notes=None):
             with open(data_file, 'r', encoding='utf-8') as f:
                 data = json.load(f)
         
+        # Extraire les étapes de la procédure (conversion du tableau markdown)
+        etapes = steps_to_records(parse_procedure_steps(procedure))
+        
         # Si la structure est un dictionnaire avec "dossiers"
         if "dossiers" in data:
             # Trouver le prochain numéro de dossier
             next_num = max([d.get("numero", 0) for d in data["dossiers"]], default=0) + 1
             
-            # Extraire les étapes de la procédure (conversion du tableau markdown)
-            procedure_lines = procedure.strip().split('\n')
-            etapes = []
-            
-            # Ignorer les lignes d'en-tête et de séparation du tableau markdown
-            start_parsing = False
-            for line in procedure_lines:
-                line = line.strip()
-                if line.startswith('| ---'):
-                    start_parsing = True
-                    continue
-                
-                if start_parsing and line.startswith('|'):
-                    # Extraire les données de chaque colonne
-                    cols = [col.strip() for col in line.split('|')[1:-1]]
-                    if len(cols) >= 6:  # N°, Activités, Description, Acteurs, Documents, Applications
-                        etape = {
-                            "N°": cols[0], 
-                            "Activités": cols[1],
-                            "Description": cols[2],
-                            "Acteurs": cols[3],
-                            "Documents": cols[4],
-                            "Applications": cols[5]
-                        }
-                        etapes.append(etape)
-            
             # Créer un nouveau dossier avec la note et sa procédure
             nouveau_dossier = {
                 "numero": next_num,
@@ -92,24 +77,32 @@ def save_procedure(procedure, model_id, note_title, similar_notes=None):
             }
             
             data["dossiers"].append(nouveau_dossier)
+            source_id = f"dossier_{next_num}/{next_num}.1"
         else:
             # Structure alternative (pour rétrocompatibilité)
             if "procedures" not in data:
                 data["procedures"] = []
             
-            data["procedures"].append({
+            nouvelle_procedure = {
+                "id": f"proc_{uuid.uuid4().hex[:12]}",  # Identifiant stable (index des acteurs, exports)
                 "titre": f"Procédure pour {note_title}",
                 "contenu": procedure,
                 "modele": model_id,
                 "note_source": note_title,
                 "notes_similaires": similar_notes if similar_notes else []  # Ajouter les notes similaires utilisées
-            })
+            }
+            data["procedures"].append(nouvelle_procedure)
+            source_id = procedure_source_id(nouvelle_procedure)
         
         # Sauvegarder les données
         data_file.parent.mkdir(parents=True, exist_ok=True)
         with open(data_file, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=4, ensure_ascii=False)
         
+        # Indexer les acteurs et leurs transmissions (index et graphe globaux, mis à jour sans tout reparcourir)
+        update_actor_index(source_id, f"Procédure pour {note_title}", etapes)
+        update_handoff_graph(source_id, f"Procédure pour {note_title}", etapes)
+        
         return True
     except Exception as e:
         st.error(f"Erreur lors de la sauvegarde de la procédure: {e}")
@@ -175,7 +168,8 @@ def generate_procedure_rag(note_circulaire, model_id, api_key=None, num_io_rows=
             similar_notes_info.append({
                 "id": note['id'],
                 "titre": note['titre'],
-                "score": note.get('score', 0)
+                "score": note.get('score', 0),
+                "articles": note.get('articles', '')
             })
         
         if similar_notes_found and len(similar_notes_found) > 0:
@@ -201,6 +195,8 @@ def generate_procedure_rag(note_circulaire, model_id, api_key=None, num_io_rows=
                     score_percent = f"{score * 100:.1f}%" if score else "N/A"
                     st.markdown(f"**Note #{i} - ID: {note['id']} - Similarité: {score_percent}**")
                     st.markdown(f"**Titre:** {note['titre']}")
+                    if note.get('articles'):
+                        st.markdown(f"**Articles:** {note['articles']}")
                     st.markdown("**Extrait:**")
                     st.text(note['content'][:200] + "..." if len(note['content']) > 200 else note['content'])
                     st.markdown("---")
@@ -215,6 +211,17 @@ def generate_procedure_rag(note_circulaire, model_id, api_key=None, num_io_rows=
         
         with st.spinner(f"Génération de la procédure avec {MODELS[model_id]['name']}..."):
             try:
+                # Aperçu progressif du tableau des étapes pendant la génération
+                live_preview = st.empty()
+                live_parser = StreamingTableParser()
+                live_steps = []
+                
+                def show_progress(token):
+                    for event in live_parser.push(token):
+                        if event.kind == "etape":
+                            live_steps.append(event.data)
+                            live_preview.markdown(render_rows(STEP_HEADERS, live_steps))
+                
                 result = generate_procedure_with_model(
                     query=note_circulaire, 
                     model_id=model_id, 
@@ -222,8 +229,10 @@ def generate_procedure_rag(note_circulaire, model_id, api_key=None, num_io_rows=
                     vectorstore=vectorstore,
                     notes_map=notes_map,
                     procedures_map=procs_map,
-                    num_io_rows=num_io_rows
+                    num_io_rows=num_io_rows,
+                    on_token=show_progress
                 )
+                live_preview.empty()
                 
                 st.session_state.similar_notes = similar_notes_found
                 st.session_state.similar_notes_info = similar_notes_info
@@ -245,70 +254,7 @@ def extract_procedure_components(procedure_result):
         procedure_text = procedure_result
         io_table = ""
 
-    # Initialiser les composants
-    components = {
-        "etapes": "",
-        "io": ""
-    }
-
-    # Fonction helper pour valider/formater une table markdown
-    def format_markdown_table(content, headers):
-        if not content:
-            # Créer une table vide avec les en-têtes
-            separator = "|" + "|".join([" --- " for _ in headers]) + "|"
-            return "\n".join([
-                "|" + "|".join(headers) + "|",
-                separator
-            ])
-        
-        lines = content.strip().split("\n")
-        formatted_lines = []
-        
-        # Vérifier si la première ligne est un en-tête markdown valide
-        if not lines[0].startswith("|") or not lines[0].endswith("|"):
-            # Si non, créer un nouvel en-tête
-            formatted_lines.append("|" + "|".join(headers) + "|")
-            formatted_lines.append("|" + "|".join([" --- " for _ in headers]) + "|")
-            
-            # Formater les données existantes
-            for line in lines:
-                if line.strip():
-                    cells = [cell.strip() for cell in line.split("|") if cell.strip()]
-                    if len(cells) >= len(headers):
-                        formatted_lines.append("|" + "|".join(cells[:len(headers)]) + "|")
-        else:
-            # Si le format est déjà correct, garder tel quel
-            formatted_lines = lines
-            
-            # S'assurer qu'il y a une ligne de séparation
-            if len(formatted_lines) > 1 and not "---" in formatted_lines[1]:
-                formatted_lines.insert(1, "|" + "|".join([" --- " for _ in headers]) + "|")
-        
-        return "\n".join(formatted_lines)
-
-    # Formater le tableau I/O
-    io_headers = ["Evènement", "Processus en interface", "Description du processus en interface"]
-    components["io"] = format_markdown_table(io_table, io_headers)
-    
-    # Extraire et formater le tableau des étapes
-    if procedure_text:
-        etapes_lines = []
-        step_headers = ["N°", "Activités", "Description", "Acteurs", "Documents", "Applications"]
-        
-        # Parcourir les lignes pour trouver le tableau des étapes
-        lines = procedure_text.split("\n")
-        in_table = False
-        for line in lines:
-            if "| N°" in line or "| No." in line or "| Numéro" in line:
-                in_table = True
-                etapes_lines = [line]
-            elif in_table and line.strip().startswith("|"):
-                etapes_lines.append(line)
-            elif in_table and not line.strip().startswith("|"):
-                break
-                
-        if etapes_lines:
-            components["etapes"] = format_markdown_table("\n".join(etapes_lines), step_headers)
+    components = split_procedure_components(procedure_text, io_table)
     
     # Sauvegarder pour la page 3
     if components["etapes"]:
@@ -4,9 +4,16 @@ Elle utilise Graphviz pour transformer le tableau en représentation visuelle.
 """
 
 import streamlit as st
-from utils.logigramme_advanced import generate_flowchart
+from models.settings import ensure_storage
+from utils.logigramme_advanced import (
+    COLORS, PAGE_MAX_STEPS, RENDER_FORMATS, extract_steps_from_procedure,
+    render_flowchart, render_flowchart_incremental, render_flowchart_pages
+)
+from utils.flowchart_model import step_node_keys
 from utils.styles import apply_green_theme, set_page_config  # Import du fichier de styles
-import base64
+
+# Démarrage : répertoires de données et fichier de données initial (voir models.settings)
+ensure_storage()
 
 # Configuration de la page avec fonction partagée
 set_page_config("Logigramme", "📊")
@@ -66,20 +73,101 @@ def main():
         if markdown_text:
             st.subheader("Logigramme généré")
             
-            # Générer le diagramme avec le tableau I/O
-            flowchart_base64, error = generate_flowchart(markdown_text, procedure_name, io_table)
+            # Les modifications manuelles sont propres à un tableau source
+            if st.session_state.get('flowchart_source') != markdown_text:
+                st.session_state.flowchart_source = markdown_text
+                st.session_state.flowchart_edits = {}
+                st.session_state.flowchart_colors = {}
+                st.session_state.flowchart_state = None
+            edits = st.session_state.flowchart_edits
+            node_colors = st.session_state.flowchart_colors
+            
+            # Les longues procédures sont découpées en pages reliées par des renvois
+            steps = extract_steps_from_procedure(markdown_text)
+            step_count = len(steps)
+            paginate = step_count > PAGE_MAX_STEPS and st.checkbox(
+                f"📄 Découper le logigramme en pages ({step_count} étapes, {PAGE_MAX_STEPS} max. par page)",
+                value=True
+            )
             
-            if flowchart_base64 and not error:
-                # Afficher l'image
-                st.image(f"data:image/png;base64,{flowchart_base64}")
+            if paginate:
+                page_svgs, error = render_flowchart_pages(markdown_text, io_table, procedure_name, fmt='svg')
+                flowchart_svg = None
+            elif steps:
+                # Modification d'une étape : libellé, acteurs, document et couleur
+                with st.expander("✏️ Modifier une étape du logigramme", expanded=False):
+                    step_numbers = [step['number'] for step in steps]
+                    step_index = st.selectbox("Étape", range(len(steps)), format_func=lambda i: step_numbers[i])
+                    step_key = step_node_keys(steps)[step_index]
+                    step = {**steps[step_index], **edits.get(step_key, {})}
+                    step_node = f"step_{step_key}"
+                    
+                    activity = st.text_input("Activité", step.get('activity', ''))
+                    actor = st.text_input("Acteurs", step.get('actor', ''))
+                    document = st.text_input("Documents", step.get('document', ''))
+                    color = st.color_picker("Couleur de l'étape", node_colors.get(step_node, COLORS['steps']))
+                    
+                    col_apply, col_reset = st.columns(2)
+                    if col_apply.button("✅ Appliquer"):
+                        edits[step_key] = {'activity': activity, 'actor': actor, 'document': document}
+                        node_colors[step_node] = color
+                    if col_reset.button("↩️ Annuler toutes les modifications"):
+                        edits.clear()
+                        node_colors.clear()
                 
-                # Option de téléchargement en PNG
-                st.download_button(
-                    label="📥 Télécharger en PNG",
-                    data=base64.b64decode(flowchart_base64),
-                    file_name="logigramme.png",
-                    mime="image/png"
+                # Générer le diagramme avec le tableau I/O (SVG affiché directement par le navigateur) ;
+                # les petites modifications corrigent le SVG précédent sans nouvelle mise en page
+                flowchart_svg, flowchart_state, error = render_flowchart_incremental(
+                    markdown_text, io_table, procedure_name, edits, node_colors,
+                    st.session_state.flowchart_state
                 )
+                if flowchart_state:
+                    st.session_state.flowchart_state = flowchart_state
+            else:
+                flowchart_svg, error = None, "Aucune étape n'a pu être extraite de la procédure"
+            
+            if paginate and page_svgs and not error:
+                for page_number, page_svg in enumerate(page_svgs, start=1):
+                    page_svg = page_svg.decode('utf-8')
+                    st.markdown(f"**Page {page_number}/{len(page_svgs)}**")
+                    st.image(page_svg[page_svg.find('<svg'):])
+                    st.download_button(
+                        label=f"📥 Télécharger la page {page_number} en SVG",
+                        data=page_svg,
+                        file_name=f"logigramme_page_{page_number}.svg",
+                        mime=RENDER_FORMATS['svg'],
+                        key=f"download_page_{page_number}"
+                    )
+            elif flowchart_svg and not error:
+                # Afficher l'image (sans le prologue XML ajouté par Graphviz)
+                st.image(flowchart_svg[flowchart_svg.find('<svg'):])
+                
+                col_svg, col_raster = st.columns(2)
+                with col_svg:
+                    st.download_button(
+                        label="📥 Télécharger en SVG",
+                        data=flowchart_svg,
+                        file_name="logigramme.svg",
+                        mime=RENDER_FORMATS['svg']
+                    )
+                
+                # Les formats PNG/PDF ne sont rendus qu'à la demande
+                with col_raster:
+                    export_format = st.radio("Autre format", ["png", "pdf"], horizontal=True,
+                                             format_func=str.upper)
+                    if st.button(f"⚙️ Préparer le {export_format.upper()}"):
+                        export_data, export_error = render_flowchart(markdown_text, io_table, procedure_name,
+                                                                     fmt=export_format, edits=edits,
+                                                                     node_colors=node_colors)
+                        if export_error:
+                            st.warning(f"⚠️ {export_error}")
+                        else:
+                            st.download_button(
+                                label=f"📥 Télécharger en {export_format.upper()}",
+                                data=export_data,
+                                file_name=f"logigramme.{export_format}",
+                                mime=RENDER_FORMATS[export_format]
+                            )
             else:
                 st.warning(f"⚠️ {error or 'Impossible de générer le logigramme. Vérifiez le format du tableau.'}")
         else:
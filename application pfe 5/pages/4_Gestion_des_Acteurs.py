@@ -3,9 +3,16 @@ Page 4: Analyse des Acteurs
 """
 import streamlit as st
 import pandas as pd
-from io import BytesIO
+from models.settings import ensure_storage
 from utils.actors_extractor import extract_actors_from_procedure_table, get_actors_summary
+from utils.actor_analytics import get_actor_analytics
+from utils.actor_index import get_actor_index
+from utils.handoff_graph import get_handoff_graph
 from utils.styles import apply_green_theme
+from utils.table_export import EXPORT_FORMATS, export_frame, frame_digest, get_cached_export
+
+# Démarrage : répertoires de données et fichier de données initial (voir models.settings)
+ensure_storage()
 
 # Configuration de la page
 st.set_page_config(
@@ -17,6 +24,36 @@ st.set_page_config(
 # Appliquer le thème vert
 apply_green_theme()
 
+def export_buttons(df, file_name, key, index=False, digest=None):
+    """
+    Boutons d'export CSV/Excel d'un tableau, produits à la demande.
+    
+    Un export déjà produit pour le même contenu (cache disque par empreinte)
+    est proposé directement au téléchargement ; sinon un bouton le prépare.
+    Rien n'est sérialisé lors d'un simple affichage de la page ; l'empreinte
+    d'un grand tableau (digest, voir utils.table_export.frame_digest) est
+    calculée une fois par l'appelant plutôt qu'à chaque affichage.
+    """
+    digest = digest or frame_digest(df, index)
+    cols = st.columns(len(EXPORT_FORMATS))
+    labels = {'csv': "📊 CSV", 'xlsx': "📑 Excel"}
+    
+    for col, (fmt, mime) in zip(cols, EXPORT_FORMATS.items()):
+        with col:
+            path = get_cached_export(df, fmt, index=index, digest=digest)
+            if path is None and st.button(f"Préparer l'export {labels[fmt]}", key=f"export_{key}_{fmt}"):
+                with st.spinner("Préparation de l'export..."):
+                    path = export_frame(df, fmt, index=index, digest=digest)
+            if path is not None:
+                with open(path, 'rb') as f:
+                    st.download_button(
+                        label=f"{labels[fmt]} - Télécharger",
+                        data=f,
+                        file_name=f"{file_name}.{fmt}",
+                        mime=mime,
+                        key=f"download_{key}_{fmt}"
+                    )
+
 def main():
     # Affichage de l'état dans la sidebar
     if st.session_state.get("note_circulaire") and st.session_state.get("note_title"):
@@ -41,11 +78,10 @@ def main():
             actors_data = extract_actors_from_procedure_table(procedure_text)
             
             if actors_data:
-                # Afficher le résumé des statistiques
+                # Résumé calculé une seule fois (totaux, moyenne, acteur le plus actif)
                 summary = get_actors_summary(actors_data)
                 
-                # Créer trois colonnes pour les statistiques
-                col1, col2, col3 = st.columns(3)
+                col1, col2, col3, col4 = st.columns(4)
                 
                 with col1:
                     st.metric("Total des Acteurs", summary['total_acteurs'])
@@ -54,84 +90,35 @@ def main():
                     st.metric("Total des Activités", summary['total_activites'])
                 
                 with col3:
+                    st.metric("Moyenne d'activités par acteur", summary['moyenne_activites_par_acteur'])
+                
+                with col4:
                     if summary['acteur_plus_actif']:
                         st.metric("Acteur le Plus Actif", 
                                 f"{summary['acteur_plus_actif']['nom_acteur']} ({summary['acteur_plus_actif']['nombre_activites']} activités)")
                 
-                # Créer un DataFrame avec toutes les activités des acteurs pour l'export
-                all_activities = []
-                for actor in actors_data:
-                    actor_name = actor['nom_acteur']
-                    for activity in actor['activites']:
-                        activity_row = {
-                            'Acteur': actor_name,
-                            'N°': activity['numero'],
-                            'Activité': activity['activite'],
-                            'Description': activity['description']
-                        }
-                        all_activities.append(activity_row)
-                
-                df_activities = pd.DataFrame(all_activities)
+                # Une ligne par activité (acteurs déjà triés, activités triées par numéro)
+                df_activities = pd.json_normalize(actors_data, 'activites', ['nom_acteur']).rename(columns={
+                    'nom_acteur': 'Acteur',
+                    'numero': 'N°',
+                    'activite': 'Activité',
+                    'description': 'Description'
+                })[['Acteur', 'N°', 'Activité', 'Description']]
                 
                 # Affichage des acteurs et leurs activités dans un tableau Markdown
                 st.markdown("### 📋 Tableau des Acteurs et leurs Activités")
                 
-                # En-tête du tableau
-                table_md = "| Acteur | Activités |\n|--------|------------|\n"
-                
-                # Créer le tableau avec les activités groupées par acteur
-                for actor_info in actors_data:
-                    actor_name = actor_info['nom_acteur']
-                    activities = actor_info['activites']  # Les activités sont déjà triées par numéro
-                    
-                    # Formatter toutes les activités de l'acteur avec retour à la ligne
-                    activities_text = "<br>".join([f"Étape {act['numero']}: {act['activite']}" for act in activities])
-                    
-                    # Ajouter la ligne au tableau
-                    table_md += f"| {actor_name} | {activities_text} |\n"
-                
-                # Afficher le tableau
+                grouped = ("Étape " + df_activities['N°'] + ": " + df_activities['Activité']).groupby(
+                    df_activities['Acteur'], sort=False
+                ).agg("<br>".join)
+                table_md = "| Acteur | Activités |\n|--------|------------|\n" + "\n".join(
+                    f"| {actor_name} | {activities_text} |" for actor_name, activities_text in grouped.items()
+                )
                 st.markdown(table_md, unsafe_allow_html=True)
                 
-                # Statistiques globales
-                st.markdown("### 📊 Statistiques")
-                col1, col2, col3 = st.columns(3)
-                
-                with col1:
-                    st.metric("Nombre total d'acteurs", len(actors_data))
-                with col2:
-                    total_activities = sum(len(actor['activites']) for actor in actors_data)
-                    st.metric("Nombre total d'activités", total_activities)
-                with col3:
-                    avg_activities = round(total_activities / len(actors_data), 2) if actors_data else 0
-                    st.metric("Moyenne d'activités par acteur", avg_activities)
-                
                 # Section d'export des données
                 st.header("💾 Export des Données")
-                
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    # Export CSV
-                    csv_data = df_activities.to_csv(index=False, encoding='utf-8')
-                    st.download_button(
-                        label="📊 Télécharger CSV",
-                        data=csv_data,
-                        file_name="acteurs_activites.csv",
-                        mime="text/csv"
-                    )
-                
-                with col2:
-                    # Export Excel
-                    excel_buffer = BytesIO()
-                    df_activities.to_excel(excel_buffer, index=False, engine='openpyxl')
-                    excel_data = excel_buffer.getvalue()
-                    st.download_button(
-                        label="📑 Télécharger Excel",
-                        data=excel_data,
-                        file_name="acteurs_activites.xlsx",
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                    )
+                export_buttons(df_activities, "acteurs_activites", "session")
                     
             else:
                 st.warning("⚠️ Aucun acteur trouvé dans le tableau. Vérifiez le format de votre tableau.")
@@ -141,6 +128,129 @@ def main():
     else:
         st.info("ℹ️ Veuillez d'abord générer une procédure dans l'onglet 'Tableau Procédures'.")
     
+    # Recherche dans toutes les procédures enregistrées (index global des acteurs)
+    st.header("🔎 Acteurs de toutes les procédures")
+    actor_index = get_actor_index()
+    all_actors = actor_index.summary()
+    
+    if all_actors:
+        selected = st.selectbox(
+            "Acteur",
+            range(len(all_actors)),
+            format_func=lambda i: f"{all_actors[i]['nom_acteur']} ({all_actors[i]['nombre_activites']} activités, "
+                                  f"{all_actors[i]['nombre_procedures']} procédures)"
+        )
+        actor = all_actors[selected]
+        
+        if len(actor['variantes']) > 1:
+            st.caption("Variantes regroupées : " + ", ".join(actor['variantes']))
+        
+        df_actor = pd.DataFrame(actor_index.activities(actor['cle'])).rename(columns={
+            'titre': 'Procédure',
+            'etape_numero': 'N°',
+            'activite': 'Activité',
+            'description': 'Description'
+        }).drop(columns=['source'])
+        st.dataframe(df_actor, use_container_width=True, hide_index=True)
+    else:
+        st.info("ℹ️ Aucune procédure enregistrée.")
+    
+    # Charge des acteurs sur toute l'archive (indicateurs mémorisés par utils.actor_analytics)
+    st.header("📈 Charge des acteurs sur toutes les procédures")
+    analytics = get_actor_analytics()
+    archive = analytics.summary()
+    
+    if archive['total_acteurs']:
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Procédures", archive['total_procedures'])
+        with col2:
+            st.metric("Étapes", archive['total_etapes'])
+        with col3:
+            st.metric("Acteurs", archive['total_acteurs'])
+        with col4:
+            st.metric("Moyenne d'étapes par acteur", archive['moyenne_etapes_par_acteur'])
+        
+        tab_charge, tab_matrice, tab_documents, tab_applications, tab_cooccurrence = st.tabs([
+            "Charge", "Acteurs × dossiers", "Documents", "Applications", "Co-occurrences"
+        ])
+        
+        with tab_charge:
+            st.dataframe(
+                analytics.actor_workload.rename(columns={
+                    'etapes': 'Étapes', 'procedures': 'Procédures', 'dossiers': 'Dossiers', 'part': '% des étapes'
+                }),
+                use_container_width=True
+            )
+        
+        with tab_matrice:
+            max_actors = st.number_input("Acteurs affichés", min_value=1, max_value=archive['total_acteurs'],
+                                         value=min(20, archive['total_acteurs']), step=5)
+            st.dataframe(analytics.workload_matrix.head(max_actors), use_container_width=True)
+        
+        with tab_documents:
+            st.dataframe(
+                analytics.document_usage.rename(columns={'etapes': 'Étapes', 'procedures': 'Procédures'}),
+                use_container_width=True
+            )
+        
+        with tab_applications:
+            st.dataframe(
+                analytics.application_usage.rename(columns={'etapes': 'Étapes', 'procedures': 'Procédures'}),
+                use_container_width=True
+            )
+        
+        with tab_cooccurrence:
+            st.dataframe(
+                analytics.top_pairs(30).rename(columns={
+                    'acteur_1': 'Acteur', 'acteur_2': 'Acteur associé', 'etapes_communes': 'Étapes communes'
+                }),
+                use_container_width=True,
+                hide_index=True
+            )
+        
+        st.subheader("💾 Export de l'archive")
+        st.caption(f"{len(analytics.activity_table)} activités, tous acteurs et toutes procédures confondus.")
+        export_buttons(analytics.activity_table, "acteurs_activites_archive", "archive",
+                       digest=analytics.activity_table_digest)
+    else:
+        st.info("ℹ️ Aucune étape enregistrée.")
+    
+    # Transmissions entre acteurs (graphe global mis à jour à chaque sauvegarde)
+    st.header("🔀 Transmissions entre acteurs")
+    handoff_graph = get_handoff_graph()
+    bottlenecks = handoff_graph.bottlenecks(15)
+    
+    if not bottlenecks.empty:
+        st.caption("Deux étapes consécutives d'une procédure impliquent une transmission du travail. "
+                   "Le transit est le volume reçu puis retransmis par l'acteur : les premiers sont les goulots potentiels.")
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("**Goulots d'étranglement**")
+            st.dataframe(
+                bottlenecks.rename(index=actor_index.display_name).rename(columns={
+                    'recues': 'Reçues', 'transmises': 'Transmises', 'predecesseurs': 'Prédécesseurs',
+                    'successeurs': 'Successeurs', 'pagerank': 'PageRank', 'transit': 'Transit',
+                    'part_transit': '% du transit'
+                }),
+                use_container_width=True
+            )
+        
+        with col2:
+            st.markdown("**Transmissions les plus fréquentes**")
+            st.dataframe(
+                pd.DataFrame([{
+                    'De': actor_index.display_name(handoff['de']),
+                    'Vers': actor_index.display_name(handoff['vers']),
+                    'Nombre': handoff['nombre']
+                } for handoff in handoff_graph.top_handoffs(15)]),
+                use_container_width=True,
+                hide_index=True
+            )
+    else:
+        st.info("ℹ️ Aucune transmission entre acteurs.")
+    
     
 
 if __name__ == "__main__":
@@ -4,8 +4,7 @@ Module utils - Fonctions utilitaires pour l'application de gestion des notes cir
 Ce package fournit les fonctionnalités communes et les utilitaires utilisés dans l'ensemble de l'application.
 """
 
-# Import des modules pour les rendre disponibles via utils.*
-from models.config import *  
+import importlib
 
 # Définition des modules à exposer lors d'un import *
 __all__ = [
@@ -25,37 +24,41 @@ __author__ = 'Auteur de l\'application'
 __email__ = 'email@example.com'
 __description__ = 'Utilitaires pour la gestion des notes circulaires et procédures'
 
+# Sous-modules chargés au premier accès (utils.procedure_gen...) : importer le package
+# ne charge ni LangChain, ni pandas (voir utils.lazy_import)
+_SUBMODULES = {'pdf_parser', 'procedure_gen'}
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    config = importlib.import_module('models.config')
+    if name == 'config':
+        return config
+    # Constantes de configuration, auparavant importées par "from models.config import *"
+    if name.isupper() and hasattr(config, name):
+        return getattr(config, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
 # Fonction d'initialisation qui peut être utilisée pour configurer le module
 def init():
     """
     Initialise le module utils et prépare l'environnement nécessaire.
     
     Cette fonction crée les répertoires nécessaires s'ils n'existent pas déjà
-    et configure les paramètres de base du module.
+    et le fichier de données initial (voir models.settings.ensure_storage).
     
     Returns:
         bool: True si l'initialisation est réussie, False sinon
     """
     try:
-        from pathlib import Path
-        import os
-        
-        # Création des répertoires nécessaires
-        base_dir = Path(__file__).parent.parent
-        data_dir = base_dir / "data"
-        temp_dir = base_dir / "temp"
-        
-        data_dir.mkdir(exist_ok=True)
-        temp_dir.mkdir(exist_ok=True)
-        (temp_dir / "pdf").mkdir(exist_ok=True)
-        
-        # Création du fichier de données s'il n'existe pas
-        data_file = data_dir / "donnees.json"
-        if not data_file.exists():
-            with open(data_file, 'w', encoding='utf-8') as f:
-                import json
-                json.dump({"circulaires": [], "procedures": []}, f, ensure_ascii=False, indent=2)
-        
+        from models.settings import ensure_storage
+        ensure_storage()
         return True
     except Exception as e:
         print(f"Erreur lors de l'initialisation du module utils: {e}")
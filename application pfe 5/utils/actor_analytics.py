@@ -0,0 +1,291 @@
+"""
+Module d'analyse de la charge des acteurs sur l'ensemble des procédures enregistrées.
+
+Toutes les étapes des dossiers (data/donnee.json) et des procédures générées
+(data/donnees.json) sont chargées une seule fois dans deux DataFrame en
+colonnes :
+    - etapes : une ligne par étape (source, dossier, numéro, activité,
+      documents, applications) ;
+    - acteurs : une ligne par couple (étape, acteur), l'acteur étant identifié
+      par sa clé normalisée (voir utils.actor_index).
+
+Les indicateurs sont calculés par des opérations vectorisées pandas/NumPy
+(groupby, tableaux croisés, produit matriciel) puis mémorisés sur l'instance :
+    - charge par acteur et matrice de charge acteur × dossier ;
+    - usage des documents et des applications ;
+    - co-occurrence des acteurs (nombre d'étapes partagées).
+
+L'instance est partagée par le processus et reconstruite uniquement lorsque
+l'un des fichiers de données change (date de modification ou taille).
+"""
+
+import json
+import re
+import threading
+from functools import cached_property
+from pathlib import Path
+from typing import Dict, Union
+
+import numpy as np
+import pandas as pd
+
+from utils.actor_index import DATA_PATH, DOSSIERS_PATH, _file_signature, iter_data_sources, normalize_actor
+from utils.markdown_table import split_actors
+from utils.table_export import frame_digest
+
+# Dossier affecté aux procédures générées (data/donnees.json)
+GENERATED_DOSSIER = "Procédures générées"
+
+# Séparateurs des documents d'une cellule : virgules, retours à la ligne, puces, "Entrée :"/"Sortie :"...
+_DOCUMENT_SPLIT_RE = re.compile(
+    r'\s*(?:<br\s*/?>|\n|[,;]|\s{2,}|(?:^|\s)-\s|\b(?:entr[ée]es?|sorties?)\s*:)\s*',
+    re.IGNORECASE
+)
+# Les applications sont en plus séparées par des "/" ("T24/SIRON")
+_APPLICATION_SPLIT_RE = re.compile(_DOCUMENT_SPLIT_RE.pattern + r'|\s*/\s*', re.IGNORECASE)
+
+_STEP_COLUMNS = ['source', 'titre', 'dossier', 'numero', 'activite', 'acteurs', 'documents', 'applications']
+
+
+def _split_items(values: pd.Series, pattern: re.Pattern) -> pd.Series:
+    """Découpe chaque cellule en éléments (une ligne par élément, index de l'étape conservé)."""
+    items = values.str.split(pattern).explode().str.strip(' -•*:.')
+    return items[items.str.len() > 1]
+
+
+def load_steps_frame(dossiers_path: Union[str, Path] = DOSSIERS_PATH,
+                     data_path: Union[str, Path] = DATA_PATH) -> pd.DataFrame:
+    """
+    Charge toutes les étapes enregistrées dans un DataFrame (une ligne par étape).
+
+    Args:
+        dossiers_path (Union[str, Path], optional): Fichier des dossiers. Defaults to DOSSIERS_PATH.
+        data_path (Union[str, Path], optional): Fichier des procédures générées. Defaults to DATA_PATH.
+
+    Returns:
+        pd.DataFrame: Colonnes source, titre, dossier, numero, activite, acteurs, documents, applications.
+    """
+    rows = []
+    for path in (dossiers_path, data_path):
+        if not Path(path).exists():
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        for source_id, titre, etapes in iter_data_sources(data):
+            dossier = titre if source_id.startswith('dossier_') else GENERATED_DOSSIER
+            for etape in etapes:
+                if not isinstance(etape, dict):
+                    continue
+                rows.append((
+                    source_id, titre, dossier,
+                    str(etape.get('N°', '')).strip(),
+                    etape.get('Activités') or etape.get('Description') or '',
+                    etape.get('Acteurs') or '',
+                    etape.get('Documents') or '',
+                    etape.get('Applications') or ''
+                ))
+
+    steps = pd.DataFrame(rows, columns=_STEP_COLUMNS)
+    for column in ('acteurs', 'documents', 'applications'):
+        steps[column] = steps[column].astype(str)
+    return steps
+
+
+class ActorAnalytics:
+    """Indicateurs de charge des acteurs, calculés à la demande puis mémorisés."""
+
+    def __init__(self, steps: pd.DataFrame):
+        """
+        Args:
+            steps (pd.DataFrame): Étapes renvoyées par load_steps_frame.
+        """
+        self.steps = steps.reset_index(drop=True)
+
+        # Une ligne par couple (étape, acteur) ; l'index d'origine identifie l'étape
+        names = self.steps['acteurs'].map(split_actors).explode().dropna().str.strip(' -•*')
+        names = names[names != '']
+        actors = pd.DataFrame({
+            'etape': names.index.to_numpy(),
+            'variante': names.to_numpy(),
+            'cle': names.map(normalize_actor).to_numpy(),
+        })
+        actors = actors[actors['cle'] != ''].drop_duplicates(['etape', 'cle'])
+
+        # Nom affiché : la variante la plus fréquente de chaque clé
+        variants = actors.groupby(['cle', 'variante']).size().sort_values(ascending=False)
+        display = variants.reset_index().drop_duplicates('cle').set_index('cle')['variante']
+        actors['acteur'] = actors['cle'].map(display)
+        for column in ('source', 'dossier'):
+            actors[column] = self.steps[column].to_numpy()[actors['etape'].to_numpy()]
+        self.actors = actors.reset_index(drop=True)
+
+    def summary(self) -> Dict:
+        """
+        Résumé global de l'archive.
+
+        Returns:
+            Dict: {"total_procedures", "total_etapes", "total_acteurs", "moyenne_etapes_par_acteur",
+                   "acteur_plus_actif"}.
+        """
+        workload = self.actor_workload
+        return {
+            'total_procedures': int(self.steps['source'].nunique()),
+            'total_etapes': len(self.steps),
+            'total_acteurs': len(workload),
+            'moyenne_etapes_par_acteur': round(float(workload['etapes'].mean()), 2) if len(workload) else 0,
+            'acteur_plus_actif': workload.index[0] if len(workload) else None,
+        }
+
+    @cached_property
+    def actor_workload(self) -> pd.DataFrame:
+        """
+        Charge de chaque acteur, triée par nombre d'étapes décroissant.
+
+        Returns:
+            pd.DataFrame: Indexé par acteur ; colonnes etapes, procedures, dossiers, part (% des étapes).
+        """
+        workload = self.actors.groupby('acteur').agg(
+            etapes=('etape', 'size'),
+            procedures=('source', 'nunique'),
+            dossiers=('dossier', 'nunique'),
+        ).sort_values('etapes', ascending=False)
+        total = len(self.steps)
+        workload['part'] = (workload['etapes'] * 100 / total).round(1) if total else 0.0
+        return workload
+
+    @cached_property
+    def activity_table(self) -> pd.DataFrame:
+        """
+        Toutes les activités de tous les acteurs, prêtes à l'export.
+
+        Returns:
+            pd.DataFrame: Colonnes Acteur, Dossier, Procédure, N°, Activité (triées par acteur).
+        """
+        steps = self.steps[['titre', 'numero', 'activite']].to_numpy()[self.actors['etape'].to_numpy()]
+        table = pd.DataFrame({
+            'Acteur': self.actors['acteur'].to_numpy(),
+            'Dossier': self.actors['dossier'].to_numpy(),
+            'Procédure': steps[:, 0],
+            'N°': steps[:, 1],
+            'Activité': steps[:, 2],
+        })
+        return table.sort_values(['Acteur', 'Dossier'], kind='stable', ignore_index=True)
+
+    @cached_property
+    def activity_table_digest(self) -> str:
+        """Empreinte du contenu de activity_table (voir utils.table_export.frame_digest), pour ses exports."""
+        return frame_digest(self.activity_table)
+
+    @cached_property
+    def workload_matrix(self) -> pd.DataFrame:
+        """
+        Matrice de charge : nombre d'étapes de chaque acteur dans chaque dossier.
+
+        Returns:
+            pd.DataFrame: Acteurs en lignes (les plus chargés en premier), dossiers en colonnes.
+        """
+        matrix = self.actors.groupby(['acteur', 'dossier']).size().unstack(fill_value=0)
+        return matrix.loc[self.actor_workload.index]
+
+    def _usage(self, column: str, pattern: re.Pattern) -> pd.DataFrame:
+        items = _split_items(self.steps[column], pattern)
+        usage = pd.DataFrame({
+            'nom': items.to_numpy(),
+            'source': self.steps['source'].to_numpy()[items.index.to_numpy()],
+        })
+        return usage.groupby('nom').agg(
+            etapes=('source', 'size'),
+            procedures=('source', 'nunique'),
+        ).sort_values('etapes', ascending=False)
+
+    @cached_property
+    def document_usage(self) -> pd.DataFrame:
+        """
+        Usage des documents.
+
+        Returns:
+            pd.DataFrame: Indexé par document ; colonnes etapes, procedures.
+        """
+        return self._usage('documents', _DOCUMENT_SPLIT_RE)
+
+    @cached_property
+    def application_usage(self) -> pd.DataFrame:
+        """
+        Usage des applications.
+
+        Returns:
+            pd.DataFrame: Indexé par application ; colonnes etapes, procedures.
+        """
+        return self._usage('applications', _APPLICATION_SPLIT_RE)
+
+    @cached_property
+    def cooccurrence(self) -> pd.DataFrame:
+        """
+        Co-occurrence des acteurs : nombre d'étapes où deux acteurs interviennent ensemble.
+
+        La matrice est le produit M.T @ M de la matrice d'incidence étapes × acteurs,
+        limitée aux étapes qui comptent au moins deux acteurs. La diagonale est nulle.
+
+        Returns:
+            pd.DataFrame: Matrice symétrique acteur × acteur (ordre de actor_workload).
+        """
+        names = self.actor_workload.index
+        actor_codes = pd.Categorical(self.actors['acteur'], categories=names).codes
+        step_ids = self.actors['etape'].to_numpy()
+        shared = np.bincount(step_ids)[step_ids] > 1
+
+        step_codes, _ = pd.factorize(step_ids[shared])
+        incidence = np.zeros((step_codes.max() + 1 if len(step_codes) else 0, len(names)), dtype=np.float32)
+        incidence[step_codes, actor_codes[shared]] = 1
+        counts = (incidence.T @ incidence).astype(np.int64)
+        np.fill_diagonal(counts, 0)
+        return pd.DataFrame(counts, index=names, columns=names)
+
+    def top_pairs(self, limit: int = 20) -> pd.DataFrame:
+        """
+        Couples d'acteurs qui interviennent le plus souvent dans les mêmes étapes.
+
+        Args:
+            limit (int, optional): Nombre de couples. Defaults to 20.
+
+        Returns:
+            pd.DataFrame: Colonnes acteur_1, acteur_2, etapes_communes.
+        """
+        counts = self.cooccurrence.to_numpy()
+        rows, cols = np.triu_indices(len(counts), k=1)
+        values = counts[rows, cols]
+        order = np.argsort(values, kind='stable')[::-1][:limit]
+        order = order[values[order] > 0]
+        names = self.cooccurrence.index.to_numpy()
+        return pd.DataFrame({
+            'acteur_1': names[rows[order]],
+            'acteur_2': names[cols[order]],
+            'etapes_communes': values[order],
+        })
+
+
+_analytics = None
+_analytics_signature = None
+_analytics_lock = threading.Lock()
+
+
+def get_actor_analytics(dossiers_path: Union[str, Path] = DOSSIERS_PATH,
+                        data_path: Union[str, Path] = DATA_PATH) -> ActorAnalytics:
+    """
+    Renvoie les indicateurs partagés du processus, reconstruits si un fichier de données a changé.
+
+    Args:
+        dossiers_path (Union[str, Path], optional): Fichier des dossiers. Defaults to DOSSIERS_PATH.
+        data_path (Union[str, Path], optional): Fichier des procédures générées. Defaults to DATA_PATH.
+
+    Returns:
+        ActorAnalytics: Les indicateurs de l'archive.
+    """
+    global _analytics, _analytics_signature
+    signature = (str(dossiers_path), _file_signature(dossiers_path),
+                 str(data_path), _file_signature(data_path))
+    with _analytics_lock:
+        if _analytics is None or signature != _analytics_signature:
+            _analytics = ActorAnalytics(load_steps_frame(dossiers_path, data_path))
+            _analytics_signature = signature
+        return _analytics
@@ -0,0 +1,430 @@
+"""
+Module d'index global des acteurs de toutes les procédures enregistrées.
+
+Les noms d'acteurs sont normalisés (casse, accents, ponctuation, mots vides,
+table d'alias) afin que "Chargé de clientèle" et "chargé clientèle" désignent
+le même acteur. Pour chaque acteur, l'index conserve ses listes d'occurrences
+(procédure source, position de l'étape) ; les activités d'un acteur sont donc
+obtenues sans reparcourir les dossiers. Les étapes sont repérées par leur
+position : deux étapes de même numéro restent distinctes, le numéro ne sert
+qu'à l'affichage.
+
+L'index est enregistré dans data/actor_index.json et mis à jour procédure par
+procédure à chaque sauvegarde (update_actor_index) : seules les occurrences de
+la procédure modifiée sont retirées puis réinsérées, et la signature des
+fichiers de données qui en résulte est retenue. Lorsqu'un fichier de données
+change autrement (date de modification ou taille), l'index est rapproché de
+son contenu (reconcile) : procédures ajoutées ou modifiées réindexées,
+procédures supprimées retirées.
+
+Chaque procédure est identifiée par un identifiant stable (procedure_source_id),
+qui ne change pas lorsqu'une procédure précédente est supprimée.
+
+Structure du fichier :
+    {
+        "version": INDEX_VERSION,
+        "acteurs": {clé: {"variantes": {nom: nombre}, "occurrences": [[source, position], ...]}},
+        "sources": {source: {"titre", "empreinte", "etapes": [{"numero", "activite", "description"}, ...],
+                             "acteurs": [clé, ...], "variantes": {clé: {nom: nombre}}}}
+    }
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from models.config import DATA_DIR, DATA_FILE, DOSSIERS_FILE
+from utils.markdown_table import parse_procedure_steps, split_actors, steps_to_records
+
+ACTOR_INDEX_PATH = str(DATA_DIR / "actor_index.json")
+DOSSIERS_PATH = str(DOSSIERS_FILE)
+DATA_PATH = str(DATA_FILE)
+
+# Format du fichier d'index ; un index d'un autre format est reconstruit
+INDEX_VERSION = 2
+
+# Alias : nom (ou abréviation) -> nom de référence ; les deux côtés sont normalisés au chargement
+ACTOR_ALIASES = {
+    "BCT": "Banque Centrale de Tunisie",
+    "DOP": "Département Organisation et Procédures",
+    "RH": "Ressources Humaines",
+    "DRH": "Direction des Ressources Humaines",
+    "DSI": "Direction des Systèmes d'Information",
+    "Chargé de compte": "Chargé de clientèle",
+    "Conseiller clientèle": "Chargé de clientèle",
+}
+
+# Mots ignorés dans la clé d'un acteur
+_STOPWORDS = frozenset({'de', 'du', 'des', 'd', 'la', 'le', 'les', 'l', 'a', 'au', 'aux'})
+
+_NON_WORD_RE = re.compile(r"[^0-9a-z]+")
+
+
+@lru_cache(maxsize=8192)
+def _normalize(name: str) -> str:
+    decomposed = unicodedata.normalize('NFKD', name.casefold())
+    ascii_name = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    words = _NON_WORD_RE.split(ascii_name)
+    return ' '.join(word for word in words if word and word not in _STOPWORDS)
+
+
+_ALIASES = {_normalize(alias): _normalize(target) for alias, target in ACTOR_ALIASES.items()}
+
+
+def normalize_actor(name: str) -> str:
+    """
+    Calcule la clé d'un acteur : minuscules sans accents ni ponctuation, mots vides retirés, alias résolus.
+
+    Args:
+        name (str): Le nom de l'acteur tel qu'écrit dans la procédure.
+
+    Returns:
+        str: La clé normalisée ("" si le nom est vide).
+    """
+    key = _normalize(name)
+    return _ALIASES.get(key, key)
+
+
+def actor_keys(acteurs: str) -> List[Tuple[str, str]]:
+    """
+    Découpe la cellule "Acteurs" d'une étape en acteurs identifiés par leur clé.
+
+    Args:
+        acteurs (str): La cellule (plusieurs acteurs séparés par virgule, "/", "et"...).
+
+    Returns:
+        List[Tuple[str, str]]: Couples (nom tel qu'écrit, clé normalisée), noms vides ignorés.
+    """
+    result = []
+    for name in split_actors(acteurs):
+        name = name.strip(' -•*')
+        key = normalize_actor(name)
+        if key:
+            result.append((name, key))
+    return result
+
+
+def _steps_hash(titre: str, etapes: List[Dict]) -> str:
+    payload = json.dumps([titre, etapes], ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _file_signature(path: Union[str, Path]) -> Optional[Tuple[int, int]]:
+    path = Path(path)
+    if not path.exists():
+        return None
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def data_files_signature() -> Tuple:
+    """Signature (date de modification, taille) des fichiers de données DOSSIERS_PATH et DATA_PATH."""
+    return tuple((str(data_path), _file_signature(data_path)) for data_path in (DOSSIERS_PATH, DATA_PATH))
+
+
+def procedure_source_id(proc: Dict) -> str:
+    """
+    Identifiant stable d'une procédure de la liste "procedures".
+
+    Args:
+        proc (Dict): La procédure enregistrée.
+
+    Returns:
+        str: "procedure_<id>" si la procédure a un identifiant, sinon "procedure_<empreinte>"
+            de son titre et de sa date de création.
+    """
+    if proc.get('id'):
+        return f"procedure_{proc['id']}"
+    payload = json.dumps([proc.get('titre', ''), proc.get('date_creation', '')], ensure_ascii=False)
+    return f"procedure_{hashlib.sha256(payload.encode('utf-8')).hexdigest()[:12]}"
+
+
+class ActorIndex:
+    """Index des acteurs : clé normalisée -> occurrences (procédure, étape)."""
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        """
+        Args:
+            path (Optional[Union[str, Path]], optional): Fichier de l'index
+                (None pour un index uniquement en mémoire).
+        """
+        self.path = Path(path) if path else None
+        self.actors = {}
+        self.sources = {}
+        self._lock = threading.RLock()
+
+        if self.path and self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                self.actors = data.get("acteurs", {})
+                self.sources = data.get("sources", {})
+
+    def save(self) -> None:
+        """Enregistre l'index de façon atomique (fichier temporaire puis renommage)."""
+        if not self.path:
+            return
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": INDEX_VERSION, "acteurs": self.actors, "sources": self.sources}, f,
+                          ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+    def remove_source(self, source_id: str) -> None:
+        """Retire toutes les occurrences d'une procédure."""
+        with self._lock:
+            source = self.sources.pop(source_id, None)
+            if not source:
+                return
+            for key in source['acteurs']:
+                actor = self.actors.get(key)
+                if not actor:
+                    continue
+                kept = [posting for posting in actor['occurrences'] if posting[0] != source_id]
+                actor['occurrences'] = kept
+                for variant, count in source['variantes'].get(key, {}).items():
+                    actor['variantes'][variant] = actor['variantes'].get(variant, 0) - count
+                    if actor['variantes'][variant] <= 0:
+                        del actor['variantes'][variant]
+                if not kept:
+                    del self.actors[key]
+
+    def update_source(self, source_id: str, titre: str, etapes: Iterable[Dict]) -> bool:
+        """
+        Indexe (ou réindexe) les étapes d'une procédure.
+
+        Args:
+            source_id (str): Identifiant stable de la procédure ("dossier_3/3.1", "procedure_12"...).
+            titre (str): Titre de la procédure.
+            etapes (Iterable[Dict]): Étapes au format enregistré ({"N°", "Activités", "Description", "Acteurs"}).
+
+        Returns:
+            bool: False si la procédure était déjà indexée à l'identique.
+        """
+        etapes = [etape for etape in etapes if isinstance(etape, dict)]
+        empreinte = _steps_hash(titre, etapes)
+
+        with self._lock:
+            if self.sources.get(source_id, {}).get('empreinte') == empreinte:
+                return False
+            self.remove_source(source_id)
+
+            source = {'titre': titre, 'empreinte': empreinte, 'etapes': [], 'acteurs': [], 'variantes': {}}
+            for etape in etapes:
+                numero = str(etape.get('N°', '')).strip()
+                acteurs = str(etape.get('Acteurs', '') or '')
+                if not numero or not acteurs:
+                    continue
+                position = len(source['etapes'])
+                source['etapes'].append({
+                    'numero': numero,
+                    'activite': etape.get('Activités', ''),
+                    'description': etape.get('Description', '')
+                })
+                for name, key in actor_keys(acteurs):
+                    actor = self.actors.setdefault(key, {'variantes': {}, 'occurrences': []})
+                    actor['occurrences'].append([source_id, position])
+                    actor['variantes'][name] = actor['variantes'].get(name, 0) + 1
+                    if key not in source['variantes']:
+                        source['acteurs'].append(key)
+                        source['variantes'][key] = {}
+                    source['variantes'][key][name] = source['variantes'][key].get(name, 0) + 1
+
+            self.sources[source_id] = source
+            return True
+
+    def reconcile(self, sources: Iterable[tuple]) -> bool:
+        """
+        Rapproche l'index de la liste complète des procédures (voir iter_data_sources).
+
+        Args:
+            sources (Iterable[tuple]): Toutes les procédures (identifiant, titre, étapes).
+
+        Returns:
+            bool: True si l'index a changé.
+        """
+        with self._lock:
+            changed = False
+            seen = set()
+            for source_id, titre, etapes in sources:
+                seen.add(source_id)
+                changed = self.update_source(source_id, titre, etapes) or changed
+            for source_id in set(self.sources) - seen:
+                self.remove_source(source_id)
+                changed = True
+            return changed
+
+    def display_name(self, key: str) -> str:
+        """Nom affiché d'un acteur : sa variante la plus fréquente."""
+        variants = self.actors.get(key, {}).get('variantes')
+        return Counter(variants).most_common(1)[0][0] if variants else key
+
+    def activities(self, name: str) -> List[Dict]:
+        """
+        Renvoie toutes les activités d'un acteur, quelle que soit l'orthographe de son nom.
+
+        Args:
+            name (str): Nom (ou clé) de l'acteur.
+
+        Returns:
+            List[Dict]: Activités {"source", "titre", "etape_numero", "activite", "description"}.
+        """
+        with self._lock:
+            actor = self.actors.get(normalize_actor(name))
+            if not actor:
+                return []
+            result = []
+            for source_id, position in actor['occurrences']:
+                source = self.sources[source_id]
+                etape = source['etapes'][position]
+                result.append({
+                    'source': source_id,
+                    'titre': source['titre'],
+                    'etape_numero': etape['numero'],
+                    'activite': etape['activite'],
+                    'description': etape['description']
+                })
+            return result
+
+    def summary(self) -> List[Dict]:
+        """
+        Liste des acteurs triée par nombre d'activités décroissant.
+
+        Returns:
+            List[Dict]: {"cle", "nom_acteur", "variantes", "nombre_activites", "nombre_procedures"}.
+        """
+        with self._lock:
+            result = [{
+                'cle': key,
+                'nom_acteur': self.display_name(key),
+                'variantes': sorted(actor['variantes']),
+                'nombre_activites': len(actor['occurrences']),
+                'nombre_procedures': len({posting[0] for posting in actor['occurrences']})
+            } for key, actor in self.actors.items()]
+        result.sort(key=lambda x: x['nombre_activites'], reverse=True)
+        return result
+
+
+def iter_data_procedures(data: Dict) -> Iterable[tuple]:
+    """
+    Parcourt les procédures d'une structure de données ("dossiers" et/ou "procedures").
+
+    Args:
+        data (Dict): Contenu d'un fichier de données.
+
+    Yields:
+        tuple: (identifiant stable de la source, titre, étapes au format enregistré,
+            procédure telle qu'enregistrée).
+    """
+    # Identifiant répété (numéro de procédure en double, procédures anciennes sans
+    # identifiant de même titre et même date) : suffixe d'ordre
+    seen = Counter()
+
+    def unique(source_id):
+        seen[source_id] += 1
+        return source_id if seen[source_id] == 1 else f"{source_id}_{seen[source_id]}"
+
+    for dossier in data.get('dossiers', []):
+        for index, proc in enumerate(dossier.get('procedures', []), start=1):
+            if isinstance(proc, dict) and 'etapes' in proc:
+                numero = proc.get('numero') or f"{dossier.get('numero')}.{index}"
+                source_id = unique(f"dossier_{dossier.get('numero')}/{numero}")
+                yield source_id, dossier.get('nom', ''), proc['etapes'], proc
+
+    for proc in data.get('procedures', []):
+        if not isinstance(proc, dict):
+            continue
+        source_id = unique(procedure_source_id(proc))
+        if 'etapes' in proc:
+            yield source_id, proc.get('titre', ''), proc['etapes'], proc
+        elif proc.get('contenu'):
+            # Procédure générée enregistrée en Markdown ({"procedure", "io_table"} ou texte)
+            contenu = proc['contenu']
+            text = contenu.get('procedure', '') if isinstance(contenu, dict) else contenu
+            yield source_id, proc.get('titre', ''), steps_to_records(parse_procedure_steps(text)), proc
+
+
+def iter_data_sources(data: Dict) -> Iterable[tuple]:
+    """
+    Parcourt les procédures d'une structure de données (voir iter_data_procedures).
+
+    Args:
+        data (Dict): Contenu d'un fichier de données.
+
+    Yields:
+        tuple: (identifiant stable de la source, titre, étapes au format enregistré).
+    """
+    for source_id, titre, etapes, _ in iter_data_procedures(data):
+        yield source_id, titre, etapes
+
+
+def iter_file_sources(paths: Iterable[Union[str, Path]]) -> Iterable[tuple]:
+    """Parcourt les procédures des fichiers de données existants (voir iter_data_sources)."""
+    for data_path in paths:
+        if Path(data_path).exists():
+            with open(data_path, 'r', encoding='utf-8') as f:
+                yield from iter_data_sources(json.load(f))
+
+
+_actor_index = None
+_actor_index_signature = None
+_actor_index_lock = threading.Lock()
+
+
+def get_actor_index(path: Union[str, Path] = ACTOR_INDEX_PATH) -> ActorIndex:
+    """
+    Renvoie l'index des acteurs du processus, rapproché des fichiers de données s'ils ont changé.
+
+    Args:
+        path (Union[str, Path], optional): Fichier de l'index. Defaults to ACTOR_INDEX_PATH.
+
+    Returns:
+        ActorIndex: L'index partagé.
+    """
+    global _actor_index, _actor_index_signature
+    signature = data_files_signature()
+    with _actor_index_lock:
+        if _actor_index is None:
+            _actor_index = ActorIndex(path)
+        if signature != _actor_index_signature:
+            index_path = _actor_index.path
+            if (_actor_index.reconcile(iter_file_sources((DOSSIERS_PATH, DATA_PATH)))
+                    or (index_path and not index_path.exists())):
+                _actor_index.save()
+            _actor_index_signature = signature
+        return _actor_index
+
+
+def update_actor_index(source_id: str, titre: str, etapes: Iterable[Dict]) -> None:
+    """
+    Met à jour l'index partagé après la sauvegarde d'une procédure, puis l'enregistre.
+
+    Seule la procédure sauvegardée est réindexée ; la nouvelle signature des fichiers
+    de données est retenue, pour que get_actor_index ne reparcoure pas l'archive.
+    Une modification faite entre-temps par un autre processus n'est donc prise en
+    compte qu'au changement suivant des fichiers.
+
+    Args:
+        source_id (str): Identifiant de la procédure (voir iter_data_sources).
+        titre (str): Titre de la procédure.
+        etapes (Iterable[Dict]): Étapes au format enregistré.
+    """
+    global _actor_index_signature
+    with _actor_index_lock:
+        index = _actor_index
+        if index is not None:
+            if index.update_source(source_id, titre, etapes):
+                index.save()
+            _actor_index_signature = data_files_signature()
+            return
+    # Index pas encore chargé : le rapprochement initial inclut la procédure sauvegardée
+    get_actor_index()
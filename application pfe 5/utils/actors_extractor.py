@@ -1,7 +1,9 @@
-import re
 from collections import defaultdict
 import json
 
+from utils.actor_index import ActorIndex, iter_data_sources
+from utils.markdown_table import parse_procedure_steps
+
 def extract_actors_from_procedure_table(procedure_text):
     """
     Extrait les acteurs et leurs activités à partir d'un tableau de procédure au format Markdown
@@ -17,35 +19,17 @@ def extract_actors_from_procedure_table(procedure_text):
     if not procedure_text or not isinstance(procedure_text, str):
         return []
     
-    # Nettoyer le texte et diviser en lignes
-    lines = procedure_text.strip().split('\n')
-    
-    # Trouver les lignes du tableau (qui commencent par |)
-    table_lines = [line.strip() for line in lines if line.strip().startswith('|') and '---' not in line]
-    
-    # Ignorer la ligne d'en-tête (première ligne du tableau)
-    if len(table_lines) > 1:
-        data_lines = table_lines[2:]  # Ignorer l'en-tête et la ligne de séparation
-        for line in data_lines:
-            columns = [col.strip() for col in line.split('|')[1:-1]]
-            
-            # S'assurer qu'il y a assez de colonnes
-            if len(columns) >= 4:  # Au minimum: N°, Activité, Description, Acteur
-                numero = columns[0].strip()
-                activite = columns[1].strip()
-                acteur = columns[3].strip()  # L'acteur est généralement dans la 4ème colonne                # Ignorer les lignes vides ou invalides
-                if acteur and activite and numero:
-                    # Pour chaque acteur listé (séparé par des virgules, points-virgules ou 'et')
-                    acteurs_liste = re.split(r'[,;/]|\set\s', acteur)
-                    for acteur_individuel in acteurs_liste:
-                        acteur_individuel = acteur_individuel.strip()
-                        if acteur_individuel:
-                            # Ajouter l'activité à la liste de l'acteur
-                            actors_activities[acteur_individuel].append({
-                                'numero': numero,
-                                'activite': activite,
-                                'description': columns[2].strip() if len(columns) > 2 else ''
-                            })
+    for step in parse_procedure_steps(procedure_text):
+        # Ignorer les lignes vides ou invalides
+        if step.acteurs and step.activite and step.numero:
+            # Pour chaque acteur listé (séparé par des virgules, points-virgules ou 'et')
+            for acteur_individuel in step.acteurs_list:
+                # Ajouter l'activité à la liste de l'acteur
+                actors_activities[acteur_individuel].append({
+                    'numero': step.numero,
+                    'activite': step.activite,
+                    'description': step.description
+                })
     
     # Convertir en liste de dictionnaires pour la réponse JSON
     result = []
@@ -67,6 +51,7 @@ def extract_actors_from_procedure_table(procedure_text):
 def extract_actors_from_data_structure(data):
     """
     Extrait les acteurs à partir de la structure de données JSON complète
+    Les variantes d'écriture d'un même acteur sont regroupées (voir utils.actor_index)
     
     Args:
         data (dict): Structure de données complète avec dossiers et procédures
@@ -74,55 +59,28 @@ def extract_actors_from_data_structure(data):
     Returns:
         list: Liste des acteurs avec leurs activités
     """
-    actors_activities = defaultdict(list)
-    
     if not data or not isinstance(data, dict):
         return []
     
-    dossiers = data.get('dossiers', []) if isinstance(data, dict) else data
-    
-    for dossier in dossiers:
-        numero_dossier = dossier.get('numero', 'N/A')
-        nom_dossier = dossier.get('nom', 'N/A')
-        procedures = dossier.get('procedures', [])
-        
-        for proc in procedures:
-            if isinstance(proc, dict) and 'etapes' in proc:
-                for etape in proc.get('etapes', []):
-                    if isinstance(etape, dict):
-                        numero = etape.get('N°', 'N/A')
-                        activite = etape.get('Activités', 'N/A')
-                        description = etape.get('Description', 'N/A')
-                        acteurs = etape.get('Acteurs', 'N/A')
-                        
-                        if acteurs and acteurs != "N/A":
-                            # Séparer les acteurs multiples
-                            acteurs_list = re.split(r'[,;/]|\set\s', acteurs)
-                            
-                            for acteur in acteurs_list:
-                                acteur = acteur.strip()
-                                if acteur and acteur != "N/A":
-                                    activite_complete = {
-                                        'dossier_numero': numero_dossier,
-                                        'dossier_nom': nom_dossier,
-                                        'etape_numero': numero,
-                                        'activite': activite,
-                                        'description': description
-                                    }
-                                    actors_activities[acteur].append(activite_complete)
+    index = ActorIndex()
+    for source in iter_data_sources(data):
+        index.update_source(*source)
     
-    # Convertir en liste de dictionnaires
+    # Liste déjà triée par nombre d'activités décroissant
     result = []
-    for acteur, activites in actors_activities.items():
+    for actor in index.summary():
         result.append({
-            'nom_acteur': acteur,
-            'nombre_activites': len(activites),
-            'activites': activites
+            'nom_acteur': actor['nom_acteur'],
+            'nombre_activites': actor['nombre_activites'],
+            'activites': [{
+                'source': activite['source'],
+                'dossier_nom': activite['titre'],
+                'etape_numero': activite['etape_numero'],
+                'activite': activite['activite'],
+                'description': activite['description']
+            } for activite in index.activities(actor['cle'])]
         })
     
-    # Trier par nombre d'activités décroissant
-    result.sort(key=lambda x: x['nombre_activites'], reverse=True)
-    
     return result
 
 def get_actors_summary(actors_data):
@@ -0,0 +1,331 @@
+"""
+Module d'import groupé de notes circulaires au format PDF.
+
+Chaque fichier est haché (SHA-256), dédoublonné par rapport aux notes déjà
+enregistrées et au reste du lot, puis extrait dans un processus isolé
+(utils.pdf_worker) par un pool borné, segmenté (utils.circular_segmenter) et
+ajouté aux notes circulaires de data/donnees.json.
+
+L'état de chaque fichier est conservé dans data/ingestion_status.json : un
+import interrompu reprend là où il s'est arrêté, sans ré-extraire les fichiers
+déjà traités. À chaque sauvegarde, les deux fichiers sont relus sous verrou et
+seules les nouvelles notes y sont ajoutées : une note enregistrée entre-temps
+par une autre session n'est pas écrasée.
+
+Le nombre d'extractions simultanées est borné par PDF_CONFIG["max_workers"],
+la limite des processus d'extraction de utils.pdf_worker.
+
+Utilisation en ligne de commande :
+    python -m utils.bulk_ingest data/pdf_temp --workers 4
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+from models.config import DATA_DIR, DATA_FILE, INGEST_CONFIG, PDF_CONFIG
+from utils.circular_segmenter import segment_circular, get_articles
+from utils.pdf_worker import extract_text_isolated
+
+DATA_PATH = str(DATA_FILE)
+STATUS_PATH = str(DATA_DIR / "ingestion_status.json")
+
+# Nombre de fichiers importés entre deux sauvegardes des données et de l'état
+SAVE_EVERY = INGEST_CONFIG["save_every"]
+
+# Statuts possibles d'un fichier
+STATUS_DONE = "termine"
+STATUS_DUPLICATE = "doublon"
+STATUS_ERROR = "erreur"
+
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+# Sérialise les relectures-écritures des données et de l'état entre les imports du processus
+_SAVE_LOCK = threading.Lock()
+
+
+def hash_file(path: Union[str, Path]) -> str:
+    """
+    Calcule l'empreinte SHA-256 d'un fichier, par blocs.
+
+    Args:
+        path (Union[str, Path]): Chemin du fichier.
+
+    Returns:
+        str: L'empreinte hexadécimale.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def save_upload(content: bytes, directory: Union[str, Path]) -> Path:
+    """
+    Enregistre un PDF téléversé sous le nom de son empreinte SHA-256.
+
+    Deux fichiers différents de même nom ne s'écrasent pas, et un même fichier
+    téléversé deux fois n'est écrit qu'une fois.
+
+    Args:
+        content (bytes): Contenu du fichier.
+        directory (Union[str, Path]): Répertoire de destination.
+
+    Returns:
+        Path: Chemin du fichier enregistré.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{hashlib.sha256(content).hexdigest()}.pdf"
+    if not path.exists():
+        tmp_path = path.with_suffix('.pdf.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    return path
+
+
+def _load_json(path: Path, default: Dict) -> Dict:
+    if path.exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return default
+
+
+def _save_json(path: Path, data: Dict) -> None:
+    """Écrit le fichier JSON de façon atomique (fichier temporaire puis renommage)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _save_progress(data_path: Path, status_path: Path, notes: List[Dict], entries: Dict) -> None:
+    """
+    Ajoute les nouvelles notes et états aux fichiers relus sous verrou.
+
+    Les données sont écrites avant l'état : un fichier marqué "termine" est toujours enregistré.
+    """
+    with _SAVE_LOCK:
+        if notes:
+            data = _load_json(data_path, {"notes_circulaires": [], "procedures": []})
+            data.setdefault("notes_circulaires", [])
+            saved_hashes = {note.get("empreinte") for note in data["notes_circulaires"] if note.get("empreinte")}
+            data["notes_circulaires"].extend(note for note in notes if note["empreinte"] not in saved_hashes)
+            _save_json(data_path, data)
+
+        status = _load_json(status_path, {})
+        status.update(entries)
+        _save_json(status_path, status)
+
+
+def _extract(pdf_path: Path) -> Dict:
+    """Extrait et segmente un PDF ; exécuté dans un thread du pool."""
+    pages = {'total': 0}
+
+    def on_progress(done, total):
+        pages['total'] = total
+
+    start = time.perf_counter()
+    text = extract_text_isolated(pdf_path, progress_callback=on_progress)
+    tree = segment_circular(text)
+
+    return {
+        'texte': text,
+        'objet': tree['objet'],
+        'articles': [article['numero'] for article in get_articles(tree)],
+        'pages': pages['total'],
+        'duree': time.perf_counter() - start,
+    }
+
+
+def find_pdfs(folder: Union[str, Path], recursive: bool = True) -> List[Path]:
+    """Liste les fichiers PDF d'un dossier, triés par chemin."""
+    folder = Path(folder)
+    pattern = '**/*' if recursive else '*'
+    return sorted(p for p in folder.glob(pattern) if p.is_file() and p.suffix.lower() == '.pdf')
+
+
+def ingest_pdfs(pdf_paths: Iterable[Union[str, Path]],
+                data_path: Union[str, Path] = DATA_PATH,
+                status_path: Union[str, Path] = STATUS_PATH,
+                max_workers: Optional[int] = None,
+                progress_callback: Optional[Callable[[int, int, Dict], None]] = None,
+                original_names: Optional[Dict[str, str]] = None) -> Dict:
+    """
+    Importe un lot de PDF dans les notes circulaires.
+
+    Args:
+        pdf_paths (Iterable[Union[str, Path]]): Fichiers PDF à importer.
+        data_path (Union[str, Path], optional): Fichier des données. Defaults to DATA_PATH.
+        status_path (Union[str, Path], optional): Fichier d'état de l'import. Defaults to STATUS_PATH.
+        max_workers (Optional[int], optional): Nombre d'extractions simultanées, borné par
+            PDF_CONFIG["max_workers"] (limite de utils.pdf_worker). Defaults to PDF_CONFIG["max_workers"].
+        progress_callback (Optional[Callable[[int, int, Dict], None]], optional): Fonction appelée
+            après chaque fichier avec (fichiers traités, nombre de fichiers, état du fichier).
+        original_names (Optional[Dict[str, str]], optional): Nom d'origine de chaque fichier
+            (chemin -> nom), utilisé comme titre à défaut d'objet. Defaults to le nom du fichier.
+
+    Returns:
+        Dict: Rapport de l'import (compteurs, nombre d'extractions simultanées, pages, durée,
+            pages par seconde et détails par fichier).
+    """
+    data_path = Path(data_path)
+    status_path = Path(status_path)
+    # Au-delà de la limite de pdf_worker, les threads supplémentaires ne feraient qu'attendre
+    pdf_workers = PDF_CONFIG.get("max_workers", 2)
+    max_workers = min(max_workers or pdf_workers, pdf_workers)
+    original_names = original_names or {}
+
+    data = _load_json(data_path, {"notes_circulaires": [], "procedures": []})
+    status = _load_json(status_path, {})
+
+    known_hashes = {note.get("empreinte") for note in data.get("notes_circulaires", []) if note.get("empreinte")}
+    known_hashes.update(h for h, entry in status.items() if entry.get("statut") == STATUS_DONE)
+
+    report = {
+        'fichiers': 0,
+        'importes': 0,
+        'deja_importes': 0,
+        'doublons': 0,
+        'erreurs': 0,
+        'workers': max_workers,
+        'pages': 0,
+        'duree_s': 0.0,
+        'pages_par_s': 0.0,
+        'details': [],
+    }
+
+    # Hachage et dédoublonnage avant toute extraction
+    to_extract = {}
+    for pdf_path in map(Path, pdf_paths):
+        report['fichiers'] += 1
+        try:
+            file_hash = hash_file(pdf_path)
+        except OSError as e:
+            report['erreurs'] += 1
+            report['details'].append({'fichier': str(pdf_path), 'statut': STATUS_ERROR,
+                                      'erreur': f"{type(e).__name__}: {e}"})
+            continue
+        if file_hash in known_hashes:
+            report['deja_importes'] += 1
+            report['details'].append({'fichier': str(pdf_path), 'statut': STATUS_DONE, 'empreinte': file_hash})
+        elif file_hash in to_extract:
+            report['doublons'] += 1
+            report['details'].append({'fichier': str(pdf_path), 'statut': STATUS_DUPLICATE,
+                                      'empreinte': file_hash, 'original': str(to_extract[file_hash])})
+        else:
+            to_extract[file_hash] = pdf_path
+
+    total = report['fichiers']
+    processed = report['fichiers'] - len(to_extract)
+    start = time.perf_counter()
+    pending_notes = []
+    pending_entries = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_extract, path): file_hash for file_hash, path in to_extract.items()}
+
+        for future in as_completed(futures):
+            file_hash = futures[future]
+            pdf_path = to_extract[file_hash]
+            entry = {'fichier': str(pdf_path), 'empreinte': file_hash, 'date': datetime.now().isoformat()}
+
+            try:
+                result = future.result()
+                pending_notes.append({
+                    "titre": result['objet'] or Path(original_names.get(str(pdf_path), pdf_path.name)).stem,
+                    "contenu": result['texte'],
+                    "methode": "import_groupe",
+                    "chemin_pdf": str(pdf_path),
+                    "empreinte": file_hash,
+                    "articles": result['articles'],
+                    "date_creation": entry['date']
+                })
+                entry.update({'statut': STATUS_DONE, 'pages': result['pages'], 'duree': round(result['duree'], 3)})
+                report['importes'] += 1
+                report['pages'] += result['pages']
+            except Exception as e:
+                entry.update({'statut': STATUS_ERROR, 'erreur': f"{type(e).__name__}: {e}"})
+                report['erreurs'] += 1
+
+            pending_entries[file_hash] = entry
+            report['details'].append(entry)
+            processed += 1
+
+            if len(pending_entries) >= SAVE_EVERY:
+                _save_progress(data_path, status_path, pending_notes, pending_entries)
+                pending_notes, pending_entries = [], {}
+
+            if progress_callback:
+                progress_callback(processed, total, entry)
+
+    if pending_entries:
+        _save_progress(data_path, status_path, pending_notes, pending_entries)
+
+    report['duree_s'] = round(time.perf_counter() - start, 3)
+    if report['duree_s'] > 0:
+        report['pages_par_s'] = round(report['pages'] / report['duree_s'], 2)
+
+    return report
+
+
+def ingest_folder(folder: Union[str, Path], recursive: bool = True, **kwargs) -> Dict:
+    """
+    Importe tous les PDF d'un dossier.
+
+    Args:
+        folder (Union[str, Path]): Dossier contenant les PDF.
+        recursive (bool, optional): Parcourir aussi les sous-dossiers. Defaults to True.
+        **kwargs: Arguments transmis à ingest_pdfs.
+
+    Returns:
+        Dict: Rapport de l'import.
+    """
+    return ingest_pdfs(find_pdfs(folder, recursive), **kwargs)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import groupé de notes circulaires PDF")
+    parser.add_argument("dossier", help="Dossier contenant les fichiers PDF")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Nombre d'extractions simultanées "
+                             f"(au plus {PDF_CONFIG.get('max_workers', 2)}, limite de pdf.max_workers)")
+    parser.add_argument("--data", default=DATA_PATH, help="Fichier des données")
+    parser.add_argument("--status", default=STATUS_PATH, help="Fichier d'état de l'import")
+    parser.add_argument("--non-recursif", action="store_true", help="Ignorer les sous-dossiers")
+    args = parser.parse_args()
+
+    def show_progress(done, total, entry):
+        print(f"[{done}/{total}] {entry['statut']:<8} {entry['fichier']}"
+              + (f" - {entry['erreur']}" if entry.get('erreur') else ""))
+
+    report = ingest_folder(
+        args.dossier,
+        recursive=not args.non_recursif,
+        data_path=args.data,
+        status_path=args.status,
+        max_workers=args.workers,
+        progress_callback=show_progress
+    )
+
+    if args.workers and args.workers > report['workers']:
+        print(f"--workers {args.workers} ramené à {report['workers']} (pdf.max_workers)")
+    print(f"\n{report['fichiers']} fichiers - {report['importes']} importés, "
+          f"{report['deja_importes']} déjà importés, {report['doublons']} doublons, "
+          f"{report['erreurs']} erreurs")
+    print(f"{report['pages']} pages en {report['duree_s']} s - {report['pages_par_s']} pages/s")
+
+
+if __name__ == "__main__":
+    main()
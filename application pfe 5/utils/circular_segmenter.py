@@ -0,0 +1,192 @@
+"""
+Module de segmentation structurelle des notes circulaires de la BCT.
+
+Le texte est parcouru une seule fois par une expression régulière compilée
+qui reconnaît les intitulés de la structure réglementaire (visas « Vu … »,
+« Décide : », titres, chapitres, sections, « Article N : » et annexes).
+Le résultat est un arbre de segments (dictionnaires) portant leurs positions
+de début et de fin dans le texte, afin que le découpage en chunks, la
+recherche, la génération et le chatbot puissent adresser un article sans
+re-parcourir la note.
+
+Structure d'un segment :
+    {
+        "type": "document" | "preambule" | "visas" | "vu" | "dispositif"
+                | "titre" | "chapitre" | "section" | "article" | "annexe",
+        "numero": str,    # numéro normalisé ("1", "2 bis", "IV"...) ou ""
+        "titre": str,     # ligne d'intitulé telle qu'elle apparaît
+        "debut": int,     # position de début (incluse) dans le texte
+        "fin": int,       # position de fin (exclue) dans le texte
+        "enfants": list,  # segments enfants
+    }
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional
+
+# Niveau hiérarchique de chaque type de segment (plus petit = plus englobant)
+LEVELS = {
+    'document': 0,
+    'preambule': 1,
+    'visas': 1,
+    'dispositif': 1,
+    'annexe': 1,
+    'vu': 2,
+    'titre': 2,
+    'chapitre': 3,
+    'section': 4,
+    'article': 5,
+}
+
+_NUMERAL = r'(?:[IVXLC]+\b|\d+|premier|PREMIER|Premier|1er)'
+
+# Une seule passe : chaque alternative est ancrée (début de ligne ou mot
+# capitalisé non précédé d'une lettre/apostrophe) et ne contient aucune
+# répétition paresseuse sur le texte.
+_HEADING_RE = re.compile(
+    r'(?P<vu>^[ \t]*Vu\b)'
+    r'|(?P<dispositif>^[ \t]*(?:D[ée]cide|DECIDE|DÉCIDE)\b[ \t]*:?)'
+    r'|(?P<annexe>^[ \t]*(?:ANNEXE|Annexe)\b[ \t]*(?:n°[ \t]*)?(?P<annexe_num>[IVXLC]+\b|\d+)?)'
+    r'|(?P<titre>(?:^[ \t]*|(?<![\w\'’]))(?:TITRE|Titre)[ \t]+(?P<titre_num>' + _NUMERAL + r'))'
+    r'|(?P<chapitre>(?:^[ \t]*|(?<![\w\'’]))(?:CHAPITRE|Chapitre)[ \t]+(?P<chapitre_num>' + _NUMERAL + r'))'
+    r'|(?P<section>^[ \t]*(?:SECTION|Section)[ \t]+(?P<section_num>' + _NUMERAL + r'))'
+    r'|(?P<article>(?:^[ \t]*(?:ARTICLE|Article|article|Art\.)|(?<![\w\'’])(?:ARTICLE|Article|Art\.))'
+    r'[ \t]+(?P<article_num>\d+(?:[ \t]*(?:bis|ter|quater))?|premier|PREMIER|Premier|1er)'
+    r'(?:[ \t]*\((?:nouveau|Nouveau|nouvelle|Nouvelle)\))?[ \t]*[:\-–.])',
+    re.MULTILINE
+)
+
+_OBJET_RE = re.compile(r'^[ \t]*Objet[ \t]*:[ \t]*(?P<objet>[^\n]+)', re.MULTILINE | re.IGNORECASE)
+
+_MAX_TITLE_LENGTH = 120
+
+
+def _new_span(kind: str, start: int, end: int, numero: str = "", titre: str = "") -> Dict:
+    return {
+        'type': kind,
+        'numero': numero,
+        'titre': titre,
+        'debut': start,
+        'fin': end,
+        'enfants': [],
+    }
+
+
+def _normalize_number(raw: Optional[str]) -> str:
+    if not raw:
+        return ""
+    raw = ' '.join(raw.split())
+    if raw.lower() in ('premier', '1er'):
+        return '1'
+    return raw
+
+
+def _heading_title(text: str, start: int) -> str:
+    line_end = text.find('\n', start)
+    if line_end == -1:
+        line_end = len(text)
+    return text[start:line_end].strip()[:_MAX_TITLE_LENGTH]
+
+
+def _close_until(stack: List[Dict], level: int, position: int) -> None:
+    """Ferme les segments de la pile dont le niveau est >= level."""
+    while len(stack) > 1 and LEVELS[stack[-1]['type']] >= level:
+        stack.pop()['fin'] = position
+
+
+def _push(stack: List[Dict], span: Dict) -> None:
+    stack[-1]['enfants'].append(span)
+    stack.append(span)
+
+
+@lru_cache(maxsize=32)
+def _segment(text: str) -> Dict:
+    root = _new_span('document', 0, len(text))
+    stack = [root]
+
+    for match in _HEADING_RE.finditer(text):
+        kind = match.lastgroup
+        start = match.start(kind)
+        # Ignorer l'indentation éventuelle avant l'intitulé
+        while start < len(text) and text[start] in ' \t':
+            start += 1
+        numero = _normalize_number(match.groupdict().get(f'{kind}_num'))
+        titre = _heading_title(text, start)
+
+        if kind == 'vu':
+            if stack[-1]['type'] not in ('visas', 'vu'):
+                _close_until(stack, LEVELS['visas'], start)
+                _push(stack, _new_span('visas', start, len(text)))
+            _close_until(stack, LEVELS['vu'], start)
+        else:
+            _close_until(stack, LEVELS[kind], start)
+
+        _push(stack, _new_span(kind, start, len(text), numero, titre))
+
+    _close_until(stack, LEVELS['preambule'], len(text))
+
+    # Préambule : tout ce qui précède le premier intitulé reconnu
+    first_start = root['enfants'][0]['debut'] if root['enfants'] else len(text)
+    if text[:first_start].strip():
+        root['enfants'].insert(0, _new_span('preambule', 0, first_start))
+
+    objet = _OBJET_RE.search(text, 0, first_start)
+    root['objet'] = objet.group('objet').strip() if objet else ""
+
+    return root
+
+
+def segment_circular(text: str) -> Dict:
+    """
+    Segmente une note circulaire en un arbre de segments avec positions.
+
+    Le résultat est mis en cache par texte : il ne doit pas être modifié
+    par l'appelant.
+
+    Args:
+        text (str): Le texte (normalisé) de la note circulaire.
+
+    Returns:
+        Dict: Le segment racine de type "document", avec la clé
+            supplémentaire "objet" (objet de la circulaire, ou "").
+    """
+    return _segment(text or "")
+
+
+def iter_spans(tree: Dict, kind: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Parcourt l'arbre en profondeur, dans l'ordre du texte.
+
+    Args:
+        tree (Dict): Segment racine (ou sous-arbre).
+        kind (Optional[str], optional): Ne renvoyer que ce type de segment.
+
+    Yields:
+        Dict: Les segments rencontrés.
+    """
+    pending = [tree]
+    while pending:
+        span = pending.pop()
+        if kind is None or span['type'] == kind:
+            yield span
+        pending.extend(reversed(span['enfants']))
+
+
+def get_articles(tree: Dict) -> List[Dict]:
+    """Renvoie la liste des articles dans l'ordre du texte."""
+    return list(iter_spans(tree, 'article'))
+
+
+def find_article(tree: Dict, numero: str) -> Optional[Dict]:
+    """Renvoie le premier article portant le numéro donné, ou None."""
+    numero = _normalize_number(str(numero))
+    for article in iter_spans(tree, 'article'):
+        if article['numero'] == numero:
+            return article
+    return None
+
+
+def span_text(text: str, span: Dict) -> str:
+    """Renvoie le texte couvert par un segment."""
+    return text[span['debut']:span['fin']].strip()
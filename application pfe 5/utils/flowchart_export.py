@@ -0,0 +1,307 @@
+"""
+Module d'export groupé des logigrammes de toutes les procédures enregistrées.
+
+Les procédures proviennent des dossiers (data/donnee.json, étapes déjà
+structurées) et des procédures générées (data/donnees.json, tableaux
+Markdown). Chaque procédure est analysée une seule fois, puis rendue dans les
+formats demandés par un pool de threads qui s'appuie sur le pool de rendu
+Graphviz (utils.graphviz_render).
+
+Un manifeste (manifest.json dans le dossier d'export) conserve, sous
+l'identifiant stable de chaque procédure (voir utils.actor_index), l'empreinte
+de son contenu : une procédure inchangée dont les fichiers existent déjà n'est
+pas rendue à nouveau. Le manifeste est enregistré au fil de l'export (toutes
+les MANIFEST_SAVE_EVERY procédures rendues) : un export interrompu reprend là
+où il s'était arrêté. Les procédures supprimées en sont retirées. Les rendus
+de l'export ne passent que par le cache disque, pour ne pas évincer du cache
+mémoire les logigrammes des sessions.
+
+Le nombre de procédures rendues simultanément est borné par la taille du pool
+de rendu Graphviz (DIAGRAM_CONFIG["render_workers"]).
+
+Utilisation en ligne de commande :
+    python -m utils.flowchart_export --formats svg png pdf --workers 4
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Sequence, Union
+
+from models.config import DATA_DIR, DATA_FILE, DIAGRAM_CONFIG, DOSSIERS_FILE
+from utils.actor_index import iter_data_procedures
+from utils.logigramme_advanced import (
+    RENDER_FORMATS, extract_io_events, render_steps
+)
+from utils.render_cache import RENDER_CACHE_VERSION
+
+DOSSIERS_PATH = str(DOSSIERS_FILE)
+DATA_PATH = str(DATA_FILE)
+EXPORT_DIR = str(DATA_DIR / "logigrammes")
+MANIFEST_NAME = "manifest.json"
+
+# Enregistrement du manifeste toutes les N procédures rendues
+MANIFEST_SAVE_EVERY = 10
+
+# Statuts possibles d'une procédure
+STATUS_EXPORTED = "exporte"
+STATUS_UNCHANGED = "inchange"
+STATUS_EMPTY = "sans_etapes"
+STATUS_ERROR = "erreur"
+
+_FILENAME_INVALID_RE = re.compile(r'[^0-9A-Za-z_.-]+')
+
+
+def _load_json(path: Path, default: Dict) -> Dict:
+    if path.exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return default
+
+
+def _save_json(path: Path, data: Dict) -> None:
+    """Écrit le fichier JSON de façon atomique (fichier temporaire puis renommage)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _record_to_step(record: Dict) -> Dict:
+    """Convertit une étape enregistrée ({"N°", "Activités", ...}) au format du logigramme."""
+    step = {
+        'number': str(record.get("N°", "")).strip(),
+        'activity': str(record.get("Activités") or record.get("Description") or "").strip(),
+        'actor': str(record.get("Acteurs", "")).strip().lstrip('-').strip(),
+        'document': str(record.get("Documents", "")).strip(),
+    }
+    return {key: value for key, value in step.items() if value}
+
+
+def iter_stored_procedures(dossiers_path: Union[str, Path] = DOSSIERS_PATH,
+                           data_path: Union[str, Path] = DATA_PATH) -> Iterator[Dict]:
+    """
+    Parcourt les procédures enregistrées, analysées une seule fois.
+
+    Args:
+        dossiers_path (Union[str, Path], optional): Fichier des dossiers. Defaults to DOSSIERS_PATH.
+        data_path (Union[str, Path], optional): Fichier des procédures générées. Defaults to DATA_PATH.
+
+    Yields:
+        Dict: {"id", "titre", "etapes", "io"} pour chaque procédure, sous l'identifiant
+            de l'index des acteurs (utils.actor_index.iter_data_procedures).
+    """
+    for path in (Path(dossiers_path), Path(data_path)):
+        data = _load_json(path, {})
+        for source_id, titre, records, procedure in iter_data_procedures(data):
+            contenu = procedure.get("contenu")
+            io_table = contenu.get("io_table", "") if isinstance(contenu, dict) else ""
+            steps = [_record_to_step(record) for record in records if isinstance(record, dict)]
+            yield {
+                'id': source_id,
+                'titre': titre or source_id,
+                'etapes': [step for step in steps if step.get('number') and step.get('activity')],
+                'io': extract_io_events(io_table),
+            }
+
+
+def procedure_hash(item: Dict, formats: Sequence[str]) -> str:
+    """
+    Calcule l'empreinte du contenu d'une procédure et des formats demandés.
+
+    Args:
+        item (Dict): Procédure renvoyée par iter_stored_procedures.
+        formats (Sequence[str]): Formats d'export.
+
+    Returns:
+        str: L'empreinte SHA-256 hexadécimale.
+    """
+    payload = json.dumps(
+        [RENDER_CACHE_VERSION, item['titre'], item['etapes'], item['io'], sorted(formats)],
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(',', ':')
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _export_one(item: Dict, formats: Sequence[str], output_dir: Path) -> Dict:
+    """Rend une procédure dans chaque format ; exécuté dans un thread du pool."""
+    start = time.perf_counter()
+    files = {}
+    durations = {}
+    base_name = _FILENAME_INVALID_RE.sub('_', item['id'])
+
+    for fmt in formats:
+        fmt_start = time.perf_counter()
+        rendered, _ = render_steps(item['etapes'], item['io'], item['titre'], fmt, memory_cache=False)
+        file_name = f"{base_name}.{fmt}"
+        tmp_path = output_dir / (file_name + '.tmp')
+        tmp_path.write_bytes(rendered)
+        os.replace(tmp_path, output_dir / file_name)
+        files[fmt] = file_name
+        durations[fmt] = round(time.perf_counter() - fmt_start, 3)
+
+    return {'fichiers': files, 'durees': durations, 'duree_s': round(time.perf_counter() - start, 3)}
+
+
+def export_flowcharts(output_dir: Union[str, Path] = EXPORT_DIR,
+                      formats: Sequence[str] = ('svg', 'png', 'pdf'),
+                      dossiers_path: Union[str, Path] = DOSSIERS_PATH,
+                      data_path: Union[str, Path] = DATA_PATH,
+                      max_workers: Optional[int] = None,
+                      force: bool = False,
+                      progress_callback: Optional[Callable[[int, int, Dict], None]] = None) -> Dict:
+    """
+    Exporte les logigrammes de toutes les procédures enregistrées.
+
+    Args:
+        output_dir (Union[str, Path], optional): Dossier d'export. Defaults to EXPORT_DIR.
+        formats (Sequence[str], optional): Formats d'export. Defaults to ('svg', 'png', 'pdf').
+        dossiers_path (Union[str, Path], optional): Fichier des dossiers. Defaults to DOSSIERS_PATH.
+        data_path (Union[str, Path], optional): Fichier des procédures générées. Defaults to DATA_PATH.
+        max_workers (Optional[int], optional): Nombre de procédures rendues simultanément,
+            borné par DIAGRAM_CONFIG["render_workers"] (taille du pool de rendu). Defaults to
+            DIAGRAM_CONFIG["render_workers"].
+        force (bool, optional): Rendre aussi les procédures inchangées. Defaults to False.
+        progress_callback (Optional[Callable[[int, int, Dict], None]], optional): Fonction appelée
+            après chaque procédure avec (procédures traitées, nombre de procédures, entrée du manifeste).
+
+    Returns:
+        Dict: Rapport de l'export (compteurs, nombre de procédures rendues simultanément,
+            durée et détails par procédure).
+
+    Raises:
+        ValueError: Si un format n'est pas supporté.
+    """
+    unsupported = [fmt for fmt in formats if fmt not in RENDER_FORMATS]
+    if unsupported:
+        raise ValueError(f"Formats de logigramme non supportés: {', '.join(unsupported)}")
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / MANIFEST_NAME
+    manifest = _load_json(manifest_path, {})
+    # Au-delà de la taille du pool de rendu, les threads supplémentaires ne feraient qu'attendre
+    render_workers = DIAGRAM_CONFIG.get("render_workers", 2)
+    max_workers = min(max_workers or render_workers, render_workers)
+
+    report = {
+        'procedures': 0,
+        'exportes': 0,
+        'inchanges': 0,
+        'sans_etapes': 0,
+        'erreurs': 0,
+        'workers': max_workers,
+        'duree_s': 0.0,
+        'details': [],
+    }
+
+    # Analyse et comparaison des empreintes avant tout rendu
+    to_export = []
+    previous_manifest, manifest = manifest, {}
+    for item in iter_stored_procedures(dossiers_path, data_path):
+        report['procedures'] += 1
+        entry = {'titre': item['titre'], 'empreinte': procedure_hash(item, formats)}
+        previous = previous_manifest.get(item['id'], {})
+
+        if not item['etapes']:
+            entry.update({'statut': STATUS_EMPTY, 'date': datetime.now().isoformat()})
+            report['sans_etapes'] += 1
+        elif (not force and previous.get('empreinte') == entry['empreinte']
+              and previous.get('statut') in (STATUS_EXPORTED, STATUS_UNCHANGED)
+              and all((output_dir / name).exists() for name in previous.get('fichiers', {}).values())):
+            entry = {**previous, 'statut': STATUS_UNCHANGED}
+            report['inchanges'] += 1
+        else:
+            to_export.append((item, entry))
+            continue
+
+        manifest[item['id']] = entry
+        report['details'].append({'id': item['id'], **entry})
+
+    # Procédures supprimées retirées ; les procédures à rendre gardent leur entrée
+    # précédente tant que leur rendu n'est pas terminé
+    for item, _ in to_export:
+        if item['id'] in previous_manifest:
+            manifest[item['id']] = previous_manifest[item['id']]
+    _save_json(manifest_path, manifest)
+
+    total = report['procedures']
+    skipped = total - len(to_export)
+    processed = skipped
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_export_one, item, formats, output_dir): (item, entry)
+                   for item, entry in to_export}
+
+        for future in as_completed(futures):
+            item, entry = futures[future]
+            entry['date'] = datetime.now().isoformat()
+            try:
+                entry.update(future.result())
+                entry['statut'] = STATUS_EXPORTED
+                report['exportes'] += 1
+            except Exception as e:
+                entry.update({'statut': STATUS_ERROR, 'erreur': f"{type(e).__name__}: {e}"})
+                report['erreurs'] += 1
+
+            manifest[item['id']] = entry
+            report['details'].append({'id': item['id'], **entry})
+            processed += 1
+            if (processed - skipped) % MANIFEST_SAVE_EVERY == 0:
+                _save_json(manifest_path, manifest)
+            if progress_callback:
+                progress_callback(processed, total, {'id': item['id'], **entry})
+
+    _save_json(manifest_path, manifest)
+    report['duree_s'] = round(time.perf_counter() - start, 3)
+    return report
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export groupé des logigrammes des procédures enregistrées")
+    parser.add_argument("--formats", nargs="+", default=["svg", "png", "pdf"], choices=sorted(RENDER_FORMATS),
+                        help="Formats d'export")
+    parser.add_argument("--sortie", default=EXPORT_DIR, help="Dossier d'export")
+    parser.add_argument("--dossiers", default=DOSSIERS_PATH, help="Fichier des dossiers")
+    parser.add_argument("--data", default=DATA_PATH, help="Fichier des procédures générées")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Nombre de procédures rendues simultanément "
+                             f"(au plus {DIAGRAM_CONFIG.get('render_workers', 2)}, taille du pool de rendu)")
+    parser.add_argument("--force", action="store_true", help="Rendre aussi les procédures inchangées")
+    args = parser.parse_args()
+
+    def show_progress(done, total, entry):
+        duration = f" ({entry['duree_s']} s)" if entry.get('duree_s') is not None else ""
+        print(f"[{done}/{total}] {entry['statut']:<10} {entry['id']}{duration}"
+              + (f" - {entry['erreur']}" if entry.get('erreur') else ""))
+
+    report = export_flowcharts(
+        output_dir=args.sortie,
+        formats=args.formats,
+        dossiers_path=args.dossiers,
+        data_path=args.data,
+        max_workers=args.workers,
+        force=args.force,
+        progress_callback=show_progress
+    )
+
+    if args.workers and args.workers > report['workers']:
+        print(f"--workers {args.workers} ramené à {report['workers']} (taille du pool de rendu)")
+    print(f"\n{report['procedures']} procédures - {report['exportes']} exportées, "
+          f"{report['inchanges']} inchangées, {report['sans_etapes']} sans étapes, "
+          f"{report['erreurs']} erreurs en {report['duree_s']} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Module du modèle éditable des logigrammes.
+
+Le modèle décrit le logigramme indépendamment de Graphviz :
+    {
+        "noeuds": {identifiant: {"type", "label", "couleur"}},
+        "aretes": [[source, cible], ...]
+    }
+Les identifiants sont stables : ils dérivent du numéro de l'étape (step_3,
+doc_3, actor_3...) et non de sa position, si bien qu'un même nœud garde son
+identifiant d'une édition à l'autre. Graphviz reprend ces identifiants dans le
+<title> de chaque nœud du SVG.
+
+Une édition qui ne change pas la mise en page (libellé de même nombre de
+lignes, couleur, acteur ajouté à une étape qui en a déjà) est appliquée
+directement au SVG précédent par patch_svg ; toute autre modification
+(étape ajoutée ou supprimée, forme changée, document ou acteur apparu)
+nécessite une nouvelle mise en page.
+"""
+
+import hashlib
+import json
+import re
+from typing import Dict, List, Optional
+from xml.sax.saxutils import escape
+
+# Types de nœuds : la forme du nœud dépend de son type
+NODE_TYPES = ('debut', 'etape', 'decision', 'document', 'acteur', 'fin')
+
+_KEY_INVALID_RE = re.compile(r'[^0-9A-Za-z]+')
+_SVG_TEXT_RE = re.compile(r'(<text\b[^>]*>)(.*?)(</text>)', re.DOTALL)
+_SVG_SHAPE_FILL_RE = re.compile(r'(<(?:polygon|ellipse|path)\b[^>]*?\bfill=")([^"]*)(")')
+
+
+def step_node_keys(steps: List[Dict]) -> List[str]:
+    """
+    Calcule la clé stable de chaque étape à partir de son numéro.
+
+    Args:
+        steps (List[Dict]): Étapes extraites ({"number", "activity", ...}).
+
+    Returns:
+        List[str]: Une clé par étape ("3", "4_1"...), suffixée en cas de numéro répété.
+    """
+    keys = []
+    seen = {}
+    for index, step in enumerate(steps):
+        key = _KEY_INVALID_RE.sub('_', str(step.get('number', ''))).strip('_') or str(index + 1)
+        count = seen.get(key, 0)
+        seen[key] = count + 1
+        keys.append(f"{key}_{count + 1}" if count else key)
+    return keys
+
+
+def layout_signature(model: Dict) -> str:
+    """
+    Empreinte de tout ce qui détermine la mise en page du modèle.
+
+    Les nœuds (identifiant, type et nombre de lignes du libellé) et les arêtes
+    en font partie ; le texte des libellés et les couleurs n'en font pas partie.
+
+    Args:
+        model (Dict): Le modèle du logigramme.
+
+    Returns:
+        str: L'empreinte SHA-256 hexadécimale.
+    """
+    nodes = [[node_id, node['type'], node['label'].count('\\n')]
+             for node_id, node in model['noeuds'].items()]
+    payload = json.dumps([nodes, model['aretes']], ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _find_node_group(svg: str, node_id: str) -> Optional[re.Match]:
+    pattern = re.compile(
+        r'<g id="[^"]*" class="node">\s*<title>' + re.escape(escape(node_id)) + r'</title>(.*?)</g>',
+        re.DOTALL
+    )
+    return pattern.search(svg)
+
+
+def patch_svg(svg: str, old_model: Dict, new_model: Dict) -> Optional[str]:
+    """
+    Applique au SVG d'un modèle les changements de libellés et de couleurs d'un nouveau modèle.
+
+    Args:
+        svg (str): Le SVG rendu pour old_model.
+        old_model (Dict): Le modèle correspondant au SVG.
+        new_model (Dict): Le modèle modifié.
+
+    Returns:
+        Optional[str]: Le SVG modifié, ou None si une nouvelle mise en page est nécessaire.
+    """
+    if layout_signature(old_model) != layout_signature(new_model):
+        return None
+
+    for node_id, node in new_model['noeuds'].items():
+        old_node = old_model['noeuds'][node_id]
+        if node['label'] == old_node['label'] and node['couleur'] == old_node['couleur']:
+            continue
+
+        group = _find_node_group(svg, node_id)
+        if group is None:
+            return None
+        body = group.group(1)
+
+        if node['label'] != old_node['label']:
+            lines = iter(node['label'].split('\\n'))
+            texts = _SVG_TEXT_RE.findall(body)
+            if len(texts) != node['label'].count('\\n') + 1:
+                return None
+            body = _SVG_TEXT_RE.sub(lambda m: m.group(1) + escape(next(lines)) + m.group(3), body)
+
+        if node['couleur'] != old_node['couleur']:
+            body, count = _SVG_SHAPE_FILL_RE.subn(lambda m: m.group(1) + node['couleur'] + m.group(3), body, count=1)
+            if not count:
+                return None
+
+        start, end = group.span(1)
+        svg = svg[:start] + body + svg[end:]
+
+    return svg
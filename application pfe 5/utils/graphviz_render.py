@@ -0,0 +1,135 @@
+"""
+Module de rendu des graphes Graphviz hors du thread Streamlit.
+
+Chaque rendu est une tâche DOT exécutée par un processus `dot` séparé, soumis
+à un délai maximal : au-delà, le processus est tué et le rendu est relancé avec
+un tracé des arêtes moins coûteux (DIAGRAM_CONFIG["fallback_splines"]), le
+routage `splines=ortho` étant de loin l'étape la plus lente sur les grandes
+procédures. Un pool borne le nombre de rendus simultanés sur le serveur et la
+durée de chaque rendu est renvoyée à l'appelant.
+"""
+
+import logging
+import subprocess
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from models.config import DIAGRAM_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Pool des rendus : au plus render_workers processus `dot` en parallèle
+_RENDER_POOL = ThreadPoolExecutor(max_workers=DIAGRAM_CONFIG.get("render_workers", 2),
+                                  thread_name_prefix="graphviz")
+
+
+def render_source(source: str,
+                  fmt: str = 'svg',
+                  engine: str = 'dot',
+                  timeout: Optional[float] = None) -> bytes:
+    """
+    Rend une source DOT dans un processus `dot` séparé.
+
+    Args:
+        source (str): La source DOT du graphe.
+        fmt (str, optional): Format de sortie (svg, png, pdf...). Defaults to 'svg'.
+        engine (str, optional): Moteur de mise en page (dot, neato...). Defaults to 'dot'.
+        timeout (Optional[float], optional): Délai maximal en secondes.
+            Defaults to DIAGRAM_CONFIG["render_timeout"].
+
+    Returns:
+        bytes: Le rendu.
+
+    Raises:
+        TimeoutError: Si le rendu dépasse le délai maximal (le processus est tué).
+        RuntimeError: Si Graphviz n'est pas installé ou si le rendu échoue.
+    """
+    timeout = timeout if timeout is not None else DIAGRAM_CONFIG.get("render_timeout", 10)
+    try:
+        result = subprocess.run(
+            ['dot', f'-K{engine}', f'-T{fmt}'],
+            input=source.encode('utf-8'),
+            capture_output=True,
+            timeout=timeout
+        )
+    except subprocess.TimeoutExpired:
+        raise TimeoutError(f"Le rendu Graphviz a dépassé le délai maximal de {timeout} secondes.")
+    except FileNotFoundError:
+        raise RuntimeError("Graphviz (commande 'dot') n'est pas installé ou n'est pas dans le PATH.")
+
+    if result.returncode != 0:
+        message = result.stderr.decode('utf-8', errors='replace').strip()
+        raise RuntimeError(f"Erreur lors du rendu Graphviz: {message}")
+    return result.stdout
+
+
+def _render_with_fallback(graph, fmt: str, timeout: Optional[float],
+                          fallback_splines: Optional[str]) -> Tuple[bytes, Dict]:
+    fallback_splines = fallback_splines or DIAGRAM_CONFIG.get("fallback_splines", "polyline")
+    splines = graph.graph_attr.get('splines')
+    info = {'format': fmt, 'moteur': graph.engine, 'splines': splines, 'repli': False}
+
+    start = time.perf_counter()
+    try:
+        rendered = render_source(graph.source, fmt, graph.engine, timeout)
+    except TimeoutError:
+        if splines == fallback_splines:
+            raise
+        logger.warning(f"Rendu Graphviz trop long avec splines={splines}, "
+                       f"nouvel essai avec splines={fallback_splines}")
+        graph = graph.copy()
+        graph.graph_attr['splines'] = fallback_splines
+        info.update({'splines': fallback_splines, 'repli': True})
+        rendered = render_source(graph.source, fmt, graph.engine, timeout)
+
+    info['duree_s'] = round(time.perf_counter() - start, 3)
+    logger.info(f"Rendu Graphviz {fmt} en {info['duree_s']} s (splines={info['splines']})")
+    return rendered, info
+
+
+def submit_graph(graph,
+                 fmt: str = 'svg',
+                 timeout: Optional[float] = None,
+                 fallback_splines: Optional[str] = None) -> Future:
+    """
+    Soumet le rendu d'un graphe au pool sans attendre le résultat.
+
+    Args:
+        graph (graphviz.Digraph): Le graphe à rendre.
+        fmt (str, optional): Format de sortie. Defaults to 'svg'.
+        timeout (Optional[float], optional): Délai maximal de chaque tentative.
+            Defaults to DIAGRAM_CONFIG["render_timeout"].
+        fallback_splines (Optional[str], optional): Tracé des arêtes utilisé si le délai est dépassé.
+            Defaults to DIAGRAM_CONFIG["fallback_splines"].
+
+    Returns:
+        Future: Résultat (rendu, informations) de render_graph.
+    """
+    return _RENDER_POOL.submit(_render_with_fallback, graph, fmt, timeout, fallback_splines)
+
+
+def render_graph(graph,
+                 fmt: str = 'svg',
+                 timeout: Optional[float] = None,
+                 fallback_splines: Optional[str] = None) -> Tuple[bytes, Dict]:
+    """
+    Rend un graphe Graphviz via le pool, avec repli sur un tracé moins coûteux.
+
+    Args:
+        graph (graphviz.Digraph): Le graphe à rendre.
+        fmt (str, optional): Format de sortie. Defaults to 'svg'.
+        timeout (Optional[float], optional): Délai maximal de chaque tentative.
+            Defaults to DIAGRAM_CONFIG["render_timeout"].
+        fallback_splines (Optional[str], optional): Tracé des arêtes utilisé si le délai est dépassé.
+            Defaults to DIAGRAM_CONFIG["fallback_splines"].
+
+    Returns:
+        Tuple[bytes, Dict]: Le rendu et ses informations
+            {"format", "moteur", "splines", "repli", "duree_s"}.
+
+    Raises:
+        TimeoutError: Si le rendu de repli dépasse lui aussi le délai maximal.
+        RuntimeError: Si Graphviz n'est pas installé ou si le rendu échoue.
+    """
+    return submit_graph(graph, fmt, timeout, fallback_splines).result()
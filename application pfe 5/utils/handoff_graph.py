@@ -0,0 +1,347 @@
+"""
+Module du graphe des transmissions entre acteurs (réseau de passation).
+
+Deux étapes consécutives d'une procédure impliquent une transmission du
+travail : chaque acteur de l'étape N transmet à chaque acteur (différent) de
+l'étape suivante qui a des acteurs. Les transmissions de toutes les procédures
+sont additionnées dans un graphe orienté pondéré dont les nœuds sont les clés
+normalisées des acteurs (voir utils.actor_index).
+
+Le graphe est enregistré dans data/handoff_graph.json, procédure par
+procédure : à chaque sauvegarde (update_handoff_graph), update_source retire
+les transmissions de l'ancienne version d'une procédure et ajoute celles de la
+nouvelle, sans reparcourir l'archive. Comme l'index des acteurs, il est
+rapproché des fichiers de données lorsqu'ils changent autrement, les
+procédures étant désignées par leur identifiant stable.
+La matrice d'adjacence (creuse, SciPy si disponible) et les indicateurs ne
+sont recalculés que lorsque le graphe a changé :
+    - volume reçu et transmis, nombre de prédécesseurs et de successeurs ;
+    - centralité PageRank (itération de puissance sur la matrice creuse) ;
+    - transit : volume de travail reçu puis retransmis par l'acteur, dont la
+      part dans l'ensemble des transmissions signale les goulots d'étranglement.
+
+Structure du fichier :
+    {"sources": {source: {"titre", "empreinte", "transmissions": [[clé, clé, nombre], ...]}}}
+"""
+
+import json
+import os
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from models.config import DATA_DIR, HANDOFF_CONFIG
+from utils.actor_index import (DATA_PATH, DOSSIERS_PATH, _steps_hash, actor_keys, data_files_signature,
+                               iter_file_sources)
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+HANDOFF_GRAPH_PATH = str(DATA_DIR / "handoff_graph.json")
+
+# Paramètres de la centralité PageRank (section [handoff] des paramètres)
+PAGERANK_DAMPING = HANDOFF_CONFIG["pagerank_damping"]
+PAGERANK_TOLERANCE = HANDOFF_CONFIG["pagerank_tolerance"]
+PAGERANK_MAX_ITERATIONS = HANDOFF_CONFIG["pagerank_max_iterations"]
+
+
+def step_handoffs(etapes: Iterable[Dict]) -> Counter:
+    """
+    Calcule les transmissions entre acteurs d'une procédure.
+
+    Les étapes sans acteur sont ignorées : la transmission relie alors les
+    acteurs de la dernière étape qui en a à ceux de l'étape suivante.
+
+    Args:
+        etapes (Iterable[Dict]): Étapes au format enregistré, dans l'ordre de la procédure.
+
+    Returns:
+        Counter: Nombre de transmissions par couple (clé source, clé cible).
+    """
+    transitions = Counter()
+    previous = []
+    for etape in etapes:
+        if not isinstance(etape, dict):
+            continue
+        current = list(dict.fromkeys(key for _, key in actor_keys(str(etape.get('Acteurs', '') or ''))))
+        if not current:
+            continue
+        for source in previous:
+            for target in current:
+                if source != target:
+                    transitions[(source, target)] += 1
+        previous = current
+    return transitions
+
+
+class HandoffGraph:
+    """Graphe orienté pondéré des transmissions entre acteurs."""
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        """
+        Args:
+            path (Optional[Union[str, Path]], optional): Fichier du graphe
+                (None pour un graphe uniquement en mémoire).
+        """
+        self.path = Path(path) if path else None
+        self.sources = {}
+        self.edges = Counter()
+        self._lock = threading.RLock()
+        self._metrics = None
+        self._version = 0  # Incrémenté à chaque modification des transmissions
+
+        if self.path and self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.sources = json.load(f).get("sources", {})
+            for source in self.sources.values():
+                for actor_from, actor_to, count in source['transmissions']:
+                    self.edges[(actor_from, actor_to)] += count
+
+    def save(self) -> None:
+        """Enregistre le graphe de façon atomique (fichier temporaire puis renommage)."""
+        if not self.path:
+            return
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"sources": self.sources}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+    def remove_source(self, source_id: str) -> None:
+        """Retire les transmissions d'une procédure."""
+        with self._lock:
+            source = self.sources.pop(source_id, None)
+            if not source:
+                return
+            for actor_from, actor_to, count in source['transmissions']:
+                edge = (actor_from, actor_to)
+                self.edges[edge] -= count
+                if self.edges[edge] <= 0:
+                    del self.edges[edge]
+            self._metrics = None
+            self._version += 1
+
+    def update_source(self, source_id: str, titre: str, etapes: Iterable[Dict]) -> bool:
+        """
+        Ajoute (ou remplace) les transmissions d'une procédure.
+
+        Args:
+            source_id (str): Identifiant stable de la procédure (voir utils.actor_index.iter_data_sources).
+            titre (str): Titre de la procédure.
+            etapes (Iterable[Dict]): Étapes au format enregistré, dans l'ordre de la procédure.
+
+        Returns:
+            bool: False si la procédure était déjà prise en compte à l'identique.
+        """
+        etapes = [etape for etape in etapes if isinstance(etape, dict)]
+        empreinte = _steps_hash(titre, etapes)
+
+        with self._lock:
+            if self.sources.get(source_id, {}).get('empreinte') == empreinte:
+                return False
+            self.remove_source(source_id)
+
+            transitions = step_handoffs(etapes)
+            self.edges.update(transitions)
+            self.sources[source_id] = {
+                'titre': titre,
+                'empreinte': empreinte,
+                'transmissions': [[actor_from, actor_to, count]
+                                  for (actor_from, actor_to), count in transitions.items()]
+            }
+            self._metrics = None
+            self._version += 1
+            return True
+
+    def reconcile(self, sources: Iterable[tuple]) -> bool:
+        """
+        Rapproche le graphe de la liste complète des procédures (voir utils.actor_index.iter_data_sources).
+
+        Args:
+            sources (Iterable[tuple]): Toutes les procédures (identifiant, titre, étapes).
+
+        Returns:
+            bool: True si le graphe a changé.
+        """
+        with self._lock:
+            changed = False
+            seen = set()
+            for source_id, titre, etapes in sources:
+                seen.add(source_id)
+                changed = self.update_source(source_id, titre, etapes) or changed
+            for source_id in set(self.sources) - seen:
+                self.remove_source(source_id)
+                changed = True
+            return changed
+
+    def adjacency(self):
+        """
+        Matrice d'adjacence pondérée (lignes : acteur qui transmet, colonnes : acteur qui reçoit).
+
+        Returns:
+            Tuple[List[str], matrix]: Les clés des acteurs (ordre des lignes et colonnes) et la
+                matrice, creuse (scipy.sparse.csr_matrix) si SciPy est installé, dense sinon.
+        """
+        with self._lock:
+            edges = list(self.edges.items())
+        keys = sorted({actor for (actor_from, actor_to), _ in edges for actor in (actor_from, actor_to)})
+        position = {key: i for i, key in enumerate(keys)}
+        rows = np.fromiter((position[actor_from] for (actor_from, _), _ in edges), dtype=np.int64, count=len(edges))
+        cols = np.fromiter((position[actor_to] for (_, actor_to), _ in edges), dtype=np.int64, count=len(edges))
+        weights = np.fromiter((count for _, count in edges), dtype=np.float64, count=len(edges))
+
+        if sparse is not None:
+            matrix = sparse.csr_matrix((weights, (rows, cols)), shape=(len(keys), len(keys)))
+        else:
+            matrix = np.zeros((len(keys), len(keys)))
+            matrix[rows, cols] = weights
+        return keys, matrix
+
+    def metrics(self) -> pd.DataFrame:
+        """
+        Indicateurs de chaque acteur, triés par transit décroissant (goulots en premier).
+
+        Returns:
+            pd.DataFrame: Indexé par clé d'acteur ; colonnes recues, transmises, predecesseurs,
+                successeurs, pagerank, transit, part_transit (% de toutes les transmissions).
+        """
+        with self._lock:
+            if self._metrics is not None:
+                return self._metrics
+            version = self._version
+
+        keys, matrix = self.adjacency()
+        if sparse is not None:
+            binary = (matrix > 0).astype(np.int64)
+            received = np.asarray(matrix.sum(axis=0)).ravel()
+            sent = np.asarray(matrix.sum(axis=1)).ravel()
+            predecessors = np.asarray(binary.sum(axis=0)).ravel()
+            successors = np.asarray(binary.sum(axis=1)).ravel()
+        else:
+            received, sent = matrix.sum(axis=0), matrix.sum(axis=1)
+            predecessors, successors = (matrix > 0).sum(axis=0), (matrix > 0).sum(axis=1)
+
+        transit = np.minimum(received, sent)
+        total = sent.sum()
+        metrics = pd.DataFrame({
+            'recues': received.astype(np.int64),
+            'transmises': sent.astype(np.int64),
+            'predecesseurs': predecessors,
+            'successeurs': successors,
+            'pagerank': _pagerank(matrix, sent).round(4),
+            'transit': transit.astype(np.int64),
+            'part_transit': (transit * 100 / total).round(1) if total else np.zeros(len(keys)),
+        }, index=pd.Index(keys, name='cle'))
+        metrics = metrics.sort_values(['transit', 'pagerank'], ascending=False)
+
+        # Une modification pendant le calcul rend ce résultat périmé : il n'est pas conservé
+        with self._lock:
+            if self._version == version:
+                self._metrics = metrics
+        return metrics
+
+    def bottlenecks(self, limit: int = 10) -> pd.DataFrame:
+        """
+        Acteurs par lesquels transite le plus de travail.
+
+        Args:
+            limit (int, optional): Nombre d'acteurs. Defaults to 10.
+
+        Returns:
+            pd.DataFrame: Les premières lignes de metrics() dont le transit est non nul.
+        """
+        metrics = self.metrics()
+        return metrics[metrics['transit'] > 0].head(limit)
+
+    def top_handoffs(self, limit: int = 20) -> List[Dict]:
+        """
+        Transmissions les plus fréquentes.
+
+        Args:
+            limit (int, optional): Nombre de transmissions. Defaults to 20.
+
+        Returns:
+            List[Dict]: {"de", "vers", "nombre"} triés par nombre décroissant.
+        """
+        with self._lock:
+            return [{'de': actor_from, 'vers': actor_to, 'nombre': count}
+                    for (actor_from, actor_to), count in self.edges.most_common(limit)]
+
+
+def _pagerank(matrix, out_weights: np.ndarray) -> np.ndarray:
+    """PageRank pondéré par itération de puissance ; les acteurs sans successeur redistribuent uniformément."""
+    size = matrix.shape[0]
+    if not size:
+        return np.zeros(0)
+
+    inverse = np.divide(1.0, out_weights, out=np.zeros(size), where=out_weights > 0)
+    dangling = out_weights == 0
+    rank = np.full(size, 1.0 / size)
+    for _ in range(PAGERANK_MAX_ITERATIONS):
+        # rank_j = (1-d)/n + d * (sum_i rank_i * w_ij / out_i + part des acteurs sans successeur)
+        spread = matrix.T @ (rank * inverse)
+        new_rank = (1 - PAGERANK_DAMPING) / size + PAGERANK_DAMPING * (spread + rank[dangling].sum() / size)
+        if np.abs(new_rank - rank).sum() < PAGERANK_TOLERANCE:
+            return new_rank
+        rank = new_rank
+    return rank
+
+
+_handoff_graph = None
+_handoff_graph_signature = None
+_handoff_graph_lock = threading.Lock()
+
+
+def get_handoff_graph(path: Union[str, Path] = HANDOFF_GRAPH_PATH) -> HandoffGraph:
+    """
+    Renvoie le graphe des transmissions du processus, rapproché des fichiers de données s'ils ont changé.
+
+    Args:
+        path (Union[str, Path], optional): Fichier du graphe. Defaults to HANDOFF_GRAPH_PATH.
+
+    Returns:
+        HandoffGraph: Le graphe partagé.
+    """
+    global _handoff_graph, _handoff_graph_signature
+    signature = data_files_signature()
+    with _handoff_graph_lock:
+        if _handoff_graph is None:
+            _handoff_graph = HandoffGraph(path)
+        if signature != _handoff_graph_signature:
+            graph_path = _handoff_graph.path
+            if (_handoff_graph.reconcile(iter_file_sources((DOSSIERS_PATH, DATA_PATH)))
+                    or (graph_path and not graph_path.exists())):
+                _handoff_graph.save()
+            _handoff_graph_signature = signature
+        return _handoff_graph
+
+
+def update_handoff_graph(source_id: str, titre: str, etapes: Iterable[Dict]) -> None:
+    """
+    Met à jour le graphe partagé après la sauvegarde d'une procédure, puis l'enregistre.
+
+    Comme update_actor_index : seule la procédure sauvegardée est traitée et la
+    nouvelle signature des fichiers de données est retenue, sans rapprochement.
+
+    Args:
+        source_id (str): Identifiant de la procédure (voir utils.actor_index.iter_data_sources).
+        titre (str): Titre de la procédure.
+        etapes (Iterable[Dict]): Étapes au format enregistré.
+    """
+    global _handoff_graph_signature
+    with _handoff_graph_lock:
+        graph = _handoff_graph
+        if graph is not None:
+            if graph.update_source(source_id, titre, etapes):
+                graph.save()
+            _handoff_graph_signature = data_files_signature()
+            return
+    # Graphe pas encore chargé : le rapprochement initial inclut la procédure sauvegardée
+    get_handoff_graph()
@@ -0,0 +1,130 @@
+"""
+Mesure du temps d'import des modules de l'application (python -X importtime).
+
+Chaque module est importé dans un interpréteur neuf ; la sortie de
+-X importtime donne le temps cumulé de l'import et la liste des modules
+chargés. Le contrôle échoue (code de sortie 1) si un module importe une
+dépendance lourde que seul son premier usage devrait charger (voir
+utils.lazy_import) ou s'il dépasse le budget de temps.
+
+Usage (depuis la racine de l'application) :
+    python -m utils.import_benchmark
+    python -m utils.import_benchmark utils.procedure_gen --budget-ms 200 --repeat 5
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+# Modules dont l'import doit rester léger
+DEFAULT_MODULES = (
+    'models.models',
+    'models.config',
+    'utils',
+    'utils.procedure_gen',
+    'utils.logigramme_advanced',
+)
+
+# Dépendances lourdes qui ne doivent être chargées qu'au premier usage
+HEAVY_MODULES = (
+    'langchain', 'langchain_core', 'langchain_community', 'langchain_groq',
+    'torch', 'sentence_transformers', 'transformers', 'chromadb', 'matplotlib',
+)
+
+# Budget par défaut du temps d'import cumulé d'un module (en millisecondes)
+DEFAULT_BUDGET_MS = 300.0
+
+# "import time:       123 |        456 | module"
+_IMPORTTIME_RE = re.compile(r'^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)\s*$')
+
+
+def measure_import(module: str, cwd: Path = None) -> Dict:
+    """
+    Importe un module dans un interpréteur neuf et relève ses temps d'import.
+
+    Args:
+        module (str): Nom du module à importer.
+        cwd (Path, optional): Répertoire de l'application. Defaults to le parent du package utils.
+
+    Returns:
+        Dict: {"module", "cumule_ms", "modules" (nom -> temps cumulé en ms), "lourds", "erreur"}.
+    """
+    cwd = Path(cwd) if cwd else Path(__file__).resolve().parent.parent
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(cwd), os.environ.get('PYTHONPATH')])))
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=cwd, env=env, capture_output=True, text=True
+    )
+
+    modules = {}
+    for line in completed.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            modules[match.group(4)] = int(match.group(2)) / 1000
+
+    heavy = sorted({name for name in modules if name.split('.')[0] in HEAVY_MODULES})
+    error = None
+    if completed.returncode != 0:
+        error = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else 'échec'
+    return {
+        'module': module,
+        'cumule_ms': modules.get(module, 0.0),
+        'modules': modules,
+        'lourds': heavy,
+        'erreur': error,
+    }
+
+
+def run_benchmark(modules: Sequence[str] = DEFAULT_MODULES, repeat: int = 3,
+                  budget_ms: float = DEFAULT_BUDGET_MS) -> List[Dict]:
+    """
+    Mesure chaque module plusieurs fois et garde le meilleur temps (le moins bruité).
+
+    Args:
+        modules (Sequence[str], optional): Modules à mesurer. Defaults to DEFAULT_MODULES.
+        repeat (int, optional): Nombre de mesures par module. Defaults to 3.
+        budget_ms (float, optional): Budget du temps d'import cumulé. Defaults to DEFAULT_BUDGET_MS.
+
+    Returns:
+        List[Dict]: Une mesure par module, avec "ok" (False si dépendance lourde, budget dépassé ou erreur).
+    """
+    results = []
+    for module in modules:
+        runs = [measure_import(module) for _ in range(max(1, repeat))]
+        best = min(runs, key=lambda run: run['cumule_ms'])
+        best['ok'] = not best['erreur'] and not best['lourds'] and best['cumule_ms'] <= budget_ms
+        results.append(best)
+    return results
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Mesure du temps d'import des modules de l'application")
+    parser.add_argument("modules", nargs="*", default=list(DEFAULT_MODULES), help="Modules à importer")
+    parser.add_argument("--repeat", type=int, default=3, help="Nombre de mesures par module")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="Temps d'import cumulé maximal d'un module (ms)")
+    parser.add_argument("--top", type=int, default=5, help="Nombre de sous-imports les plus coûteux affichés")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.modules, repeat=args.repeat, budget_ms=args.budget_ms)
+    for result in results:
+        status = "OK " if result['ok'] else "KO "
+        print(f"{status} {result['module']:<24} {result['cumule_ms']:>8.1f} ms")
+        if result['erreur']:
+            print(f"      erreur : {result['erreur']}")
+        if result['lourds']:
+            print(f"      dépendances lourdes chargées : {', '.join(result['lourds'])}")
+        slowest = sorted(((ms, name) for name, ms in result['modules'].items() if name != result['module']),
+                         reverse=True)[:args.top]
+        for ms, name in slowest:
+            print(f"      {ms:>8.1f} ms  {name}")
+
+    return 0 if all(result['ok'] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+Module d'import différé des dépendances lourdes.
+
+LangChain, les embeddings HuggingFace (torch, sentence-transformers), Chroma ou
+Matplotlib coûtent plusieurs secondes à l'import. lazy_import renvoie un
+module mandataire : le vrai module n'est importé qu'au premier accès à l'un de
+ses attributs. Une page qui n'affiche que la liste des modèles ne paie donc
+plus ces imports, et un module absent ne lève ImportError qu'au moment où il
+sert réellement.
+
+Exemple :
+    langchain_groq = lazy_import("langchain_groq")   # rien n'est importé
+    llm = langchain_groq.ChatGroq(...)               # import réel ici
+"""
+
+import importlib
+import importlib.util
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Module mandataire importé au premier accès à l'un de ses attributs."""
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name (str): Nom complet du module (par exemple "langchain.chains").
+        """
+        super().__init__(name)
+        self.__dict__['_module'] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__['_module']
+        if module is None:
+            # importlib protège déjà l'import d'un même module par un verrou
+            module = importlib.import_module(self.__name__)
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "chargé" if self.__dict__['_module'] is not None else "non chargé"
+        return f"<module '{self.__name__}' (différé, {state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """
+    Renvoie un module dont l'import est différé jusqu'à son premier usage.
+
+    Args:
+        name (str): Nom complet du module.
+
+    Returns:
+        LazyModule: Le mandataire (le module réel s'il est déjà importé n'est pas réimporté).
+    """
+    return LazyModule(name)
+
+
+def is_available(name: str) -> bool:
+    """
+    Indique si un module est installé, sans l'importer.
+
+    Args:
+        name (str): Nom complet du module (les paquets parents d'un sous-module sont importés).
+
+    Returns:
+        bool: True si le module peut être importé.
+    """
+    if name in sys.modules:
+        return True
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
@@ -9,7 +9,10 @@ import re
 import io
 import logging
 from pathlib import Path
-from typing import Union, Optional, List, Dict
+from typing import Callable, Union, Optional, List, Dict
+
+from utils.text_normalizer import normalize_text
+from utils.circular_segmenter import segment_circular, iter_spans, span_text
 
 # Configuration du logger
 logging.basicConfig(
@@ -20,14 +23,24 @@ logger = logging.getLogger(__name__)
 
 try:
     import PyPDF2
-    from pdfminer.high_level import extract_text as pdfminer_extract_text
+    from pdfminer.converter import TextConverter
     from pdfminer.layout import LAParams
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
     HAS_PDF_LIBS = True
 except ImportError:
     logger.warning("Les bibliothèques PDF (PyPDF2, pdfminer.six) ne sont pas installées. "
                  "L'extraction de texte des PDFs sera limitée.")
     HAS_PDF_LIBS = False
 
+# Paramètres de mise en page de pdfminer.six
+PDFMINER_LAPARAMS = {
+    "line_margin": 0.5,
+    "word_margin": 0.1,
+    "char_margin": 2.0,
+    "all_texts": True
+}
+
 def extract_text_from_pdf(pdf_path: Union[str, Path], 
                          use_pdfminer: bool = True, 
                          clean_text: bool = True) -> str:
@@ -64,36 +77,7 @@ def extract_text_from_pdf(pdf_path: Union[str, Path],
         raise ValueError(f"Le fichier {pdf_path} n'est pas un fichier PDF.")
     
     try:
-        extracted_text = ""
-        
-        # Extraction avec pdfminer.six (meilleure qualité mais plus lent)
-        if use_pdfminer:
-            laparams = LAParams(
-                line_margin=0.5,
-                word_margin=0.1,
-                char_margin=2.0,
-                all_texts=True
-            )
-            extracted_text = pdfminer_extract_text(
-                str(pdf_path), 
-                laparams=laparams
-            )
-        
-        # Si pdfminer échoue ou n'est pas utilisé, fallback sur PyPDF2
-        if not extracted_text or not use_pdfminer:
-            with open(pdf_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                num_pages = len(reader.pages)
-                
-                # Extraction du texte page par page
-                page_texts = []
-                for page_num in range(num_pages):
-                    page = reader.pages[page_num]
-                    page_text = page.extract_text()
-                    if page_text:
-                        page_texts.append(page_text)
-                
-                extracted_text = "\n\n".join(page_texts)
+        extracted_text = extract_raw_text(pdf_path, use_pdfminer=use_pdfminer)
         
         # Nettoyage du texte si demandé
         if clean_text:
@@ -104,37 +88,73 @@ def extract_text_from_pdf(pdf_path: Union[str, Path],
     except Exception as e:
         logger.error(f"Erreur lors de l'extraction du texte du PDF {pdf_path}: {str(e)}")
         raise
+
+def extract_raw_text(pdf_path: Path,
+                     use_pdfminer: bool = True,
+                     on_page: Optional[Callable[[int, int], None]] = None) -> str:
+    """
+    Extrait le texte brut d'un PDF, page par page.
+    
+    Args:
+        pdf_path (Path): Chemin vers le fichier PDF (déjà vérifié).
+        use_pdfminer (bool, optional): Utiliser pdfminer.six pour l'extraction. Defaults to True.
+        on_page (Optional[Callable[[int, int], None]], optional): Fonction appelée
+            après chaque page avec (pages traitées, nombre total de pages).
+        
+    Returns:
+        str: Le texte extrait, non nettoyé.
+    """
+    with open(pdf_path, 'rb') as file:
+        extracted_text = ""
+        
+        # Extraction avec pdfminer.six (meilleure qualité mais plus lent)
+        if use_pdfminer:
+            output = io.StringIO()
+            resource_manager = PDFResourceManager()
+            device = TextConverter(resource_manager, output, laparams=LAParams(**PDFMINER_LAPARAMS))
+            interpreter = PDFPageInterpreter(resource_manager, device)
+            try:
+                # L'arbre des pages est lu une seule fois ; son contenu n'est interprété qu'ensuite
+                pages = list(PDFPage.get_pages(file))
+                for page_num, page in enumerate(pages, start=1):
+                    interpreter.process_page(page)
+                    if on_page:
+                        on_page(page_num, len(pages))
+            finally:
+                device.close()
+            extracted_text = output.getvalue()
+        
+        # Si pdfminer échoue ou n'est pas utilisé, fallback sur PyPDF2 (lecteur créé seulement ici)
+        if not extracted_text.strip():
+            file.seek(0)
+            reader = PyPDF2.PdfReader(file)
+            num_pages = len(reader.pages)
+            page_texts = []
+            for page_num, page in enumerate(reader.pages, start=1):
+                page_text = page.extract_text()
+                if page_text:
+                    page_texts.append(page_text)
+                if on_page:
+                    on_page(page_num, num_pages)
+            
+            extracted_text = "\n\n".join(page_texts)
+    
+    return extracted_text
     
 def clean_extracted_text(text: str) -> str:
     """
     Nettoie le texte extrait d'un PDF.
     
+    Délègue au normaliseur compilé de utils.text_normalizer, partagé par
+    tous les chemins d'ingestion.
+    
     Args:
         text (str): Le texte à nettoyer.
         
     Returns:
         str: Le texte nettoyé.
     """
-    if not text:
-        return ""
-    
-    # Conversion des sauts de ligne multiples en un seul
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    
-    # Suppression des espaces multiples
-    text = re.sub(r' {2,}', ' ', text)
-    
-    # Suppression des caractères non imprimables
-    text = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F-\x9F]', '', text)
-    
-    # Normalisation des tirets et guillemets
-    text = text.replace('–', '-').replace('—', '-').replace(''', "'").replace(''', "'")
-    text = text.replace('"', '"').replace('"', '"')
-    
-    # Suppression des lignes vides en début et fin de texte
-    text = text.strip()
-    
-    return text
+    return normalize_text(text)
 
 def extract_sections_from_text(text: str, section_patterns: Optional[List[str]] = None) -> Dict[str, str]:
     """
@@ -143,7 +163,7 @@ def extract_sections_from_text(text: str, section_patterns: Optional[List[str]]
     Args:
         text (str): Le texte à analyser.
         section_patterns (Optional[List[str]], optional): Liste des motifs regex pour identifier les sections.
-            Defaults to None.
+            Defaults to None (découpage selon la structure de la circulaire : objet, visas, articles, annexes).
         
     Returns:
         Dict[str, str]: Dictionnaire avec les noms de section comme clés et le contenu comme valeurs.
@@ -151,14 +171,9 @@ def extract_sections_from_text(text: str, section_patterns: Optional[List[str]]
     if not text:
         return {}
     
-    # Patterns par défaut pour les sections courantes dans les notes circulaires
+    # Sans motifs personnalisés : segmentation structurelle en une seule passe
     if section_patterns is None:
-        section_patterns = [
-            r'(?i)(?:objet|sujet)\s*:\s*(.*?)(?=\n\n|\n[A-Z]|$)',
-            r'(?i)(?:référence[s]?)\s*:\s*(.*?)(?=\n\n|\n[A-Z]|$)',
-            r'(?i)(?:contexte|introduction)\s*:?\s*(.*?)(?=\n\n\d+\.|\n\n[A-Z]|$)',
-            r'(?i)(?:procédure|processus)\s*:?\s*(.*?)(?=\n\n\d+\.|\n\n[A-Z]|$)'
-        ]
+        return _extract_structural_sections(text)
     
     sections = {}
     
@@ -176,6 +191,34 @@ def extract_sections_from_text(text: str, section_patterns: Optional[List[str]]
     
     return sections
 
+def _extract_structural_sections(text: str) -> Dict[str, str]:
+    """Construit les sections (objet, visas, articles, annexes) à partir de l'arbre de segments."""
+    tree = segment_circular(text)
+    sections = {}
+    
+    if tree['objet']:
+        sections["Objet"] = tree['objet']
+    
+    for span in iter_spans(tree):
+        if span['type'] == 'visas':
+            name = "Visas"
+        elif span['type'] == 'article':
+            name = f"Article {span['numero']}"
+        elif span['type'] == 'annexe':
+            name = f"Annexe {span['numero']}".strip()
+        elif span['type'] == 'dispositif' and not span['enfants']:
+            name = "Dispositif"
+        else:
+            continue
+        # Conserver la première occurrence en cas de numéro répété
+        sections.setdefault(name, span_text(text, span))
+    
+    # Si aucune structure n'a été reconnue, utiliser le texte entier comme "Contenu"
+    if not sections:
+        sections["Contenu"] = text
+    
+    return sections
+
 def extract_metadata_from_pdf(pdf_path: Union[str, Path]) -> Dict[str, str]:
     """
     Extrait les métadonnées d'un fichier PDF.
@@ -252,12 +295,12 @@ def extract_decide_sections(pdf_path: Union[str, Path]) -> List[str]:
             for page in reader.pages:
                 text += page.extract_text() + "\n"
             
-            # Rechercher les sections commençant par "décide"
-            pattern = r"(?i)décide\s*:?\s*(.*?)(?=\n\s*(?:décide|$))"
-            matches = re.finditer(pattern, text, re.DOTALL | re.MULTILINE)
+            text = normalize_text(text)
             
-            for match in matches:
-                section_text = match.group(1).strip()
+            # Rechercher les sections "décide" dans l'arbre de segments
+            for span in iter_spans(segment_circular(text), 'dispositif'):
+                # Retirer l'intitulé "Décide :" du contenu de la section
+                section_text = re.sub(r'(?i)^d[ée]cide\s*:?', '', span_text(text, span)).strip()
                 if section_text:  # Ne pas inclure les sections vides
                     decide_sections.append(section_text)
                     
@@ -0,0 +1,227 @@
+"""
+Module d'extraction du texte des PDF dans un processus isolé.
+
+L'extraction (pdfminer.six, puis PyPDF2) s'exécute dans un sous-processus
+`python -m utils.pdf_worker` que le serveur peut tuer : un PDF malformé ou
+trop volumineux ne bloque plus le thread Streamlit de la session. Les limites
+proviennent de PDF_CONFIG (taille du fichier, délai d'exécution, mémoire du
+processus) et un sémaphore borne le nombre d'extractions simultanées sur le
+serveur, les sessions Streamlit étant des threads d'un même processus.
+
+Le processus fils écrit un message JSON par ligne sur sa sortie standard :
+    {"type": "progression", "pages": int, "total": int}
+    {"type": "resultat", "texte": str}
+    {"type": "erreur", "classe": str, "message": str}
+"""
+
+import json
+import logging
+import queue
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+from models.config import PDF_CONFIG
+from utils.pdf_parser import HAS_PDF_LIBS, clean_extracted_text, extract_raw_text
+
+logger = logging.getLogger(__name__)
+
+try:
+    import resource
+except ImportError:  # Windows : pas de limite mémoire par processus
+    resource = None
+
+# Répertoire de l'application, depuis lequel le processus fils importe utils
+_BASE_DIR = Path(__file__).parent.parent
+
+# File d'attente des extractions : au plus max_workers processus en parallèle
+_EXTRACTION_SLOTS = threading.BoundedSemaphore(PDF_CONFIG.get("max_workers", 2))
+
+# Fin de la sortie d'erreur du processus fils jointe aux erreurs (en caractères)
+STDERR_TAIL_CHARS = 2000
+
+
+def extract_text_isolated(pdf_path: Union[str, Path],
+                          use_pdfminer: bool = True,
+                          clean_text: bool = True,
+                          progress_callback: Optional[Callable[[int, int], None]] = None,
+                          timeout: Optional[float] = None,
+                          max_size: Optional[int] = None,
+                          max_memory: Optional[int] = None) -> str:
+    """
+    Extrait le texte d'un PDF dans un sous-processus soumis aux limites de PDF_CONFIG.
+
+    Args:
+        pdf_path (Union[str, Path]): Chemin vers le fichier PDF.
+        use_pdfminer (bool, optional): Utiliser pdfminer.six pour l'extraction. Defaults to True.
+        clean_text (bool, optional): Nettoyer le texte extrait. Defaults to True.
+        progress_callback (Optional[Callable[[int, int], None]], optional): Fonction appelée
+            avec (pages traitées, nombre total de pages) au fil de l'extraction.
+        timeout (Optional[float], optional): Délai maximal en secondes. Defaults to PDF_CONFIG["timeout"].
+        max_size (Optional[int], optional): Taille maximale du fichier en octets.
+            Defaults to PDF_CONFIG["max_size"].
+        max_memory (Optional[int], optional): Mémoire maximale du processus en octets.
+            Defaults to PDF_CONFIG["max_memory"].
+
+    Returns:
+        str: Le texte extrait du PDF.
+
+    Raises:
+        FileNotFoundError: Si le fichier PDF n'existe pas.
+        ValueError: Si le fichier n'est pas un PDF ou dépasse la taille maximale.
+        TimeoutError: Si l'extraction dépasse le délai maximal.
+        MemoryError: Si l'extraction dépasse la mémoire maximale.
+        RuntimeError: Si le processus d'extraction échoue.
+    """
+    if not HAS_PDF_LIBS:
+        raise ImportError("Les bibliothèques PDF (PyPDF2, pdfminer.six) ne sont pas installées. "
+                         "Veuillez les installer avec 'pip install PyPDF2 pdfminer.six'")
+
+    timeout = timeout if timeout is not None else PDF_CONFIG["timeout"]
+    max_size = max_size if max_size is not None else PDF_CONFIG["max_size"]
+    max_memory = max_memory if max_memory is not None else PDF_CONFIG.get("max_memory", 0)
+
+    pdf_path = Path(pdf_path)
+    if not pdf_path.exists():
+        raise FileNotFoundError(f"Le fichier {pdf_path} n'existe pas.")
+    if pdf_path.suffix.lower() != '.pdf':
+        raise ValueError(f"Le fichier {pdf_path} n'est pas un fichier PDF.")
+
+    size = pdf_path.stat().st_size
+    if size > max_size:
+        raise ValueError(f"Le fichier {pdf_path.name} ({size / 1024 / 1024:.1f} Mo) dépasse "
+                         f"la taille maximale autorisée ({max_size / 1024 / 1024:.0f} Mo).")
+
+    with _EXTRACTION_SLOTS:
+        extracted_text = _run_worker(pdf_path.resolve(), use_pdfminer, timeout, max_memory, progress_callback)
+
+    if clean_text:
+        extracted_text = clean_extracted_text(extracted_text)
+
+    return extracted_text
+
+
+def _run_worker(pdf_path: Path,
+                use_pdfminer: bool,
+                timeout: float,
+                max_memory: int,
+                progress_callback: Optional[Callable[[int, int], None]]) -> str:
+    """Lance le processus fils, relaie sa progression et le tue au-delà du délai."""
+    command = [sys.executable, "-m", "utils.pdf_worker",
+               str(pdf_path), "1" if use_pdfminer else "0", str(max_memory or 0)]
+    # La sortie d'erreur (traceback) va dans un fichier temporaire : pas de second tube à vider
+    with tempfile.TemporaryFile(mode='w+', encoding='utf-8', errors='replace') as stderr_file:
+        process = subprocess.Popen(
+            command,
+            cwd=str(_BASE_DIR),
+            stdout=subprocess.PIPE,
+            stderr=stderr_file,
+            text=True,
+            encoding='utf-8'
+        )
+        try:
+            result, error = _read_messages(process, pdf_path, timeout, progress_callback)
+        finally:
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+        stderr_file.seek(0)
+        stderr_tail = stderr_file.read()[-STDERR_TAIL_CHARS:].strip()
+
+    if result is not None:
+        return result
+
+    details = f"\n{stderr_tail}" if stderr_tail else ""
+    if stderr_tail:
+        logger.error(f"Sortie d'erreur de l'extraction du PDF {pdf_path}:\n{stderr_tail}")
+    if error and error.get("classe") == "MemoryError":
+        raise MemoryError(f"L'extraction du PDF {pdf_path.name} a dépassé la mémoire "
+                          f"maximale autorisée ({max_memory / 1024 / 1024:.0f} Mo).{details}")
+    if error:
+        raise RuntimeError(f"Erreur lors de l'extraction du texte du PDF {pdf_path.name}: "
+                           f"{error.get('message')}{details}")
+    raise RuntimeError(f"Le processus d'extraction du PDF {pdf_path.name} s'est arrêté "
+                       f"(code {process.returncode}).{details}")
+
+
+def _read_messages(process: subprocess.Popen,
+                   pdf_path: Path,
+                   timeout: float,
+                   progress_callback: Optional[Callable[[int, int], None]]) -> tuple:
+    """Relaie les messages JSON du processus fils jusqu'à sa fin ; renvoie (texte, message d'erreur)."""
+    # Lecture de la sortie dans un thread pour pouvoir attendre avec un délai
+    lines = queue.Queue()
+
+    def read_output():
+        for line in process.stdout:
+            lines.put(line)
+        lines.put(None)
+
+    threading.Thread(target=read_output, daemon=True).start()
+
+    deadline = time.monotonic() + timeout
+    result = None
+    error = None
+    while True:
+        remaining = deadline - time.monotonic()
+        try:
+            if remaining <= 0:
+                raise queue.Empty
+            line = lines.get(timeout=remaining)
+        except queue.Empty:
+            logger.error(f"Extraction du PDF {pdf_path} interrompue après {timeout} s")
+            raise TimeoutError(f"L'extraction du PDF {pdf_path.name} a dépassé "
+                               f"le délai maximal de {timeout} secondes.")
+
+        if line is None:
+            break
+        try:
+            message = json.loads(line)
+        except ValueError:
+            continue
+
+        if message.get("type") == "progression":
+            if progress_callback:
+                progress_callback(message["pages"], message["total"])
+        elif message.get("type") == "resultat":
+            result = message["texte"]
+        elif message.get("type") == "erreur":
+            error = message
+    return result, error
+
+
+def _emit(message: dict) -> None:
+    sys.stdout.write(json.dumps(message) + "\n")
+    sys.stdout.flush()
+
+
+def _worker_main(argv: list) -> int:
+    """Point d'entrée du processus fils : extrait le PDF et écrit les messages JSON."""
+    pdf_path, use_pdfminer, max_memory = Path(argv[0]), argv[1] == "1", int(argv[2])
+
+    # La limite s'applique aux allocations faites après les imports
+    if resource is not None and max_memory > 0:
+        resource.setrlimit(resource.RLIMIT_AS, (max_memory, max_memory))
+
+    try:
+        text = extract_raw_text(
+            pdf_path,
+            use_pdfminer=use_pdfminer,
+            on_page=lambda pages, total: _emit({"type": "progression", "pages": pages, "total": total})
+        )
+        _emit({"type": "resultat", "texte": text})
+        return 0
+    except MemoryError:
+        _emit({"type": "erreur", "classe": "MemoryError", "message": "Mémoire insuffisante"})
+        return 1
+    except Exception as e:
+        _emit({"type": "erreur", "classe": type(e).__name__, "message": str(e)})
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(_worker_main(sys.argv[1:]))
@@ -2,49 +2,35 @@ import os
 import json
 from pathlib import Path
 import time
-from langchain_groq import ChatGroq
-from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
-from langchain.schema import Document
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
+from functools import lru_cache
+
+from models.config import DATA_FILE, MODELS, RETRIEVAL_CONFIG
+from utils.article_chunker import chunk_circular
+from utils.lazy_import import lazy_import
+from utils.markdown_table import (
+    IO_HEADERS, classify_heading, find_io_table, find_steps_table, parse_procedure_steps, render_table
+)
+
+# LangChain, les embeddings HuggingFace (torch, sentence-transformers) et Chroma ne sont importés
+# qu'au premier usage : les pages qui n'affichent que MODELS ne les chargent jamais
+langchain_groq = lazy_import("langchain_groq")
+langchain_prompts = lazy_import("langchain.prompts")
+langchain_chains = lazy_import("langchain.chains")
+langchain_callbacks = lazy_import("langchain.callbacks.base")
+langchain_schema = lazy_import("langchain.schema")
+langchain_embeddings = lazy_import("langchain_community.embeddings")
+langchain_vectorstores = lazy_import("langchain_community.vectorstores")
 
 # --- Configuration ---
-DATA_PATH = "data/donnees.json"
-VS_DIR = "data/chroma_store"
-
-# Paramètres optimisés
-SIMILARITY_THRESHOLD = 0.2
-MAX_NOTE_LENGTH = 500
-MAX_EXAMPLES = 2
-MIN_PROCEDURE_ROWS = 4
-MAX_PROCEDURE_ROWS = 65
-
-# --- Modèles disponibles ---
-MODELS = {
-    "mistral-saba-24b": {
-        "name": "Mistral Saba 24B",
-        "description": "Modèle équilibré pour une génération de qualité avec un bon rapport précision/vitesse",
-        "provider": "Groq",
-        "temperature": 0.3,
-        "max_tokens": 4096
-    },
-    "llama-3.3-70b-versatile": {
-        "name": "LLama 3.3 70B Versatile",
-        "description": "Modèle de grande taille avec des capacités avancées de raisonnement et d'analyse",
-        "provider": "Groq",
-        "temperature": 0.25,
-        "max_tokens": 4096
-    },
-    "qwen-qwq-32b": {
-        "name": "Qwen QWQ 32B",
-        "description": "Modèle performant avec une bonne compréhension contextuelle",
-        "provider": "Groq",
-        "temperature": 0.35,
-        "max_tokens": 4096
-    }
-}
+DATA_PATH = str(DATA_FILE)
+VS_DIR = str(RETRIEVAL_CONFIG["vector_store_dir"])
+
+# Paramètres réglables par déploiement (section [retrieval], voir models.settings)
+SIMILARITY_THRESHOLD = RETRIEVAL_CONFIG["similarity_threshold"]
+MAX_NOTE_LENGTH = RETRIEVAL_CONFIG["max_note_length"]
+MAX_EXAMPLES = RETRIEVAL_CONFIG["max_examples"]
+MIN_PROCEDURE_ROWS = RETRIEVAL_CONFIG["min_procedure_rows"]
+MAX_PROCEDURE_ROWS = RETRIEVAL_CONFIG["max_procedure_rows"]
 
 def get_api_key():
     """Récupère la clé API depuis les variables d'environnement"""
@@ -58,7 +44,27 @@ def get_api_key():
         raise ValueError("Clé API GROQ_API_KEY manquante dans les variables d'environnement")
     return api_key
 
-def init_llm(model_id="mistral-saba-24b", api_key=None):
+@lru_cache(maxsize=1)
+def _token_stream_handler_class():
+    """Crée la classe TokenStreamHandler au premier usage (elle hérite d'une classe LangChain)"""
+    class TokenStreamHandler(langchain_callbacks.BaseCallbackHandler):
+        """Transmet chaque token généré par le LLM à une fonction (affichage progressif)"""
+        
+        def __init__(self, on_token):
+            self.on_token = on_token
+        
+        def on_llm_new_token(self, token, **kwargs):
+            self.on_token(token)
+    
+    return TokenStreamHandler
+
+def __getattr__(name):
+    # utils.procedure_gen.TokenStreamHandler reste importable sans charger LangChain à l'import du module
+    if name == "TokenStreamHandler":
+        return _token_stream_handler_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def init_llm(model_id="mistral-saba-24b", api_key=None, callbacks=None):
     """Initialise le modèle LLM avec les paramètres appropriés"""
     try:
         if not api_key:
@@ -66,11 +72,13 @@ def init_llm(model_id="mistral-saba-24b", api_key=None):
             
         model_config = MODELS.get(model_id, MODELS["mistral-saba-24b"])
         
-        llm = ChatGroq(
+        llm = langchain_groq.ChatGroq(
             groq_api_key=api_key,
             model_name=model_id,
             temperature=model_config["temperature"],
-            max_tokens=model_config["max_tokens"]
+            max_tokens=model_config["max_tokens"],
+            streaming=callbacks is not None,
+            callbacks=callbacks
         )
         
         print(f"✅ LLM initialisé: {model_config['name']}")
@@ -100,7 +108,7 @@ def load_data(json_path=DATA_PATH):
                 texte = note.get('texte', '') if isinstance(note, dict) else ''
                 
                 if texte:
-                    docs.append(Document(
+                    docs.append(langchain_schema.Document(
                         page_content=texte,
                         metadata={'numero': num, 'nom': nom}
                     ))
@@ -130,10 +138,29 @@ def save_data(data, json_path=DATA_PATH):
         print(f"❌ Erreur lors de la sauvegarde des données: {e}")
         return False
 
+def split_documents_by_article(documents):
+    """Découpe les notes en chunks alignés sur leurs articles, sans recouvrement"""
+    chunks = []
+    for doc in documents:
+        for chunk in chunk_circular(doc.page_content):
+            metadata = dict(doc.metadata)
+            metadata.update({
+                'articles': ", ".join(chunk['articles']),
+                'debut': chunk['debut'],
+                'fin': chunk['fin']
+            })
+            chunks.append(langchain_schema.Document(page_content=chunk['texte'], metadata=metadata))
+    return chunks
+
+@lru_cache(maxsize=1)
+def get_embedder():
+    """Modèle d'embedding des notes, chargé une seule fois par processus"""
+    return langchain_embeddings.HuggingFaceEmbeddings(model_name=RETRIEVAL_CONFIG["embedding_model"])
+
 def init_vector_store(documents=None):
     """Initialise ou charge la base vectorielle"""
     try:
-        embedder = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+        embedder = get_embedder()
         
         if documents and len(documents) > 0:
             import shutil
@@ -141,9 +168,8 @@ def init_vector_store(documents=None):
                 shutil.rmtree(VS_DIR, ignore_errors=True)
             
             Path(VS_DIR).mkdir(parents=True, exist_ok=True)
-            splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-            chunks = splitter.split_documents(documents)
-            vs = Chroma(collection_name='notes', persist_directory=VS_DIR, embedding_function=embedder)
+            chunks = split_documents_by_article(documents)
+            vs = langchain_vectorstores.Chroma(collection_name='notes', persist_directory=VS_DIR, embedding_function=embedder)
             vs.add_documents(chunks)
             vs.persist()
             print(f"🗄️ Base vectorielle créée avec {len(chunks)} chunks")
@@ -151,7 +177,7 @@ def init_vector_store(documents=None):
         
         if Path(VS_DIR).exists() and os.listdir(VS_DIR):
             try:
-                vs = Chroma(collection_name='notes', persist_directory=VS_DIR, embedding_function=embedder)
+                vs = langchain_vectorstores.Chroma(collection_name='notes', persist_directory=VS_DIR, embedding_function=embedder)
                 print(f"🗄️ Base vectorielle chargée depuis {VS_DIR}")
                 return vs
             except Exception as e:
@@ -160,7 +186,7 @@ def init_vector_store(documents=None):
                 shutil.rmtree(VS_DIR, ignore_errors=True)
         
         Path(VS_DIR).mkdir(parents=True, exist_ok=True)
-        vs = Chroma(collection_name='notes', persist_directory=VS_DIR, embedding_function=embedder)
+        vs = langchain_vectorstores.Chroma(collection_name='notes', persist_directory=VS_DIR, embedding_function=embedder)
         vs.persist()
         print("🗄️ Base vectorielle vide créée")
         return vs
@@ -178,17 +204,22 @@ def find_similar_notes(vectorstore, query, k=MAX_EXAMPLES):
         results = vectorstore.similarity_search_with_score(query, k=k*2)
         
         similar_notes = []
+        seen_ids = set()
         for doc, score in results:
             note_id = doc.metadata.get('numero', '')
+            if note_id in seen_ids:
+                continue
             note_title = doc.metadata.get('nom', 'Sans titre')
             similarity = 1.0 / (1.0 + score)
             
             if similarity >= 0.4:
+                seen_ids.add(note_id)
                 similar_notes.append({
                     'id': note_id,
                     'titre': note_title,
                     'score': similarity,
-                    'content': doc.page_content[:300]
+                    'content': doc.page_content[:300],
+                    'articles': doc.metadata.get('articles', '')
                 })
         
         similar_notes = similar_notes[:1]
@@ -247,12 +278,12 @@ Avant de créer les étapes, répondez mentalement à ces questions :
 
 ANALYSEZ cette note circulaire et créez une procédure UNIQUE qui lui correspond !"""
 
-    prompt = PromptTemplate(
+    prompt = langchain_prompts.PromptTemplate(
         input_variables=['query', 'num_steps'],
         template=template
     )
     
-    chain = LLMChain(llm=llm, prompt=prompt)
+    chain = langchain_chains.LLMChain(llm=llm, prompt=prompt)
     
     try:
         result = chain.run({
@@ -315,12 +346,12 @@ Créez une procédure ORIGINALE basée UNIQUEMENT sur l'analyse de la note circu
 # INSTRUCTION FINALE
 Analysez cette note circulaire et créez des étapes qui reflètent EXACTEMENT ses exigences !"""
 
-    prompt = PromptTemplate(
+    prompt = langchain_prompts.PromptTemplate(
         input_variables=['query', 'domain_context', 'num_steps'],
         template=template
     )
     
-    chain = LLMChain(llm=llm, prompt=prompt)
+    chain = langchain_chains.LLMChain(llm=llm, prompt=prompt)
     
     try:
         result = chain.run({
@@ -360,12 +391,12 @@ Analysez cette note circulaire et créez EXACTEMENT {num_rows} événements d'en
 
 Analysez la note et créez les événements correspondants !"""
 
-    prompt = PromptTemplate(
+    prompt = langchain_prompts.PromptTemplate(
         input_variables=['query', 'num_rows'],
         template=template
     )
     
-    chain = LLMChain(llm=llm, prompt=prompt)
+    chain = langchain_chains.LLMChain(llm=llm, prompt=prompt)
     
     try:
         result = chain.run({
@@ -414,15 +445,19 @@ def generate_procedure(llm, query, similar_notes=None, notes_map=None, procedure
     print(f"🔍 Génération avec contexte minimal ({len(similar_notes)} note(s) pour orientation)")
     return generate_procedure_with_minimal_context(llm, query_truncated, similar_notes, target_steps)
 
-def generate_procedure_with_model(query, model_id="mistral-saba-24b", api_key=None, vectorstore=None, notes_map=None, procedures_map=None, num_steps=None, num_io_rows=3):
-    """Génère procédure + tableau I/O basés sur l'analyse de la note circulaire"""
+def generate_procedure_with_model(query, model_id="mistral-saba-24b", api_key=None, vectorstore=None, notes_map=None, procedures_map=None, num_steps=None, num_io_rows=3, on_token=None):
+    """Génère procédure + tableau I/O basés sur l'analyse de la note circulaire
+    
+    on_token, s'il est fourni, reçoit chaque token au fil de la génération
+    (procédure puis tableau I/O).
+    """
     
     print("🚀 Début de la génération basée sur l'analyse de la note circulaire...")
     
     if not api_key:
         api_key = get_api_key()
     
-    llm = init_llm(model_id, api_key)
+    llm = init_llm(model_id, api_key, callbacks=[_token_stream_handler_class()(on_token)] if on_token else None)
     
     if vectorstore is not None and notes_map is not None and procedures_map is not None:
         print("📊 Paramètres RAG fournis, recherche de contexte minimal...")
@@ -477,181 +512,46 @@ def main_generate_procedure(query, model_id="mistral-saba-24b", api_key=None, nu
     
     return result
 
-def extract_procedure_components(procedure_text):
+def extract_procedure_components(procedure_text, io_table_text=""):
     """Extrait le tableau des étapes, le tableau I/O et les scénarios de la procédure"""
-    if not procedure_text:
-        return {"etapes": "", "io": "", "scenarios": "", "scenarios_ok": "", "scenarios_ko": ""}
-    
-    # Initialiser les composants
-    components = {
-        "etapes": "",
-        "io": "",
-        "scenarios": "",
-        "scenarios_ok": "",
-        "scenarios_ko": ""
-    }
-    
-    # Extraire les sections par analyse ligne par ligne
-    current_section = []
-    current_section_type = None
-    
-    lines = procedure_text.split("\n")
-    i = 0
-    
-    while i < len(lines):
-        line = lines[i].strip()
-        
-        # Détecter le début du tableau des étapes - AMÉLIORATION
-        if (("| N°" in line or "| No." in line or "| Numéro" in line or "| Étape" in line) and 
-            ("Description" in line or "Activités" in line)) or \
-           ("| Activités |" in line and "| Description |" in line):
-            if current_section_type and current_section:
-                components[current_section_type] = "\n".join(current_section)
-            
-            current_section = [line]
-            current_section_type = "etapes"
-            i += 1
-            continue
-            
-        # Détecter le début du tableau I/O
-        if "| Evènement | Processus en interface | Description du processus en interface |" in line or \
-           "| Événement | Processus en interface | Description du processus en interface |" in line:
-            if current_section_type and current_section:
-                components[current_section_type] = "\n".join(current_section)
-            
-            current_section = [line]
-            current_section_type = "io"
-            
-            # S'assurer que nous avons la ligne de séparation
-            if i + 1 < len(lines) and "| ---" in lines[i + 1]:
-                current_section.append(lines[i + 1])
-                i += 2
-            else:
-                current_section.append("| --- | --- | --- |")
-                i += 1
-            continue
-            
-        # Détecter le début des scénarios généraux
-        if ("# Scénarios" in line or "## Scénarios" in line) and not "OK" in line and not "KO" in line and not "réussi" in line.lower() and not "échec" in line.lower():
-            if current_section_type and current_section:
-                components[current_section_type] = "\n".join(current_section)
-            
-            current_section = [line]
-            current_section_type = "scenarios"
-            i += 1
-            continue
-            
-        # Détecter les scénarios OK/réussis
-        if ("# Scénarios OK" in line or "## Scénarios OK" in line or 
-            "# Scénarios réussis" in line or "## Scénarios réussis" in line or
-            "# Scénario de réussite" in line or "## Scénario de réussite" in line):
-            if current_section_type and current_section:
-                components[current_section_type] = "\n".join(current_section)
-            
-            current_section = [line]
-            current_section_type = "scenarios_ok"
-            i += 1
-            continue
-            
-        # Détecter les scénarios KO/échec
-        if ("# Scénarios KO" in line or "## Scénarios KO" in line or 
-            "# Scénarios d'échec" in line or "## Scénarios d'échec" in line or
-            "# Scénario d'échec" in line or "## Scénario d'échec" in line):
-            if current_section_type and current_section:
-                components[current_section_type] = "\n".join(current_section)
-            
-            current_section = [line]
-            current_section_type = "scenarios_ko"
-            i += 1
-            continue
-            
-        # Si on est dans une section identifiée, ajouter la ligne
-        if current_section_type:
-            current_section.append(line)
-            
-        i += 1
-    
-    # Sauvegarder la dernière section
-    if current_section_type and current_section:
-        components[current_section_type] = "\n".join(current_section)
-    
-    # NOUVELLE FONCTION : Extraire le vrai début et fin des étapes
-    def get_real_start_end_steps(etapes_text):
-        if not etapes_text:
-            return None, None
-            
-        lines = etapes_text.split("\n")
-        steps = []
-        
-        for line in lines:
-            line = line.strip()
-            if line.startswith("|") and line.endswith("|") and "---" not in line:
-                # Extraire le contenu de la ligne du tableau
-                cells = [cell.strip() for cell in line.split("|")[1:-1]]  # Enlever les | du début/fin
-                if len(cells) >= 2 and cells[0] and cells[1]:  # Au moins numéro et description
-                    # Ignorer les en-têtes
-                    if not any(header in cells[1].lower() for header in ['description', 'activité', 'étape']):
-                        steps.append(cells[1])  # Prendre la description de l'étape
-        
-        if steps:
-            return steps[0], steps[-1]  # Premier et dernier step réels
-        return None, None
-    
-    # Nettoyer et formater le tableau I/O
-    if components["io"]:
-        lines = components["io"].split("\n")
-        if len(lines) >= 1:
-            # En-tête standardisé
-            header = "| Evènement | Processus en interface | Description du processus en interface |"
-            separator = "| --- | --- | --- |"
-            data_lines = []
-            
-            # Extraire uniquement les lignes de données
-            data_started = False
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                if "| ---" in line:
-                    data_started = True
-                    continue
-                if data_started and line.startswith("|") and line.endswith("|"):
-                    data_lines.append(line)
-                elif not data_started and line.startswith("|") and line.endswith("|") and "Evènement" not in line and "Événement" not in line:
-                    data_lines.append(line)
-                    
-            # Reconstruire le tableau avec un format propre
-            if data_lines:
-                components["io"] = "\n".join([header, separator] + data_lines)
-            else:
-                # Garder le contenu original si on n'arrive pas à extraire les données
-                components["io"] = "\n".join(lines)
-    
-    # Nettoyer le tableau des étapes ET extraire début/fin réels
-    if components["etapes"]:
-        lines = components["etapes"].split("\n")
-        cleaned_lines = []
-        for line in lines:
-            line = line.strip()
-            if line:
-                cleaned_lines.append(line)
-        components["etapes"] = "\n".join(cleaned_lines)
-        
-        # AJOUT : Extraire les vrais points de début et fin
-        start_step, end_step = get_real_start_end_steps(components["etapes"])
-        components["real_start"] = start_step
-        components["real_end"] = end_step
-    
-    # Nettoyer les sections de scénarios
-    for scenario_type in ["scenarios", "scenarios_ok", "scenarios_ko"]:
-        if components[scenario_type]:
-            lines = components[scenario_type].split("\n")
-            cleaned_lines = []
-            for line in lines:
-                line = line.strip()
-                if line:
-                    cleaned_lines.append(line)
-            components[scenario_type] = "\n".join(cleaned_lines)
+    components = {"etapes": "", "io": "", "scenarios": "", "scenarios_ok": "", "scenarios_ko": ""}
+    procedure_text = procedure_text or ""
+    if not procedure_text and not io_table_text:
+        return components
+    
+    # Tableaux : analyse partagée et mémorisée (utils.markdown_table)
+    steps_table = find_steps_table(procedure_text)
+    procedure_io_table = find_io_table(procedure_text)
+    io_table = find_io_table(io_table_text or "") or procedure_io_table
+    
+    if steps_table:
+        components["etapes"] = render_table(steps_table)
+        # Vrais points de début et de fin : première et dernière activité du tableau
+        activities = [step.activite or step.description for step in parse_procedure_steps(procedure_text)
+                      if step.numero and (step.activite or step.description)]
+        components["real_start"] = activities[0] if activities else None
+        components["real_end"] = activities[-1] if activities else None
+    
+    if io_table:
+        components["io"] = render_table(io_table, IO_HEADERS if 'evenement' in io_table.keys else None)
+    
+    # Scénarios : du titre "Scénario..." jusqu'au titre de section ou au tableau suivant
+    # Seuls les tableaux de procedure_text ont un numéro de ligne valable ici (pas celui de io_table_text)
+    table_starts = {table.first_line for table in (steps_table, procedure_io_table) if table}
+    sections = {}
+    current = None
+    for index, line in enumerate(procedure_text.split("\n")):
+        line = line.strip()
+        kind = classify_heading(line)
+        if kind == "section" or index in table_starts:
+            current = None
+        elif kind:
+            current = sections.setdefault(kind, [])
+        if current is not None and line:
+            current.append(line)
+    
+    for kind, lines in sections.items():
+        components[kind] = "\n".join(lines)
     
     return components
 
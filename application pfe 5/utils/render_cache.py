@@ -0,0 +1,204 @@
+"""
+Module de cache des rendus Graphviz des logigrammes.
+
+Le rendu (mise en page `dot` puis rastérisation) est la partie coûteuse de la
+génération d'un logigramme. Chaque rendu est identifié par une empreinte des
+données normalisées du graphe (étapes extraites, événements d'entrée/sortie,
+titre, moteur et format) : tant que ces données ne changent pas, l'image est
+resservie depuis le cache sans relancer Graphviz.
+
+Le cache a deux niveaux, tous deux bornés en octets et évincés selon l'ordre LRU :
+    - en mémoire, partagé par les sessions Streamlit du processus
+      (DIAGRAM_CONFIG["cache_memory_bytes"]) ;
+    - sur disque (DIAGRAM_CONFIG["cache_dir"], DIAGRAM_CONFIG["cache_disk_bytes"]),
+      conservé entre les redémarrages.
+Une taille maximale de 0 désactive le niveau correspondant.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from models.config import DIAGRAM_CONFIG
+
+# À incrémenter lorsque le style des logigrammes change, pour invalider les rendus existants
+RENDER_CACHE_VERSION = 2
+
+
+def render_key(steps: Any, io_events: Any, title: str, engine: str, fmt: str, extra: Any = None) -> str:
+    """
+    Calcule l'empreinte d'un rendu à partir des données normalisées du graphe.
+
+    Args:
+        steps (Any): Étapes extraites de la procédure (structure sérialisable en JSON).
+        io_events (Any): Événements d'entrée/sortie extraits.
+        title (str): Titre du logigramme.
+        engine (str): Moteur de mise en page Graphviz (dot, neato...).
+        fmt (str): Format de sortie (png, svg, pdf...).
+        extra (Any, optional): Autres paramètres du rendu (couleurs modifiées...).
+
+    Returns:
+        str: L'empreinte SHA-256 hexadécimale.
+    """
+    payload = json.dumps(
+        [RENDER_CACHE_VERSION, steps, io_events, title, engine, fmt, extra],
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(',', ':')
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class RenderCache:
+    """Cache LRU des rendus, en mémoire et sur disque."""
+
+    def __init__(self,
+                 cache_dir: Optional[Union[str, Path]] = None,
+                 max_memory_bytes: Optional[int] = None,
+                 max_disk_bytes: Optional[int] = None):
+        """
+        Args:
+            cache_dir (Optional[Union[str, Path]], optional): Répertoire du cache disque
+                (None pour un cache uniquement en mémoire).
+            max_memory_bytes (Optional[int], optional): Taille maximale du cache mémoire en octets
+                (0 pour le désactiver). Defaults to DIAGRAM_CONFIG["cache_memory_bytes"].
+            max_disk_bytes (Optional[int], optional): Taille maximale du cache disque en octets
+                (0 pour le désactiver). Defaults to DIAGRAM_CONFIG["cache_disk_bytes"].
+        """
+        self.max_memory_bytes = (max_memory_bytes if max_memory_bytes is not None
+                                 else DIAGRAM_CONFIG.get("cache_memory_bytes", 32 * 1024 * 1024))
+        self.max_disk_bytes = (max_disk_bytes if max_disk_bytes is not None
+                               else DIAGRAM_CONFIG.get("cache_disk_bytes", 100 * 1024 * 1024))
+        self.cache_dir = Path(cache_dir) if cache_dir and self.max_disk_bytes > 0 else None
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {'memoire': 0, 'disque': 0, 'manques': 0}
+
+    def _path(self, key: str, fmt: str) -> Path:
+        return self.cache_dir / f"{key}.{fmt}"
+
+    def get(self, key: str, fmt: str, memory: bool = True) -> Optional[bytes]:
+        """
+        Renvoie le rendu associé à l'empreinte, ou None s'il n'est pas en cache.
+
+        Args:
+            key (str): Empreinte calculée par render_key.
+            fmt (str): Format du rendu (extension du fichier sur disque).
+            memory (bool, optional): Consulter et alimenter le cache mémoire ; False pour un
+                traitement par lot qui ne doit pas en évincer les rendus des sessions. Defaults to True.
+
+        Returns:
+            Optional[bytes]: Le contenu du rendu.
+        """
+        if memory:
+            with self._lock:
+                data = self._memory.get(key)
+                if data is not None:
+                    self._memory.move_to_end(key)
+                    self.stats['memoire'] += 1
+                    return data
+
+        if self.cache_dir:
+            path = self._path(key, fmt)
+            try:
+                data = path.read_bytes()
+                # La date de modification sert d'ordre LRU sur disque
+                os.utime(path)
+            except OSError:
+                data = None
+            if data is not None:
+                if memory:
+                    self._remember(key, data)
+                with self._lock:
+                    self.stats['disque'] += 1
+                return data
+
+        with self._lock:
+            self.stats['manques'] += 1
+        return None
+
+    def put(self, key: str, fmt: str, data: bytes, memory: bool = True) -> None:
+        """
+        Enregistre un rendu en mémoire et sur disque.
+
+        Args:
+            key (str): Empreinte calculée par render_key.
+            fmt (str): Format du rendu (extension du fichier sur disque).
+            data (bytes): Contenu du rendu.
+            memory (bool, optional): Conserver aussi le rendu en mémoire. Defaults to True.
+        """
+        if memory:
+            self._remember(key, data)
+
+        if self.cache_dir:
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                path = self._path(key, fmt)
+                tmp_path = path.with_suffix(path.suffix + f'.{threading.get_ident()}.tmp')
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, path)
+                self._evict_disk()
+            except OSError as e:
+                print(f"⚠️ Cache des logigrammes non enregistré sur disque: {e}")
+
+    def clear(self) -> None:
+        """Vide le cache en mémoire et sur disque."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        if self.cache_dir and self.cache_dir.exists():
+            for path in self.cache_dir.iterdir():
+                if path.is_file():
+                    path.unlink(missing_ok=True)
+
+    def _remember(self, key: str, data: bytes) -> None:
+        # Un rendu plus grand que tout le cache mémoire n'y est pas conservé
+        if len(data) > self.max_memory_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= len(previous)
+            self._memory[key] = data
+            self._memory_bytes += len(data)
+            while self._memory_bytes > self.max_memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def _evict_disk(self) -> None:
+        """Supprime les rendus les moins récemment utilisés au-delà de la taille maximale."""
+        entries = []
+        total = 0
+        for path in self.cache_dir.iterdir():
+            if path.suffix == '.tmp' or not path.is_file():
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+_render_cache = None
+_render_cache_lock = threading.Lock()
+
+
+def get_render_cache() -> RenderCache:
+    """Renvoie le cache des rendus partagé par le processus."""
+    global _render_cache
+    with _render_cache_lock:
+        if _render_cache is None:
+            _render_cache = RenderCache(cache_dir=DIAGRAM_CONFIG.get("cache_dir"))
+        return _render_cache
@@ -0,0 +1,205 @@
+"""
+Module d'export des tableaux (DataFrame) en CSV et en Excel.
+
+Les exports ne sont produits qu'à la demande, puis conservés sur disque
+(EXPORT_CONFIG["cache_dir"]) sous l'empreinte de leur contenu : tant que le
+tableau ne change pas, le fichier déjà écrit est resservi sans nouvelle
+sérialisation, y compris d'une session Streamlit à l'autre. L'empreinte du
+contenu (frame_digest) peut être calculée une fois par l'appelant et passée aux
+fonctions d'export, pour ne pas rehacher un grand tableau inchangé à chaque
+affichage.
+
+Les classeurs Excel sont écrits avec XlsxWriter lorsqu'il est installé
+(openpyxl sinon). Au-delà de EXPORT_CONFIG["constant_memory_rows"] lignes, le
+classeur est écrit ligne par ligne en mode "constant_memory" : chaque ligne
+est envoyée sur disque dès qu'elle est écrite, la mémoire utilisée ne dépend
+plus de la taille de l'export. Les CSV sont écrits par blocs de lignes.
+"""
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from models.config import EXPORT_CONFIG
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+# À incrémenter lorsque la mise en forme des exports change, pour invalider les fichiers existants
+EXPORT_CACHE_VERSION = 1
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+_export_lock = threading.Lock()
+
+
+def frame_digest(df: pd.DataFrame, index: bool = False) -> str:
+    """
+    Calcule l'empreinte du contenu d'un tableau (colonnes, dimensions et valeurs).
+
+    Args:
+        df (pd.DataFrame): Le tableau.
+        index (bool, optional): Inclure l'index. Defaults to False.
+
+    Returns:
+        str: L'empreinte SHA-256 hexadécimale.
+    """
+    digest = hashlib.sha256()
+    digest.update(repr((list(df.columns), df.shape)).encode('utf-8'))
+    # Empreinte vectorisée de chaque ligne (valeurs et index)
+    digest.update(pd.util.hash_pandas_object(df, index=index).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def export_key(df: pd.DataFrame, fmt: str, sheet_name: str = "Données", index: bool = False,
+               digest: Optional[str] = None) -> str:
+    """
+    Calcule l'empreinte d'un export à partir du contenu du tableau.
+
+    Args:
+        df (pd.DataFrame): Le tableau exporté.
+        fmt (str): Format de l'export (csv ou xlsx).
+        sheet_name (str, optional): Nom de la feuille Excel. Defaults to "Données".
+        index (bool, optional): Exporter aussi l'index. Defaults to False.
+        digest (Optional[str], optional): frame_digest(df, index) déjà calculé. Defaults to None.
+
+    Returns:
+        str: L'empreinte SHA-256 hexadécimale.
+    """
+    digest = digest or frame_digest(df, index)
+    payload = repr((EXPORT_CACHE_VERSION, fmt, sheet_name, index, digest))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _export_path(key: str, fmt: str) -> Path:
+    return Path(EXPORT_CONFIG.get("cache_dir")) / f"{key}.{fmt}"
+
+
+def get_cached_export(df: pd.DataFrame, fmt: str, sheet_name: str = "Données",
+                      index: bool = False, digest: Optional[str] = None) -> Optional[Path]:
+    """
+    Renvoie le fichier d'un export déjà produit pour ce contenu, sans le produire.
+
+    Args:
+        df (pd.DataFrame): Le tableau exporté.
+        fmt (str): Format de l'export (csv ou xlsx).
+        sheet_name (str, optional): Nom de la feuille Excel. Defaults to "Données".
+        index (bool, optional): Exporter aussi l'index. Defaults to False.
+        digest (Optional[str], optional): frame_digest(df, index) déjà calculé. Defaults to None.
+
+    Returns:
+        Optional[Path]: Le fichier, ou None s'il n'existe pas encore.
+    """
+    path = _export_path(export_key(df, fmt, sheet_name, index, digest), fmt)
+    if not path.exists():
+        return None
+    # La date de modification sert d'ordre LRU sur disque
+    os.utime(path)
+    return path
+
+
+def _write_csv(df: pd.DataFrame, path: Path, index: bool) -> None:
+    df.to_csv(path, index=index, encoding='utf-8', chunksize=EXPORT_CONFIG.get("csv_chunk_rows", 10000))
+
+
+def _write_excel_constant_memory(df: pd.DataFrame, path: Path, sheet_name: str, index: bool) -> None:
+    """Écrit le classeur ligne par ligne : XlsxWriter envoie chaque ligne terminée sur disque."""
+    if index:
+        df = df.reset_index()
+    workbook = xlsxwriter.Workbook(str(path), {'constant_memory': True})
+    try:
+        worksheet = workbook.add_worksheet(sheet_name[:31])
+        worksheet.write_row(0, 0, [str(column) for column in df.columns], workbook.add_format({'bold': True}))
+        chunk_rows = EXPORT_CONFIG.get("csv_chunk_rows", 10000)
+        row_number = 1
+        for start in range(0, len(df), chunk_rows):
+            # Valeurs manquantes en cellules vides (XlsxWriter refuse NaN)
+            chunk = df.iloc[start:start + chunk_rows].astype(object)
+            chunk = chunk.where(chunk.notna(), None)
+            for row in chunk.itertuples(index=False, name=None):
+                worksheet.write_row(row_number, 0, row)
+                row_number += 1
+    finally:
+        workbook.close()
+
+
+def _write_excel(df: pd.DataFrame, path: Path, sheet_name: str, index: bool) -> None:
+    if xlsxwriter is not None and len(df) >= EXPORT_CONFIG.get("constant_memory_rows", 5000):
+        _write_excel_constant_memory(df, path, sheet_name, index)
+    else:
+        df.to_excel(path, sheet_name=sheet_name[:31], index=index,
+                    engine='xlsxwriter' if xlsxwriter is not None else 'openpyxl')
+
+
+def _evict_exports(cache_dir: Path) -> None:
+    """Supprime les exports les moins récemment utilisés au-delà de la taille maximale."""
+    max_bytes = EXPORT_CONFIG.get("cache_disk_bytes", 200 * 1024 * 1024)
+    entries = []
+    total = 0
+    for path in cache_dir.iterdir():
+        if path.suffix == '.tmp' or not path.is_file():
+            continue
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+        total += stat.st_size
+
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+
+
+def export_frame(df: pd.DataFrame, fmt: str, sheet_name: str = "Données", index: bool = False,
+                 digest: Optional[str] = None) -> Path:
+    """
+    Produit l'export d'un tableau, ou renvoie celui déjà produit pour le même contenu.
+
+    Args:
+        df (pd.DataFrame): Le tableau à exporter.
+        fmt (str): Format de l'export (csv ou xlsx).
+        sheet_name (str, optional): Nom de la feuille Excel. Defaults to "Données".
+        index (bool, optional): Exporter aussi l'index. Defaults to False.
+        digest (Optional[str], optional): frame_digest(df, index) déjà calculé. Defaults to None.
+
+    Returns:
+        Path: Le fichier de l'export, à lire (ou à diffuser) par l'appelant.
+
+    Raises:
+        ValueError: Si le format n'est pas supporté.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Format d'export non supporté: {fmt}")
+
+    digest = digest or frame_digest(df, index)
+    cached = get_cached_export(df, fmt, sheet_name, index, digest)
+    if cached is not None:
+        return cached
+
+    path = _export_path(export_key(df, fmt, sheet_name, index, digest), fmt)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + f'.{threading.get_ident()}.tmp')
+    try:
+        if fmt == 'csv':
+            _write_csv(df, tmp_path, index)
+        else:
+            _write_excel(df, tmp_path, sheet_name, index)
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+    with _export_lock:
+        _evict_exports(path.parent)
+    return path
@@ -0,0 +1,136 @@
+"""
+Module de normalisation du texte des notes circulaires.
+
+Ce module fournit un normaliseur compilé une seule fois au chargement :
+une table de traduction (str.translate) pour les caractères typographiques
+des PDF français et une expression régulière combinée pour les espaces et
+sauts de ligne. Le texte n'est ainsi parcouru que deux fois, quelle que soit
+sa taille.
+"""
+
+import re
+import time
+from pathlib import Path
+from typing import Optional
+
+# Caractères remplacés par un équivalent ASCII
+_CHAR_REPLACEMENTS = {
+    # Espaces insécables et espaces fines (omniprésentes avant « : ; ? ! »)
+    '\u00a0': ' ',
+    '\u2007': ' ',
+    '\u2009': ' ',
+    '\u202f': ' ',
+    # Apostrophes et guillemets simples
+    '\u2018': "'",
+    '\u2019': "'",
+    '\u201a': "'",
+    '\u2032': "'",
+    # Guillemets doubles et guillemets français
+    '\u201c': '"',
+    '\u201d': '"',
+    '\u201e': '"',
+    '\u00ab': '"',
+    '\u00bb': '"',
+    # Tirets
+    '\u2010': '-',
+    '\u2011': '-',
+    '\u2012': '-',
+    '\u2013': '-',
+    '\u2014': '-',
+    '\u2212': '-',
+    # Points de suspension et ligatures typographiques
+    '\u2026': '...',
+    '\ufb01': 'fi',
+    '\ufb02': 'fl',
+}
+
+# Caractères supprimés : contrôles non imprimables, césures conditionnelles
+# et caractères de largeur nulle
+_DELETED_CHARS = (
+    [chr(c) for c in range(0x00, 0x09)]
+    + ['\x0b', '\x0c']
+    + [chr(c) for c in range(0x0e, 0x20)]
+    + [chr(c) for c in range(0x7f, 0xa0)]
+    + ['\u00ad', '\u200b', '\u200c', '\u200d', '\ufeff']
+)
+
+NORMALIZATION_TABLE = str.maketrans({
+    **_CHAR_REPLACEMENTS,
+    **{char: None for char in _DELETED_CHARS},
+})
+
+# Une seule passe pour les sauts de ligne multiples et les espaces multiples
+_WHITESPACE_RE = re.compile(r'(?P<newlines>\n{3,})|(?P<spaces> {2,})')
+
+
+def _collapse_whitespace(match: re.Match) -> str:
+    return '\n\n' if match.lastgroup == 'newlines' else ' '
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalise un texte issu d'une note circulaire (PDF ou saisie manuelle).
+
+    Args:
+        text (str): Le texte à normaliser.
+
+    Returns:
+        str: Le texte normalisé.
+    """
+    if not text:
+        return ""
+
+    text = text.translate(NORMALIZATION_TABLE)
+    text = _WHITESPACE_RE.sub(_collapse_whitespace, text)
+
+    return text.strip()
+
+
+def benchmark_normalizer(text: str, repeat: int = 20) -> dict:
+    """
+    Mesure le débit du normaliseur sur un texte donné.
+
+    Args:
+        text (str): Le texte de référence.
+        repeat (int, optional): Nombre d'exécutions. Defaults to 20.
+
+    Returns:
+        dict: Taille du texte, meilleur temps et débit en Mo/s.
+    """
+    size_mb = len(text.encode('utf-8')) / (1024 * 1024)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        normalize_text(text)
+        best = min(best, time.perf_counter() - start)
+
+    return {
+        'taille_mo': round(size_mb, 4),
+        'meilleur_temps_s': best,
+        'debit_mo_s': round(size_mb / best, 2) if best > 0 else float('inf'),
+    }
+
+
+def _load_sample_text(base_dir: Optional[Path] = None) -> str:
+    """Charge le texte brut de la circulaire d'exemple (PDF, sinon donnees.json)."""
+    base_dir = base_dir or Path(__file__).parent.parent
+    pdf_path = base_dir / "data" / "pdf_temp" / "Cir_2025_01_fr.pdf"
+    try:
+        from pdfminer.high_level import extract_text
+        return extract_text(str(pdf_path))
+    except Exception:
+        import json
+        with open(base_dir / "data" / "donnees.json", 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        notes = data.get("notes_circulaires", [])
+        return notes[0].get("contenu", "") if notes else ""
+
+
+if __name__ == "__main__":
+    sample = _load_sample_text()
+    # Répéter la circulaire pour obtenir un échantillon de l'ordre du Mo
+    sample = sample * max(1, (1024 * 1024) // max(len(sample), 1))
+    result = benchmark_normalizer(sample)
+    print(f"Taille: {result['taille_mo']} Mo - "
+          f"Temps: {result['meilleur_temps_s'] * 1000:.2f} ms - "
+          f"Débit: {result['debit_mo_s']} Mo/s")
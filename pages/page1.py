@@ -21,8 +21,13 @@ except Exception as e:
 
 # IMPORT DES MODULES UTILITAIRES
 try:
-    from utils.pdf_parser import extract_text_from_pdf
-    from utils.procedure_gen import generate_procedure_with_model, MODELS
+    from utils.pdf_worker import extract_text_isolated
+    from utils.bulk_ingest import ingest_pdfs, save_upload
+    from utils.text_normalizer import normalize_text
+    from models.config import DATA_FILE, MODELS, TEMP_PDF_DIR
+    from models.settings import ensure_storage
+    from utils.procedure_gen import generate_procedure_with_model
+    ensure_storage()
 except ImportError as e:
     st.error(f"Erreur d'importation des modules utilitaires: {e}")
     st.warning("Assurez-vous que les modules dans le dossier 'utils' sont correctement installés.")
@@ -45,7 +50,7 @@ def main():
         """
     )
 
-    tab1, tab2 = st.tabs(["Saisie Manuelle", "Téléverser un PDF"])
+    tab1, tab2, tab3 = st.tabs(["Saisie Manuelle", "Téléverser un PDF", "Import groupé"])
 
     # Onglet Saisie Manuelle
     with tab1:
@@ -59,10 +64,11 @@ def main():
         )
         if st.button("Enregistrer la Note Circulaire", key="save_manual_note"):
             if note_title and note_content:
+                note_content = normalize_text(note_content)
                 st.session_state.note_circulaire = note_content
                 st.session_state.note_title = note_title
                 # Sauvegarde
-                data_file = Path("data/donnees.json")
+                data_file = DATA_FILE
                 if data_file.exists():
                     with open(data_file, 'r', encoding='utf-8') as f:
                         data = json.load(f)
@@ -86,21 +92,23 @@ def main():
         pdf_title = st.text_input("Titre de la Note Circulaire", key="pdf_title_input")
         uploaded_file = st.file_uploader("Choisissez un fichier PDF", type="pdf")
         if uploaded_file:
-            pdf_dir = Path("data/pdf_temp")
-            pdf_dir.mkdir(parents=True, exist_ok=True)
-            pdf_path = pdf_dir / uploaded_file.name
-            with open(pdf_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
+            pdf_dir = TEMP_PDF_DIR
+            pdf_path = save_upload(uploaded_file.getbuffer(), pdf_dir)
             try:
                 st.write("Traitement du PDF en cours...")
-                pdf_text = extract_text_from_pdf(pdf_path)
+                progress_bar = st.progress(0)
+                pdf_text = extract_text_isolated(
+                    pdf_path,
+                    progress_callback=lambda pages, total: progress_bar.progress(min(pages / max(total, 1), 1.0))
+                )
+                progress_bar.empty()
                 with st.expander("Aperçu du contenu extrait"):
                     st.text_area("Contenu extrait du PDF", value=pdf_text, height=200, disabled=True)
                 if st.button("Confirmer et Enregistrer", key="save_pdf_note"):
                     if pdf_title:
                         st.session_state.note_circulaire = pdf_text
                         st.session_state.note_title = pdf_title
-                        data_file = Path("data/donnees.json")
+                        data_file = DATA_FILE
                         if data_file.exists():
                             with open(data_file, 'r', encoding='utf-8') as f:
                                 data = json.load(f)
@@ -121,6 +129,33 @@ def main():
             except Exception as e:
                 st.error(f"Erreur lors du traitement du PDF: {e}")
 
+    # Onglet Import groupé
+    with tab3:
+        st.subheader("Import groupé de Notes Circulaires en PDF")
+        uploaded_files = st.file_uploader("Choisissez des fichiers PDF", type="pdf", accept_multiple_files=True)
+        if uploaded_files and st.button("Importer les fichiers", key="bulk_import"):
+            pdf_dir = TEMP_PDF_DIR
+            # Fichiers nommés par empreinte : le nom d'origine ne sert qu'à l'affichage
+            upload_names = {}
+            for uploaded in uploaded_files:
+                upload_names.setdefault(str(save_upload(uploaded.getbuffer(), pdf_dir)), uploaded.name)
+            pdf_paths = [Path(path) for path in upload_names]
+
+            progress_bar = st.progress(0)
+            report = ingest_pdfs(
+                pdf_paths,
+                progress_callback=lambda done, total, entry: progress_bar.progress(done / total),
+                original_names=upload_names
+            )
+            progress_bar.empty()
+
+            st.success(f"{report['importes']} note(s) importée(s), {report['deja_importes']} déjà présente(s), "
+                       f"{report['doublons']} doublon(s), {report['erreurs']} erreur(s).")
+            st.write(f"{report['pages']} pages traitées en {report['duree_s']} s ({report['pages_par_s']} pages/s)")
+            for entry in report['details']:
+                if entry.get('erreur'):
+                    st.error(f"{upload_names.get(entry['fichier'], Path(entry['fichier']).name)} : {entry['erreur']}")
+
     # Bouton Générer Procédure
     st.divider()
     col1, col2, col3 = st.columns([1, 2, 1])
@@ -142,7 +177,7 @@ def main():
                     procedure = generate_procedure_with_model(st.session_state.note_circulaire, model_id)
                     st.session_state.procedure_generee = procedure
                     # Sauvegarde procédure
-                    data_file = Path("data/donnees.json")
+                    data_file = DATA_FILE
                     if data_file.exists():
                         with open(data_file, 'r', encoding='utf-8') as f:
                             data = json.load(f)
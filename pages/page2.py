@@ -19,7 +19,11 @@ if parent_dir not in sys.path:
 
 # IMPORT DES MODULES UTILITAIRES
 try:
-    from utils.procedure_gen import generate_procedure_with_model, init_vector_store, load_data, find_similar_notes, MODELS
+    from models.config import DATA_FILE, MODELS
+    from models.settings import ensure_storage
+    from utils.procedure_gen import generate_procedure_with_model, init_vector_store, load_data, find_similar_notes, extract_procedure_components
+    from utils.markdown_table import STEP_HEADERS, StreamingTableParser, parse_procedure_steps, render_rows, steps_to_records
+    ensure_storage()
 except ImportError as e:
     st.error(f"Erreur d'importation des modules utilitaires: {e}")
     st.warning("Assurez-vous que les modules dans le dossier 'utils' sont correctement installés.")
@@ -33,7 +37,7 @@ st.set_page_config(
 
 # FONCTION POUR SAUVEGARDER LES PROCÉDURES GÉNÉRÉES
 def save_procedure(procedure, model_id, note_title, similar_notes=None):
-    data_file = Path("data/donnees.json")
+    data_file = DATA_FILE
     try:
         # Charger les données existantes
         data = {}
@@ -47,30 +51,7 @@ def save_procedure(procedure, model_id, note_title, similar_notes=None):
             next_num = max([d.get("numero", 0) for d in data["dossiers"]], default=0) + 1
             
             # Extraire les étapes de la procédure (conversion du tableau markdown)
-            procedure_lines = procedure.strip().split('\n')
-            etapes = []
-            
-            # Ignorer les lignes d'en-tête et de séparation du tableau markdown
-            start_parsing = False
-            for line in procedure_lines:
-                line = line.strip()
-                if line.startswith('| ---'):
-                    start_parsing = True
-                    continue
-                
-                if start_parsing and line.startswith('|'):
-                    # Extraire les données de chaque colonne
-                    cols = [col.strip() for col in line.split('|')[1:-1]]
-                    if len(cols) >= 6:  # N°, Activités, Description, Acteurs, Documents, Applications
-                        etape = {
-                            "N°": cols[0], 
-                            "Activités": cols[1],
-                            "Description": cols[2],
-                            "Acteurs": cols[3],
-                            "Documents": cols[4],
-                            "Applications": cols[5]
-                        }
-                        etapes.append(etape)
+            etapes = steps_to_records(parse_procedure_steps(procedure))
             
             # Créer un nouveau dossier avec la note et sa procédure
             nouveau_dossier = {
@@ -178,7 +159,8 @@ def generate_procedure_rag(note_circulaire, model_id, api_key=None):
             similar_notes_info.append({
                 "id": note['id'],
                 "titre": note['titre'],
-                "score": note.get('score', 0)
+                "score": note.get('score', 0),
+                "articles": note.get('articles', '')
             })
         
         # Afficher les résultats de la recherche avec message explicite
@@ -207,6 +189,8 @@ def generate_procedure_rag(note_circulaire, model_id, api_key=None):
                     score_percent = f"{score * 100:.1f}%" if score else "N/A"
                     st.markdown(f"**Note #{i} - ID: {note['id']} - Similarité: {score_percent}**")
                     st.markdown(f"**Titre:** {note['titre']}")
+                    if note.get('articles'):
+                        st.markdown(f"**Articles:** {note['articles']}")
                     st.markdown("**Extrait:**")
                     st.text(note['content'][:200] + "..." if len(note['content']) > 200 else note['content'])
                     st.markdown("---")
@@ -223,8 +207,20 @@ def generate_procedure_rag(note_circulaire, model_id, api_key=None):
         # Générer la procédure avec le modèle et RAG
         with st.spinner(f"Génération de la procédure avec {MODELS[model_id]['name']}..."):
             try:
+                # Aperçu progressif du tableau des étapes pendant la génération
+                live_preview = st.empty()
+                live_parser = StreamingTableParser()
+                live_steps = []
+                
+                def show_progress(token):
+                    for event in live_parser.push(token):
+                        if event.kind == "etape":
+                            live_steps.append(event.data)
+                            live_preview.markdown(render_rows(STEP_HEADERS, live_steps))
+                
                 # Appeler la fonction de génération de procédure avec les paramètres appropriés
-                procedure = generate_procedure_with_model(query=note_circulaire, model_id=model_id, api_key=api_key)
+                procedure = generate_procedure_with_model(query=note_circulaire, model_id=model_id, api_key=api_key, on_token=show_progress)
+                live_preview.empty()
                 
                 # Enregistrer les infos sur les notes similaires dans l'état de session
                 st.session_state.similar_notes = similar_notes_found
@@ -236,191 +232,6 @@ def generate_procedure_rag(note_circulaire, model_id, api_key=None):
                 st.error(f"Erreur lors de la génération: {e}")
                 return None, []
 
-def extract_procedure_components(procedure_text):
-    """Extrait le tableau des étapes, le tableau I/O et les scénarios de la procédure"""
-    if not procedure_text:
-        return {"etapes": "", "io": "", "scenarios": "", "scenarios_ok": "", "scenarios_ko": ""}
-    
-    # Initialiser les composants
-    components = {
-        "etapes": "",
-        "io": "",
-        "scenarios": "",
-        "scenarios_ok": "",
-        "scenarios_ko": ""
-    }
-    
-    # Extraire les sections par analyse ligne par ligne
-    current_section = []
-    current_section_type = None
-    
-    lines = procedure_text.split("\n")
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
-        
-        # Détecter le début du tableau des étapes
-        if "| N°" in line or "| No." in line or "| Numéro" in line:
-            if current_section_type and current_section:
-                components[current_section_type] = "\n".join(current_section)
-            
-            current_section = [line]
-            current_section_type = "etapes"
-            i += 1
-            continue
-            
-        # Détecter le début du tableau I/O
-        if ("| Evènement" in line or "| Événement" in line or "| Entrée" in line) and "| Sortie" in line:
-            if current_section_type and current_section:
-                components[current_section_type] = "\n".join(current_section)
-            
-            current_section = [line]
-            current_section_type = "io"
-            i += 1
-            continue
-            
-        # Détecter le début des scénarios généraux
-        if ("# Scénarios" in line or "## Scénarios" in line) and not "OK" in line and not "KO" in line:
-            if current_section_type and current_section:
-                components[current_section_type] = "\n".join(current_section)
-            
-            current_section = [line]
-            current_section_type = "scenarios"
-            i += 1
-            continue
-            
-        # Détecter le début des scénarios OK
-        if ("# Scénario OK" in line or "## Scénario OK" in line or 
-            "# Scénarios OK" in line or "## Scénarios OK" in line or
-            "# Scénario nominal" in line or "## Scénario nominal" in line):
-            if current_section_type and current_section:
-                components[current_section_type] = "\n".join(current_section)
-            
-            current_section = [line]
-            current_section_type = "scenarios_ok"
-            i += 1
-            continue
-            
-        # Détecter le début des scénarios KO
-        if ("# Scénario KO" in line or "## Scénario KO" in line or 
-            "# Scénarios KO" in line or "## Scénarios KO" in line or
-            "# Scénario alternatif" in line or "## Scénario alternatif" in line):
-            if current_section_type and current_section:
-                components[current_section_type] = "\n".join(current_section)
-            
-            current_section = [line]
-            current_section_type = "scenarios_ko"
-            i += 1
-            continue
-        
-        # Si on est dans une section identifiée, ajouter la ligne
-        if current_section_type:
-            # Si on trouve un titre qui pourrait indiquer le début d'une nouvelle section
-            if (line.startswith("## ") or line.startswith("# ")) and len(current_section) > 0:
-                # Vérifier si c'est une section que nous traitons spécifiquement
-                if "Entrées/Sorties" in line or "I/O" in line:
-                    # Sauvegarder la section précédente
-                    if current_section_type and current_section:
-                        components[current_section_type] = "\n".join(current_section)
-                    # Commencer la nouvelle section I/O
-                    current_section = [line]
-                    current_section_type = "io"
-                elif "Scénario" in line and "OK" in line or "nominal" in line:
-                    # Sauvegarder la section précédente
-                    if current_section_type and current_section:
-                        components[current_section_type] = "\n".join(current_section)
-                    # Commencer la nouvelle section scénarios OK
-                    current_section = [line]
-                    current_section_type = "scenarios_ok"
-                elif "Scénario" in line and "KO" in line or "alternatif" in line:
-                    # Sauvegarder la section précédente
-                    if current_section_type and current_section:
-                        components[current_section_type] = "\n".join(current_section)
-                    # Commencer la nouvelle section scénarios KO
-                    current_section = [line]
-                    current_section_type = "scenarios_ko"
-                elif "Scénarios" in line and not "OK" in line and not "KO" in line:
-                    # Sauvegarder la section précédente
-                    if current_section_type and current_section:
-                        components[current_section_type] = "\n".join(current_section)
-                    # Commencer la nouvelle section scénarios généraux
-                    current_section = [line]
-                    current_section_type = "scenarios"
-                else:
-                    # C'est un autre type de titre dans la section courante
-                    current_section.append(line)
-            else:
-                # Ajouter la ligne à la section courante
-                current_section.append(line)
-        else:
-            # Si on n'est pas encore dans une section identifiée mais qu'on trouve un titre pertinent
-            if line.startswith("# ") or line.startswith("## "):
-                if "Étapes" in line or "Etapes" in line or "Procédure" in line:
-                    current_section = [line]
-                    current_section_type = "etapes"
-                elif "Entrées/Sorties" in line or "I/O" in line:
-                    current_section = [line]
-                    current_section_type = "io"
-                elif "Scénario" in line and "OK" in line:
-                    current_section = [line]
-                    current_section_type = "scenarios_ok"
-                elif "Scénario" in line and "KO" in line:
-                    current_section = [line]
-                    current_section_type = "scenarios_ko"
-                elif "Scénarios" in line:
-                    current_section = [line]
-                    current_section_type = "scenarios"
-        
-        i += 1
-    
-    # Sauvegarder la dernière section
-    if current_section_type and current_section:
-        components[current_section_type] = "\n".join(current_section)
-    
-    # S'assurer que le tableau des étapes a un format cohérent
-    if components["etapes"] and "| " in components["etapes"] and not "| ---" in components["etapes"]:
-        lines = components["etapes"].split("\n")
-        header_line_index = -1
-        
-        # Trouver la ligne d'en-tête du tableau
-        for idx, line in enumerate(lines):
-            if "| N°" in line or "| No." in line or "| Numéro" in line:
-                header_line_index = idx
-                break
-        
-        if header_line_index >= 0:
-            header_line = lines[header_line_index]
-            # Compter le nombre de colonnes
-            num_columns = header_line.count("|") - 1
-            separator_line = "| " + " --- |" * num_columns
-            
-            # Insérer la ligne de séparation après l'en-tête
-            lines.insert(header_line_index + 1, separator_line)
-            components["etapes"] = "\n".join(lines)
-    
-    # S'assurer que le tableau I/O a un format cohérent
-    if components["io"] and "| " in components["io"] and not "| ---" in components["io"]:
-        lines = components["io"].split("\n")
-        header_line_index = -1
-        
-        # Trouver la ligne d'en-tête du tableau
-        for idx, line in enumerate(lines):
-            if ("| Evènement" in line or "| Événement" in line or "| Entrée" in line) and "| Sortie" in line:
-                header_line_index = idx
-                break
-        
-        if header_line_index >= 0:
-            header_line = lines[header_line_index]
-            # Compter le nombre de colonnes
-            num_columns = header_line.count("|") - 1
-            separator_line = "| " + " --- |" * num_columns
-            
-            # Insérer la ligne de séparation après l'en-tête
-            lines.insert(header_line_index + 1, separator_line)
-            components["io"] = "\n".join(lines)
-    
-    return components
-
 # AFFICHAGE DE LA PAGE
 def main():
     st.title("🔄 Procédure Générée avec RAG")
@@ -9,7 +9,6 @@ import streamlit as st
 import json
 import sys
 from pathlib import Path
-import graphviz
 
 # AJOUTER LE RÉPERTOIRE PARENT AU PATH POUR IMPORTER LES MODULES UTILS
 parent_dir = Path(__file__).resolve().parent.parent
@@ -18,7 +17,10 @@ if str(parent_dir) not in sys.path:
 
 # IMPORT DES FONCTIONS UTILITAIRES
 try:
-    from utils.diagram_gen import extract_steps_from_procedure, generate_flowchart
+    from models.config import DATA_FILE
+    from models.settings import ensure_storage
+    from utils.diagram_gen import extract_steps_from_procedure, generate_flowchart, render_flowchart
+    ensure_storage()
 except ImportError as e:
     st.error(f"Erreur d'importation des modules utilitaires: {e}")
     st.warning("Assurez-vous que les modules dans le dossier 'utils' sont correctement installés.")
@@ -33,7 +35,7 @@ st.set_page_config(
 # FONCTION CHARGEMENT DE LA DERNIÈRE PROCÉDURE
 
 def load_last_procedure():
-    data_path = parent_dir / "data" / "donnees.json"
+    data_path = DATA_FILE
     if data_path.exists():
         try:
             with open(data_path, 'r', encoding='utf-8') as f:
@@ -81,7 +83,9 @@ def main():
                 activities, actors = extract_activities_and_actors(procedure_text)
                 if activities and actors:
                     st.subheader("Logigramme (vue alternative)")
-                    fig = draw_flowchart_matplotlib(activities, actors)
+                    # Une seule figure par session, vidée et redessinée à chaque rerun
+                    fig = draw_flowchart_matplotlib(activities, actors, st.session_state.get('flowchart_fig'))
+                    st.session_state['flowchart_fig'] = fig
                     st.pyplot(fig)
 
                 # Bouton de téléchargement
@@ -93,6 +97,21 @@ def main():
                     mime="text/plain",
                     use_container_width=True
                 )
+
+                # Export SVG : rendu côté serveur uniquement à la demande
+                if st.button("Préparer l'export SVG", use_container_width=True):
+                    try:
+                        svg_bytes, render_info = render_flowchart(steps, fmt='svg')
+                        st.caption(f"Rendu en {render_info['duree_s']} s")
+                        st.download_button(
+                            label="Télécharger le logigramme (SVG)",
+                            data=svg_bytes,
+                            file_name="logigramme.svg",
+                            mime="image/svg+xml",
+                            use_container_width=True
+                        )
+                    except (TimeoutError, RuntimeError) as e:
+                        st.error(f"Erreur lors du rendu du logigramme: {e}")
             else:
                 st.warning("Aucune étape n'a pu être extraite de la procédure. Veuillez vérifier le format.")
         except Exception as e:
@@ -17,7 +17,10 @@ if str(parent_dir) not in sys.path:
 
 # IMPORT DES FONCTIONS UTILITAIRES
 try:
-    from utils.chatbot import answer_question, initialize_chatbot
+    from utils.chatbot import answer_question, initialize_chatbot, invalidate_context
+    from models.config import CHATBOT_CONFIG, DATA_FILE
+    from models.settings import ensure_storage
+    ensure_storage()
 except ImportError as e:
     st.error(f"Erreur d'importation des modules utilitaires: {e}")
     st.warning("Assurez-vous que les modules dans le dossier 'utils' sont correctement installés.")
@@ -32,7 +35,7 @@ st.set_page_config(
 # CHARGEMENT DES DONNÉES DE CONTEXTE
 
 def load_context_data():
-    data_path = parent_dir / "data" / "donnees.json"
+    data_path = DATA_FILE
     context = {"note_circulaire": "", "procedure": ""}
     try:
         if data_path.exists():
@@ -41,7 +44,9 @@ def load_context_data():
             if data.get("notes_circulaires"):
                 context["note_circulaires"] = data["notes_circulaires"][-1].get("contenu", "")
             if data.get("procedures"):
-                context["procedure"] = data["procedures"][-1].get("contenu", "")
+                contenu = data["procedures"][-1].get("contenu", "")
+                # Procédure enregistrée en {"procedure", "io_table"} ou en texte
+                context["procedure"] = contenu.get("procedure", "") if isinstance(contenu, dict) else contenu
     except Exception as e:
         st.error(f"Erreur lors du chargement des données: {e}")
     return context
@@ -55,6 +60,16 @@ if 'context' not in st.session_state:
 
 # AFFICHAGE DE LA PAGE
 
+def show_sources(sources):
+    """Affiche les extraits cités par une réponse (numéro, document, articles, score)"""
+    if not sources:
+        return
+    with st.expander(f"Sources ({len(sources)})"):
+        for source in sources:
+            articles = f" - article(s) {', '.join(source['articles'])}" if source.get('articles') else ""
+            st.markdown(f"**[{source['numero']}] {source['titre']}**{articles} (score {source['score']})")
+            st.caption(source['contenu'][:500] + ("..." if len(source['contenu']) > 500 else ""))
+
 def main():
     st.title("Chatbot Questions-Réponses sur les Procédures")
     st.write("Posez vos questions sur les notes circulaires et procédures générées.")
@@ -75,6 +90,9 @@ def main():
                 height=200
             )
         if st.button("Mettre à jour le contexte"):
+            # Les réponses mises en cache pour l'ancien contexte ne sont plus valables
+            invalidate_context(st.session_state['context'])
+            st.session_state['context'] = dict(st.session_state['context'])
             st.session_state['context']['note_circulaires'] = note_text
             st.session_state['context']['procedure'] = proc_text
             initialize_chatbot(st.session_state['context'])
@@ -82,25 +100,39 @@ def main():
 
     # Affichage de la conversation
     st.subheader("Conversation")
-    chat_container = st.container()
     for msg in st.session_state['chat_history']:
         role = "Vous" if msg['role'] == 'user' else "Assistant"
         st.markdown(f"**{role}**: {msg['content']}")
+        show_sources(msg.get('sources'))
 
     # Entrée utilisateur
     st.subheader("Poser une question")
     user_question = st.text_input("Votre question:", key="input_question")
     if st.button("Envoyer") and user_question.strip():
-        st.session_state['chat_history'].append({"role": "user", "content": user_question})
+        history = st.session_state['chat_history']
+        
+        # Réponse affichée au fil de la génération
+        live_answer = st.empty()
+        tokens = []
+        
+        def show_progress(token):
+            tokens.append(token)
+            live_answer.markdown(f"**Assistant**: {''.join(tokens)}▌")
+        
         with st.spinner("Recherche d'une réponse..."):
-            response = answer_question(user_question, st.session_state['chat_history'])
-        st.session_state['chat_history'].append({"role": "assistant", "content": response})
-        st.experimental_rerun()
+            result = answer_question(user_question, history, st.session_state['context'], on_token=show_progress)
+        live_answer.empty()
+        
+        history.append({"role": "user", "content": user_question})
+        history.append({"role": "assistant", "content": result['reponse'], "sources": result['sources']})
+        # Mémoire bornée : seuls les derniers messages sont conservés
+        st.session_state['chat_history'] = history[-CHATBOT_CONFIG.get("max_history", 50):]
+        st.rerun()
 
     # Effacer l'historique
     if st.button("Effacer la conversation"):
         st.session_state['chat_history'] = []
-        st.experimental_rerun()
+        st.rerun()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
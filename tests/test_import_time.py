@@ -0,0 +1,19 @@
+"""Les modules légers ne doivent pas charger les dépendances lourdes à l'import (voir utils.import_benchmark)."""
+
+import pytest
+
+from utils.import_benchmark import DEFAULT_MODULES, run_benchmark
+
+
+@pytest.mark.parametrize("module", DEFAULT_MODULES)
+def test_import_does_not_load_heavy_dependencies(module):
+    result, = run_benchmark([module], repeat=1)
+
+    assert result['erreur'] is None
+    assert result['lourds'] == []
+
+
+def test_chatbot_import_does_not_load_numpy():
+    result, = run_benchmark(['utils.chatbot'], repeat=1)
+
+    assert not any(name.split('.')[0] == 'numpy' for name in result['modules'])
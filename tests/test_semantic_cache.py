@@ -0,0 +1,87 @@
+"""Tests du cache sémantique des réponses du chatbot (utils.semantic_cache)."""
+
+import sys
+import types
+
+import pytest
+
+from utils import chatbot
+from utils.chatbot import _normalize_question
+from utils.semantic_cache import SemanticCache, lexical_embedding
+
+
+def _cache():
+    return SemanticCache(embed=lexical_embedding, threshold=0.9, max_items=16)
+
+
+@pytest.mark.parametrize("affirmative, negated", [
+    ("Le crédit est-il accordé ?", "Le crédit n'est-il pas accordé ?"),
+    ("Délai de traitement avec garantie ?", "Délai de traitement sans garantie ?"),
+    ("Faut-il une signature et un visa ?", "Ni signature ni visa ?"),
+])
+def test_negated_question_does_not_reuse_affirmative_answer(affirmative, negated):
+    cache = _cache()
+    cache.put("contexte", _normalize_question(affirmative), {"reponse": "oui"})
+
+    assert cache.get("contexte", _normalize_question(negated)) is None
+
+
+def test_reworded_question_reuses_answer():
+    cache = _cache()
+    cache.put("contexte", _normalize_question("Quels sont les délais ?"), {"reponse": "30 jours"})
+
+    value, similarity = cache.get("contexte", _normalize_question("Quel délai ?"))
+    assert value == {"reponse": "30 jours"}
+    assert similarity >= 0.9
+
+
+class _FakeLLM:
+    """Modèle factice : compte les appels et renvoie une réponse citant la source [1]."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        return types.SimpleNamespace(content=f"Réponse {self.calls} [1]")
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    llm = _FakeLLM()
+    procedure_gen = types.ModuleType("utils.procedure_gen")
+    procedure_gen.TokenStreamHandler = lambda on_token: None
+    procedure_gen.init_llm = lambda *args, **kwargs: llm
+    monkeypatch.setitem(sys.modules, "utils.procedure_gen", procedure_gen)
+    monkeypatch.setattr(chatbot, "_archive_passages", lambda question, k: [])
+    monkeypatch.setattr(chatbot, "_answer_cache", _cache())
+    return llm
+
+
+CONTEXT = {"note_circulaires": "Article 1 : Les délais de traitement sont de 30 jours.", "procedure": ""}
+
+
+def _turn(history, question):
+    result = chatbot.answer_question(question, history, CONTEXT)
+    history += [{"role": "user", "content": question}, {"role": "assistant", "content": result["reponse"]}]
+    return result
+
+
+def test_reworded_question_hits_cache_on_second_turn(fake_llm):
+    history = []
+    first = _turn(history, "Quels sont les délais ?")
+    second = _turn(history, "Quel délai ?")
+
+    assert fake_llm.calls == 1
+    assert second["cache"] and second["reponse"] == first["reponse"]
+
+
+def test_follow_up_question_is_keyed_by_previous_question(fake_llm):
+    history = []
+    _turn(history, "Quels sont les délais ?")
+    _turn(history, "Et ce délai ?")
+    other_history = [{"role": "user", "content": "Quelles sont les pièces à fournir ?"}]
+    follow_up = chatbot.answer_question("Et ce délai ?", other_history, CONTEXT)
+
+    assert not follow_up["cache"]
+    assert fake_llm.calls == 3
@@ -0,0 +1,112 @@
+"""
+Module de découpage des notes circulaires en chunks pour la base vectorielle.
+
+Le découpage suit la structure de la circulaire (voir circular_segmenter) :
+chaque intitulé (visas, dispositif, titre, chapitre, article, annexe) est une
+frontière de découpage. Les unités consécutives sont regroupées tant que le
+chunk reste sous la taille cible, et les unités trop longues sont coupées aux
+limites de paragraphe, sans recouvrement. Chaque chunk conserve ses positions
+dans le texte et les numéros d'articles qu'il couvre.
+"""
+
+from typing import Dict, List, Tuple
+
+from models.config import CHUNKING_CONFIG
+from utils.circular_segmenter import segment_circular, iter_spans
+
+# Tailles des chunks (en caractères, section [chunking] des paramètres)
+CHUNK_MIN_CHARS = CHUNKING_CONFIG["min_chars"]
+CHUNK_TARGET_CHARS = CHUNKING_CONFIG["target_chars"]
+CHUNK_MAX_CHARS = CHUNKING_CONFIG["max_chars"]
+
+# Types de segments qui ouvrent une nouvelle unité de découpage
+_BOUNDARY_TYPES = ('preambule', 'visas', 'dispositif', 'titre', 'chapitre', 'section', 'article', 'annexe')
+
+# Séparateurs utilisés pour couper une unité trop longue, du plus au moins structurant
+_SPLIT_SEPARATORS = ('\n\n', '\n', '. ')
+
+
+def _structural_units(text: str) -> List[Tuple[int, int, str]]:
+    """Partitionne le texte en unités (début, fin, numéro d'article ou "")."""
+    tree = segment_circular(text)
+    starts = {0: ""}
+    for span in iter_spans(tree):
+        if span['type'] in _BOUNDARY_TYPES:
+            starts[span['debut']] = span['numero'] if span['type'] == 'article' else ""
+
+    positions = sorted(starts)
+    units = []
+    for i, start in enumerate(positions):
+        end = positions[i + 1] if i + 1 < len(positions) else len(text)
+        if text[start:end].strip():
+            units.append((start, end, starts[start]))
+    return units
+
+
+def _split_long_unit(text: str, start: int, end: int, max_chars: int) -> List[Tuple[int, int]]:
+    """Coupe [start, end) en morceaux <= max_chars aux limites de paragraphe, puis de ligne, puis de phrase."""
+    pieces = []
+    while end - start > max_chars:
+        cut = -1
+        for separator in _SPLIT_SEPARATORS:
+            position = text.rfind(separator, start + 1, start + max_chars)
+            if position != -1:
+                cut = position + len(separator)
+                break
+        if cut == -1:
+            cut = start + max_chars
+        pieces.append((start, cut))
+        start = cut
+    pieces.append((start, end))
+    return pieces
+
+
+def chunk_circular(text: str,
+                   min_chars: int = CHUNK_MIN_CHARS,
+                   target_chars: int = CHUNK_TARGET_CHARS,
+                   max_chars: int = CHUNK_MAX_CHARS) -> List[Dict]:
+    """
+    Découpe une note circulaire en chunks alignés sur ses articles.
+
+    Args:
+        text (str): Le texte de la note circulaire.
+        min_chars (int, optional): Taille en dessous de laquelle un chunk est
+            toujours fusionné avec l'unité suivante. Defaults to CHUNK_MIN_CHARS.
+        target_chars (int, optional): Taille jusqu'à laquelle les unités
+            consécutives sont regroupées. Defaults to CHUNK_TARGET_CHARS.
+        max_chars (int, optional): Taille maximale d'un chunk. Defaults to CHUNK_MAX_CHARS.
+
+    Returns:
+        List[Dict]: Liste de chunks {"texte", "debut", "fin", "articles"},
+            où "articles" est la liste des numéros d'articles couverts.
+    """
+    if not text or not text.strip():
+        return []
+
+    chunks = []
+    current = None
+
+    def flush():
+        if current and text[current['debut']:current['fin']].strip():
+            current['texte'] = text[current['debut']:current['fin']].strip()
+            chunks.append(current)
+
+    for start, end, article in _structural_units(text):
+        for piece_start, piece_end in _split_long_unit(text, start, end, max_chars):
+            if current is not None:
+                merged_size = piece_end - current['debut']
+                short = current['fin'] - current['debut'] < min_chars
+                merge = merged_size <= max_chars and (short or merged_size <= target_chars)
+            else:
+                merge = False
+
+            if merge:
+                current['fin'] = piece_end
+            else:
+                flush()
+                current = {'debut': piece_start, 'fin': piece_end, 'articles': []}
+            if article and article not in current['articles']:
+                current['articles'].append(article)
+    flush()
+
+    return chunks
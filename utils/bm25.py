@@ -0,0 +1,155 @@
+"""
+Module de recherche lexicale BM25 sur des passages en français.
+
+Les textes sont découpés en termes par une expression compilée une seule
+fois, puis :
+    - les mots vides du français sont retirés ;
+    - chaque mot est ramené à sa racine par une racinisation légère (suffixes
+      flexionnels et dérivationnels courants : "vérifications", "vérifier" et
+      "vérifiée" donnent "verifi") ;
+    - les accents sont retirés après la racinisation.
+
+BM25Index construit l'index inversé (terme -> passages et fréquences) une
+seule fois ; une recherche ne parcourt que les listes des termes de la
+question et renvoie les k meilleurs passages avec leur score.
+"""
+
+import heapq
+import math
+import re
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from models.config import CHATBOT_CONFIG
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Mots vides du français (et mots interrogatifs, sans intérêt pour la recherche)
+FRENCH_STOPWORDS = frozenset("""
+a à afin ai aie aient aies ait alors as au aucun aucune aupres auquel aura aurai auraient aurais aurait auras
+aurez auriez aurons auront aussi autre autres aux auxquelles auxquels avaient avais avait avant avec avez aviez
+avions avoir avons ayant ayez ayons c ça ce ceci cela celle celles celui cependant certains ces cet cette ceux
+chacun chaque ci comme comment d dans de des desquelles desquels dès donc dont du duquel elle elles en encore
+entre es est et étaient étais était étant été être eu eue eues eûmes eurent eus eut eux fait faut fois font
+furent fut ici il ils j je jusqu l la laquelle le lequel les lesquelles lesquels leur leurs lors lui m ma mais
+me même mêmes mes moi mon n ne ni nos notre nous on ont ou où par parce pas pendant peu peut peuvent plus pour
+pourquoi qu quand que quel quelle quelles quels qui quoi sa sans se selon sera serai seraient serais serait
+seras serez seriez serons seront ses si sien soi soient sois soit sommes son sont sous suis sur t ta tandis te
+tel telle telles tels tes toi ton toujours tous tout toute toutes très tu un une vers vos votre vous y
+""".split())
+
+# Suffixes retirés (suffixe, remplacement), du plus long au plus court ; le premier applicable l'emporte
+_SUFFIXES = (
+    ('issements', ''), ('issement', ''), ('ications', 'i'), ('ication', 'i'),
+    ('atrices', ''), ('atrice', ''), ('ateurs', ''), ('ateur', ''),
+    ('ements', ''), ('ement', ''), ('ations', ''), ('ation', ''), ('itions', ''), ('ition', ''),
+    ('ances', ''), ('ance', ''), ('ences', ''), ('ence', ''), ('ismes', ''), ('isme', ''),
+    ('istes', ''), ('iste', ''), ('ables', ''), ('able', ''), ('euses', ''), ('euse', ''),
+    ('ments', ''), ('ment', ''), ('eurs', ''), ('eur', ''), ('ives', ''), ('ive', ''),
+    ('ités', ''), ('ité', ''), ('ées', ''), ('ée', ''), ('ifs', ''), ('if', ''),
+    ('aux', 'al'), ('ers', ''), ('er', ''), ('és', ''), ('é', ''), ('es', ''), ('e', ''),
+    ('s', ''), ('x', ''),
+)
+
+# Longueur minimale de la racine après retrait d'un suffixe
+_MIN_STEM_LENGTH = 3
+
+
+def _strip_accents(word: str) -> str:
+    decomposed = unicodedata.normalize('NFKD', word)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+@lru_cache(maxsize=16384)
+def stem(word: str) -> str:
+    """
+    Ramène un mot (en minuscules) à sa racine, sans accents.
+
+    Args:
+        word (str): Le mot.
+
+    Returns:
+        str: La racine.
+    """
+    for suffix, replacement in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= _MIN_STEM_LENGTH:
+            word = word[:-len(suffix)] + replacement
+            break
+    return _strip_accents(word)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Découpe un texte en termes indexables (minuscules, sans mots vides, racinisés).
+
+    Args:
+        text (str): Le texte.
+
+    Returns:
+        List[str]: Les termes, dans l'ordre du texte.
+    """
+    return [stem(word) for word in _TOKEN_RE.findall(text.lower()) if word not in FRENCH_STOPWORDS]
+
+
+class BM25Index:
+    """Index inversé de passages, interrogé avec le score BM25."""
+
+    def __init__(self, documents: Sequence[str], k1: Optional[float] = None, b: Optional[float] = None):
+        """
+        Args:
+            documents (Sequence[str]): Les textes des passages (l'identifiant d'un passage est sa position).
+            k1 (Optional[float], optional): Saturation de la fréquence des termes.
+                Defaults to CHATBOT_CONFIG["bm25_k1"].
+            b (Optional[float], optional): Normalisation par la longueur des passages.
+                Defaults to CHATBOT_CONFIG["bm25_b"].
+        """
+        self.k1 = k1 if k1 is not None else CHATBOT_CONFIG.get("bm25_k1", 1.5)
+        self.b = b if b is not None else CHATBOT_CONFIG.get("bm25_b", 0.75)
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.lengths: List[int] = []
+
+        for doc_id, text in enumerate(documents):
+            terms = Counter(tokenize(text or ""))
+            self.lengths.append(sum(terms.values()))
+            for term, frequency in terms.items():
+                self.postings.setdefault(term, []).append((doc_id, frequency))
+
+        count = len(self.lengths)
+        self.average_length = (sum(self.lengths) / count) if count else 0.0
+        self.idf = {
+            term: math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def search(self, query: str, top_k: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        Renvoie les passages les plus pertinents pour une requête.
+
+        Args:
+            query (str): La requête (question en langage naturel).
+            top_k (Optional[int], optional): Nombre de passages. Defaults to CHATBOT_CONFIG["top_k"].
+
+        Returns:
+            List[Tuple[int, float]]: Couples (identifiant du passage, score) par score décroissant ;
+                seuls les passages contenant au moins un terme de la requête sont renvoyés.
+        """
+        top_k = top_k or CHATBOT_CONFIG.get("top_k", 5)
+        if not self.lengths:
+            return []
+
+        scores = {}
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = self.idf[term]
+            for doc_id, frequency in docs:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / self.average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
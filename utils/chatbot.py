@@ -1,24 +1,71 @@
 
+import hashlib
 import json
 import os
 import re
+import threading
+import unicodedata
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
 
+from models.config import CHATBOT_CONFIG, DATA_FILE
+from utils.article_chunker import chunk_circular
+from utils.bm25 import BM25Index
+from utils.markdown_table import parse_procedure_steps
+from utils.semantic_cache import SemanticCache, lexical_embedding
+
+# Modèle Groq utilisé par défaut pour les réponses (voir models.config.MODELS)
+DEFAULT_CHAT_MODEL = CHATBOT_CONFIG["model"]
+
+# Consignes du modèle : répondre uniquement à partir des extraits, en les citant
+CHAT_PROMPT = """Tu es un assistant spécialisé dans les notes circulaires bancaires et les procédures qui en découlent.
+Réponds à la question en français, uniquement à partir des extraits numérotés ci-dessous.
+Cite chaque information avec le numéro de son extrait entre crochets, par exemple [2], et mentionne l'article
+lorsqu'il est indiqué. Si les extraits ne permettent pas de répondre, dis-le clairement sans inventer.
+
+EXTRAITS :
+{extraits}
+
+HISTORIQUE RÉCENT DE LA CONVERSATION :
+{historique}
+
+QUESTION : {question}
+
+RÉPONSE :"""
+
+_CITATION_RE = re.compile(r'\[(\d+)\]')
+_QUESTION_SEPARATOR_RE = re.compile(r'[\W_]+')
+
 class CirculaireQABot:
     """
     Classe pour gérer un chatbot de questions-réponses basé sur des notes circulaires et procédures.
     """
     
-    def __init__(self, data_path="data/donnees.json"):
+    def __init__(self, data_path=None):
         """
         Initialise le chatbot avec les données des notes circulaires et procédures.
         
         Args:
-            data_path (str): Chemin vers le fichier JSON contenant les données
+            data_path (str, optional): Chemin vers le fichier JSON des données (par défaut DATA_FILE)
         """
-        self.data_path = data_path
+        self.data_path = str(data_path or DATA_FILE)
         self.data = self._load_data()
         self.current_context = None
+        self._passages = []
+        self._index = None
+        
+        # Index par identifiant (accès en O(1)) et contextes déjà indexés (LRU)
+        self._circulaires = {c.get("id"): c for c in self.data.get("circulaires", [])}
+        self._procedures = {p.get("id"): p for p in self.data.get("procedures", [])}
+        self._contexts = OrderedDict()
+        self._lock = threading.RLock()
+        
+        # Sauvegarde différée : les ajouts faits dans un bloc batch() sont écrits une seule fois
+        self._batch_depth = 0
+        self._dirty = False
     
     def _load_data(self):
         """Charge les données depuis le fichier JSON"""
@@ -33,38 +80,146 @@ class CirculaireQABot:
             return {"circulaires": [], "procedures": []}
     
     def save_data(self):
-        """Sauvegarde les données dans le fichier JSON"""
-        os.makedirs(os.path.dirname(self.data_path), exist_ok=True)
+        """Sauvegarde les données dans le fichier JSON (fichier temporaire puis renommage)"""
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.data_path) or ".", exist_ok=True)
+                tmp_path = f"{self.data_path}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.data, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.data_path)
+                self._dirty = False
+            except Exception as e:
+                print(f"Erreur lors de la sauvegarde des données: {e}")
+    
+    @contextmanager
+    def batch(self):
+        """
+        Regroupe plusieurs ajouts en une seule écriture du fichier JSON
+        
+        Exemple:
+            with bot.batch():
+                for titre, contenu in notes:
+                    bot.add_circulaire(titre, contenu)
+        """
+        with self._lock:
+            self._batch_depth += 1
         try:
-            with open(self.data_path, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"Erreur lors de la sauvegarde des données: {e}")
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0 and self._dirty:
+                    self.save_data()
+    
+    def _mark_dirty(self):
+        """Enregistre les données, ou diffère l'écriture jusqu'à la fin du bloc batch() en cours"""
+        with self._lock:
+            self._dirty = True
+            if self._batch_depth == 0:
+                self.save_data()
+    
+    def _new_id(self, prefix, existing):
+        """Génère un identifiant unique, qui ne dépend pas du nombre de documents (pas de collision après suppression)"""
+        while True:
+            new_id = f"{prefix}_{uuid.uuid4().hex[:12]}"
+            if new_id not in existing:
+                return new_id
+    
+    def _get_context(self, circulaire_id=None, procedure_id=None):
+        """
+        Renvoie le contexte indexé (passages et index BM25) d'un couple circulaire/procédure
+        
+        Les contextes sont conservés en mémoire (LRU, CHATBOT_CONFIG["context_cache_size"]) :
+        revenir à un document déjà consulté ne reconstruit pas son index.
+        
+        Args:
+            circulaire_id (str): ID de la note circulaire
+            procedure_id (str): ID de la procédure
+            
+        Returns:
+            dict: {"contexte", "passages", "index"}, ou None si aucun document n'est trouvé
+        """
+        key = (circulaire_id, procedure_id)
+        with self._lock:
+            entry = self._contexts.get(key)
+            if entry is not None:
+                self._contexts.move_to_end(key)
+                return entry
+            
+            context = {}
+            if circulaire_id in self._circulaires:
+                context["circulaire"] = self._circulaires[circulaire_id]
+            if procedure_id in self._procedures:
+                context["procedure"] = self._procedures[procedure_id]
+            if not context:
+                return None
+        
+        passages = self._build_passages(context)
+        entry = {
+            "contexte": context,
+            "passages": passages,
+            "index": BM25Index([passage["contenu"] for passage in passages]) if passages else None
+        }
+        
+        with self._lock:
+            self._contexts[key] = entry
+            while len(self._contexts) > CHATBOT_CONFIG.get("context_cache_size", 16):
+                self._contexts.popitem(last=False)
+        return entry
     
     def set_context(self, circulaire_id=None, procedure_id=None):
         """
         Définit le contexte actuel pour les questions
         
+        Avec une instance partagée entre sessions (get_chatbot), préférer passer
+        les identifiants à answer_question plutôt que de modifier le contexte actuel.
+        
         Args:
             circulaire_id (str): ID de la note circulaire
             procedure_id (str): ID de la procédure
         """
-        context = {}
+        entry = self._get_context(circulaire_id, procedure_id)
         
-        if circulaire_id:
-            for circ in self.data.get("circulaires", []):
-                if circ.get("id") == circulaire_id:
-                    context["circulaire"] = circ
-                    break
+        if entry is None:
+            self.current_context, self._passages, self._index = None, [], None
+        else:
+            self.current_context, self._passages, self._index = entry["contexte"], entry["passages"], entry["index"]
+        return bool(self.current_context)
+    
+    @staticmethod
+    def _build_passages(context):
+        """
+        Découpe les documents d'un contexte en passages à indexer
         
-        if procedure_id:
-            for proc in self.data.get("procedures", []):
-                if proc.get("id") == procedure_id:
-                    context["procedure"] = proc
-                    break
+        La circulaire est découpée selon ses articles (voir article_chunker),
+        la procédure en une entrée par étape.
+        """
+        passages = []
         
-        self.current_context = context if context else None
-        return bool(self.current_context)
+        if "circulaire" in context:
+            circulaire = context["circulaire"]
+            for chunk in chunk_circular(circulaire.get("contenu", "")):
+                passages.append({
+                    "source": "circulaire",
+                    "titre": circulaire.get("titre", ""),
+                    "contenu": chunk["texte"],
+                    "articles": chunk["articles"]
+                })
+        
+        if "procedure" in context:
+            procedure = context["procedure"]
+            for etape in procedure.get("etapes", []):
+                description = etape.get("description", "")
+                if description:
+                    passages.append({
+                        "source": "procedure",
+                        "titre": procedure.get("titre", ""),
+                        "contenu": description,
+                        "articles": []
+                    })
+        
+        return passages
     
     def get_available_documents(self):
         """
@@ -74,92 +229,55 @@ class CirculaireQABot:
             dict: Liste des documents disponibles
         """
         circulaires = [{"id": c.get("id"), "titre": c.get("titre")} 
-                      for c in self.data.get("circulaires", [])]
+                      for c in self._circulaires.values()]
         
         procedures = [{"id": p.get("id"), "titre": p.get("titre")} 
-                     for p in self.data.get("procedures", [])]
+                     for p in self._procedures.values()]
         
         return {
             "circulaires": circulaires,
             "procedures": procedures
         }
     
-    def _search_keywords(self, text, keywords):
-        """
-        Recherche des mots-clés dans un texte
-        
-        Args:
-            text (str): Texte à analyser
-            keywords (list): Liste des mots-clés à rechercher
-            
-        Returns:
-            bool: True si au moins un mot-clé est trouvé
-        """
-        if not text or not keywords:
-            return False
-            
-        text_lower = text.lower()
-        return any(kw.lower() in text_lower for kw in keywords)
-    
-    def _find_relevant_sections(self, question):
+    def _find_relevant_sections(self, question, top_k=None, entry=None):
         """
-        Trouve les sections pertinentes dans le contexte actuel
+        Trouve les passages les plus pertinents d'un contexte (score BM25)
         
         Args:
             question (str): Question posée
+            top_k (int): Nombre maximal de passages (par défaut CHATBOT_CONFIG["top_k"])
+            entry (dict): Contexte indexé renvoyé par _get_context (par défaut le contexte actuel)
             
         Returns:
-            list: Liste des sections pertinentes
+            list: Passages triés par score décroissant, chacun avec son "score"
         """
-        if not self.current_context:
+        if entry is not None:
+            passages, index = entry["passages"], entry["index"]
+        elif self.current_context:
+            passages, index = self._passages, self._index
+        else:
             return []
-            
-        # Extraire les mots-clés de la question (mots de plus de 3 lettres)
-        keywords = [word for word in re.findall(r'\b\w+\b', question.lower()) 
-                   if len(word) > 3 and word not in {"quoi", "comment", "pourquoi", "quel", "quelle", "quels", "quelles"}]
-        
-        relevant_sections = []
-        
-        # Rechercher dans la circulaire
-        if "circulaire" in self.current_context:
-            circulaire = self.current_context["circulaire"]
-            content = circulaire.get("contenu", "")
-            
-            # Division en sections (paragraphes)
-            sections = [s.strip() for s in content.split('\n\n') if s.strip()]
-            
-            for section in sections:
-                if self._search_keywords(section, keywords):
-                    relevant_sections.append({
-                        "source": "circulaire",
-                        "titre": circulaire.get("titre", ""),
-                        "contenu": section
-                    })
         
-        # Rechercher dans la procédure
-        if "procedure" in self.current_context:
-            procedure = self.current_context["procedure"]
-            
-            # Rechercher dans les étapes
-            for etape in procedure.get("etapes", []):
-                if self._search_keywords(etape.get("description", ""), keywords):
-                    relevant_sections.append({
-                        "source": "procedure",
-                        "titre": procedure.get("titre", ""),
-                        "contenu": etape.get("description", "")
-                    })
+        if index is None:
+            return []
         
-        return relevant_sections
+        return [
+            {**passages[passage_id], "score": round(score, 3)}
+            for passage_id, score in index.search(question, top_k)
+        ]
     
-    def answer_question(self, question):
+    def answer_question(self, question, top_k=None, circulaire_id=None, procedure_id=None):
         """
-        Répond à une question basée sur le contexte actuel
+        Répond à une question basée sur le contexte actuel, ou sur les documents indiqués
         
         Args:
             question (str): Question posée
+            top_k (int): Nombre maximal de passages (par défaut CHATBOT_CONFIG["top_k"])
+            circulaire_id (str): ID de la note circulaire (sans modifier le contexte actuel)
+            procedure_id (str): ID de la procédure (sans modifier le contexte actuel)
             
         Returns:
-            dict: Réponse avec source et contenu
+            dict: Réponse (passages les plus pertinents) avec leurs sources et scores
         """
         if not question.strip():
             return {
@@ -167,13 +285,24 @@ class CirculaireQABot:
                 "sources": []
             }
         
-        if not self.current_context:
+        entry = None
+        if circulaire_id or procedure_id:
+            # Un document demandé mais absent ne doit pas faire répondre sur le contexte actuel
+            missing = ((circulaire_id and circulaire_id not in self._circulaires)
+                       or (procedure_id and procedure_id not in self._procedures))
+            entry = None if missing else self._get_context(circulaire_id, procedure_id)
+            if entry is None:
+                return {
+                    "reponse": "Document introuvable. Veuillez choisir une note circulaire ou une procédure existante.",
+                    "sources": []
+                }
+        elif not self.current_context:
             return {
                 "reponse": "Aucun contexte sélectionné. Veuillez choisir une note circulaire ou une procédure.",
                 "sources": []
             }
         
-        relevant_sections = self._find_relevant_sections(question)
+        relevant_sections = self._find_relevant_sections(question, top_k or CHATBOT_CONFIG.get("top_k", 5), entry)
         
         if not relevant_sections:
             return {
@@ -181,19 +310,16 @@ class CirculaireQABot:
                 "sources": []
             }
         
-        # Construction de la réponse à partir des sections pertinentes
-        combined_answer = ""
-        sources = []
-        
-        for section in relevant_sections:
-            combined_answer += section["contenu"] + " "
-            sources.append({
-                "type": section["source"],
-                "titre": section["titre"]
-            })
+        # Construction de la réponse à partir des passages, du plus pertinent au moins pertinent
+        sources = [{
+            "type": section["source"],
+            "titre": section["titre"],
+            "articles": section["articles"],
+            "score": section["score"]
+        } for section in relevant_sections]
         
         return {
-            "reponse": combined_answer.strip(),
+            "reponse": "\n\n".join(section["contenu"] for section in relevant_sections),
             "sources": sources
         }
     
@@ -208,19 +334,18 @@ class CirculaireQABot:
         Returns:
             str: ID de la note circulaire ajoutée
         """
-        circulaire_id = f"circ_{len(self.data.get('circulaires', []))}"
-        
-        circulaire = {
-            "id": circulaire_id,
-            "titre": titre,
-            "contenu": contenu
-        }
-        
-        if "circulaires" not in self.data:
-            self.data["circulaires"] = []
+        with self._lock:
+            circulaire_id = self._new_id("circ", self._circulaires)
             
-        self.data["circulaires"].append(circulaire)
-        self.save_data()
+            circulaire = {
+                "id": circulaire_id,
+                "titre": titre,
+                "contenu": contenu
+            }
+            
+            self.data.setdefault("circulaires", []).append(circulaire)
+            self._circulaires[circulaire_id] = circulaire
+            self._mark_dirty()
         
         return circulaire_id
     
@@ -236,19 +361,349 @@ class CirculaireQABot:
         Returns:
             str: ID de la procédure ajoutée
         """
-        procedure_id = f"proc_{len(self.data.get('procedures', []))}"
+        with self._lock:
+            procedure_id = self._new_id("proc", self._procedures)
+            
+            procedure = {
+                "id": procedure_id,
+                "titre": titre,
+                "description": description,
+                "etapes": etapes
+            }
+            
+            self.data.setdefault("procedures", []).append(procedure)
+            self._procedures[procedure_id] = procedure
+            self._mark_dirty()
         
-        procedure = {
-            "id": procedure_id,
-            "titre": titre,
-            "description": description,
-            "etapes": etapes
+        return procedure_id
+
+
+_chatbot_factory = None
+_chatbot_factory_lock = threading.Lock()
+
+
+def _create_chatbot(data_path):
+    return CirculaireQABot(data_path)
+
+
+def get_chatbot(data_path=None):
+    """
+    Renvoie l'instance du chatbot partagée par le processus
+    
+    Dans Streamlit, l'instance est mise en cache avec st.cache_resource : les
+    données et les index ne sont chargés qu'une fois par serveur, et non à
+    chaque session. Hors Streamlit, une instance est conservée par fichier.
+    
+    Args:
+        data_path (str, optional): Chemin vers le fichier JSON des données (par défaut DATA_FILE)
+        
+    Returns:
+        CirculaireQABot: Le chatbot partagé
+    """
+    global _chatbot_factory
+    with _chatbot_factory_lock:
+        if _chatbot_factory is None:
+            try:
+                import streamlit as st
+                _chatbot_factory = st.cache_resource(show_spinner=False)(_create_chatbot)
+            except ImportError:
+                _chatbot_factory = lru_cache(maxsize=None)(_create_chatbot)
+    return _chatbot_factory(str(data_path or DATA_FILE))
+
+
+# --- Chatbot RAG (réponses générées par le LLM, citant leurs sources) ---
+
+_contexts = OrderedDict()
+_rag_lock = threading.Lock()
+
+
+def _context_key(context):
+    """Empreinte du contexte (textes de la note circulaire et de la procédure)"""
+    payload = json.dumps(context or {}, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _normalize_question(question):
+    """Question normalisée pour le cache : minuscules, sans accents ni ponctuation"""
+    decomposed = unicodedata.normalize('NFKD', question.casefold())
+    ascii_question = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return _QUESTION_SEPARATOR_RE.sub(' ', ascii_question).strip()
+
+
+# Mots (normalisés) qui renvoient à un échange précédent : "et celle-ci ?", "le même délai ?"
+_REFERENCE_WORDS = frozenset({
+    'ca', 'cela', 'ceci', 'celui', 'celle', 'celles', 'ceux', 'ci', 'lui', 'leur', 'leurs',
+    'meme', 'memes', 'precedent', 'precedente', 'precedents', 'precedentes'
+})
+
+
+def _history_variant(normalized_question, history):
+    """
+    Variante de cache d'une question : vide si elle se comprend seule, sinon empreinte de la
+    dernière question de l'utilisateur, à laquelle elle renvoie
+    """
+    words = normalized_question.split()
+    if not words or (words[0] != 'et' and _REFERENCE_WORDS.isdisjoint(words)):
+        return ""
+    previous = next((message.get('content', '') for message in reversed(history or [])
+                     if message.get('role') == 'user'), None)
+    if previous is None:
+        return ""
+    return hashlib.sha256(_normalize_question(previous).encode('utf-8')).hexdigest()
+
+
+@lru_cache(maxsize=1)
+def _question_embedder():
+    """Modèle d'embedding de la base vectorielle, ou sac de termes haché s'il est indisponible (choisi une fois)"""
+    embeddings = getattr(_get_vectorstore(), "embeddings", None)
+    return embeddings.embed_query if embeddings is not None else lexical_embedding
+
+
+def _embed_question(question):
+    return _question_embedder()(question)
+
+
+# Réponses du modèle, réutilisées pour les questions proches d'un même contexte
+_answer_cache = SemanticCache(embed=_embed_question)
+
+
+def _remember(cache, key, value, max_items):
+    with _rag_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > max_items:
+            cache.popitem(last=False)
+
+
+def _context_passages(context):
+    """
+    Découpe les textes du contexte en passages citables
+    
+    La note circulaire est découpée selon ses articles ; la procédure en une
+    entrée par étape de son tableau (ou selon ses paragraphes à défaut de tableau).
+    """
+    passages = []
+    
+    note = context.get("note_circulaires") or context.get("note_circulaire") or ""
+    for chunk in chunk_circular(note):
+        passages.append({
+            "type": "circulaire",
+            "titre": "Note circulaire",
+            "contenu": chunk["texte"],
+            "articles": chunk["articles"]
+        })
+    
+    procedure = context.get("procedure") or ""
+    if isinstance(procedure, dict):
+        procedure = procedure.get("procedure", "")
+    steps = parse_procedure_steps(procedure)
+    if steps:
+        for step in steps:
+            passages.append({
+                "type": "procedure",
+                "titre": f"Procédure - étape {step.numero}",
+                "contenu": " - ".join(part for part in (step.activite, step.description, step.acteurs) if part),
+                "articles": []
+            })
+    else:
+        for chunk in chunk_circular(procedure):
+            passages.append({"type": "procedure", "titre": "Procédure", "contenu": chunk["texte"], "articles": []})
+    
+    return passages
+
+
+def initialize_chatbot(context):
+    """
+    Prépare le contexte du chatbot : passages et index BM25, construits une fois par contenu
+    
+    Les contextes indexés sont partagés par toutes les sessions du processus
+    (cache LRU par empreinte du contenu, CHATBOT_CONFIG["context_cache_size"]).
+    
+    Args:
+        context (dict): {"note_circulaires": texte de la note, "procedure": texte de la procédure}
+        
+    Returns:
+        dict: {"cle", "passages", "index"}
+    """
+    key = _context_key(context)
+    with _rag_lock:
+        entry = _contexts.get(key)
+        if entry is not None:
+            _contexts.move_to_end(key)
+            return entry
+    
+    passages = _context_passages(context or {})
+    entry = {
+        "cle": key,
+        "passages": passages,
+        "index": BM25Index([passage["contenu"] for passage in passages]) if passages else None
+    }
+    _remember(_contexts, key, entry, CHATBOT_CONFIG.get("context_cache_size", 16))
+    return entry
+
+
+@lru_cache(maxsize=1)
+def _get_vectorstore():
+    """Base vectorielle des notes archivées (utils.procedure_gen), chargée une fois par processus"""
+    try:
+        from utils.procedure_gen import init_vector_store
+        return init_vector_store()
+    except Exception as e:
+        print(f"Base vectorielle indisponible pour le chatbot: {e}")
+        return None
+
+
+def _archive_passages(question, k):
+    """Passages des notes archivées les plus proches de la question (recherche vectorielle)"""
+    if k <= 0:
+        return []
+    vectorstore = _get_vectorstore()
+    if vectorstore is None:
+        return []
+    try:
+        results = vectorstore.similarity_search_with_score(question, k=k)
+    except Exception as e:
+        print(f"Erreur lors de la recherche vectorielle: {e}")
+        return []
+    return [{
+        "type": "archive",
+        "titre": doc.metadata.get("nom", "Note archivée"),
+        "contenu": doc.page_content,
+        "articles": [a.strip() for a in doc.metadata.get("articles", "").split(",") if a.strip()],
+        "score": round(1.0 - min(score, 1.0), 3)
+    } for doc, score in results]
+
+
+def _bounded_history(history):
+    """Derniers messages de la conversation (CHATBOT_CONFIG["max_history"]), dans la limite de history_chars"""
+    max_messages = CHATBOT_CONFIG.get("max_history", 50)
+    budget = CHATBOT_CONFIG.get("history_chars", 4000)
+    lines = []
+    for message in reversed((history or [])[-max_messages:]):
+        role = "Utilisateur" if message.get("role") == "user" else "Assistant"
+        line = f"{role} : {message.get('content', '')}"
+        if len(line) > budget:
+            break
+        budget -= len(line)
+        lines.append(line)
+    return "\n".join(reversed(lines)) or "(aucun)"
+
+
+def _format_source(numero, passage):
+    articles = f", article(s) {', '.join(passage['articles'])}" if passage["articles"] else ""
+    return f"[{numero}] {passage['titre']}{articles} :\n{passage['contenu']}"
+
+
+def _extractive_answer(sources):
+    """Réponse sans LLM : les passages les plus pertinents, avec leur numéro de source"""
+    return "\n\n".join(f"[{source['numero']}] {source['contenu']}" for source in sources)
+
+
+def answer_question(question, history=None, context=None, on_token=None, model_id=None, api_key=None):
+    """
+    Répond à une question par génération augmentée (RAG) sur le contexte, en citant les extraits utilisés
+    
+    Les passages du contexte sont retrouvés par BM25, complétés par les notes
+    archivées les plus proches (base vectorielle) ; le modèle Groq reçoit ces
+    extraits numérotés et l'historique récent, et doit citer ses sources ([n]).
+    Les réponses du modèle sont mises en cache par contexte : une question proche d'une
+    question déjà posée (similarité cosinus >= CHATBOT_CONFIG["semantic_threshold"])
+    réutilise la réponse stockée (voir utils.semantic_cache), y compris plus loin dans
+    la même conversation. Seule une question qui renvoie à l'échange précédent ("et
+    celle-ci ?") est mise en cache avec la dernière question de l'utilisateur.
+    Sans clé API, la réponse est composée des passages les plus pertinents.
+    
+    Args:
+        question (str): Question posée
+        history (list): Messages précédents [{"role": "user"|"assistant", "content"}]
+        context (dict): Contexte passé à initialize_chatbot
+        on_token (callable): Fonction appelée avec chaque token généré (affichage progressif)
+        model_id (str): Modèle Groq (par défaut DEFAULT_CHAT_MODEL)
+        api_key (str): Clé API Groq (par défaut la variable d'environnement GROQ_API_KEY)
+        
+    Returns:
+        dict: {"reponse", "sources": [{"numero", "type", "titre", "articles", "score", "contenu"}], "cache"},
+            plus "similarite" lorsque la réponse vient du cache
+    """
+    question = (question or "").strip()
+    if not question:
+        return {"reponse": "Veuillez poser une question.", "sources": [], "cache": False}
+    
+    entry = initialize_chatbot(context)
+    normalized_question = _normalize_question(question)
+    history_text = _bounded_history(history)
+    history_key = _history_variant(normalized_question, history)
+    cached = _answer_cache.get(entry["cle"], normalized_question, history_key)
+    if cached is not None:
+        result, similarity = cached
+        if on_token:
+            on_token(result["reponse"])
+        return {**result, "cache": True, "similarite": round(similarity, 3)}
+    
+    top_k = CHATBOT_CONFIG.get("top_k", 5)
+    passages = []
+    if entry["index"] is not None:
+        passages = [{**entry["passages"][passage_id], "score": round(score, 3)}
+                    for passage_id, score in entry["index"].search(question, top_k)]
+    
+    try:
+        from utils.procedure_gen import TokenStreamHandler, init_llm
+        llm = init_llm(model_id or DEFAULT_CHAT_MODEL, api_key,
+                       callbacks=[TokenStreamHandler(on_token)] if on_token else None)
+    except ImportError as e:
+        print(f"Client Groq indisponible, réponse extractive: {e}")
+        llm = None
+    if llm is not None:
+        passages += _archive_passages(question, CHATBOT_CONFIG.get("archive_k", 2))
+    
+    if not passages:
+        return {
+            "reponse": "Je n'ai pas trouvé d'information pertinente pour votre question dans le contexte actuel.",
+            "sources": [],
+            "cache": False
         }
+    
+    sources = [{"numero": numero, **passage} for numero, passage in enumerate(passages, start=1)]
+    
+    if llm is None:
+        answer = _extractive_answer(sources)
+        if on_token:
+            on_token(answer)
+    else:
+        prompt = CHAT_PROMPT.format(
+            extraits="\n\n".join(_format_source(source["numero"], source) for source in sources),
+            historique=history_text,
+            question=question
+        )
+        try:
+            answer = llm.invoke(prompt).content.strip()
+        except Exception as e:
+            print(f"Erreur lors de la génération de la réponse: {e}")
+            return {"reponse": f"Erreur lors de la génération de la réponse : {e}", "sources": [], "cache": False}
         
-        if "procedures" not in self.data:
-            self.data["procedures"] = []
-            
-        self.data["procedures"].append(procedure)
-        self.save_data()
+        # Seules les sources effectivement citées sont renvoyées (toutes si aucune citation)
+        cited = {int(numero) for numero in _CITATION_RE.findall(answer)}
+        if cited & {source["numero"] for source in sources}:
+            sources = [source for source in sources if source["numero"] in cited]
+    
+    result = {"reponse": answer, "sources": sources}
+    if llm is not None:
+        # Les réponses extractives ne sont pas conservées : elles ne coûtent rien à recalculer
+        _answer_cache.put(entry["cle"], normalized_question, result, history_key)
+    return {**result, "cache": False}
+
+
+def invalidate_context(context):
+    """
+    Oublie un contexte modifié : son index et les réponses mises en cache pour lui
+    
+    Args:
+        context (dict): L'ancien contexte (avant modification de la note ou de la procédure)
         
-        return procedure_id
\ No newline at end of file
+    Returns:
+        int: Nombre de réponses supprimées du cache
+    """
+    key = _context_key(context)
+    with _rag_lock:
+        _contexts.pop(key, None)
+    return _answer_cache.invalidate(key)
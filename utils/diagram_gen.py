@@ -2,12 +2,18 @@
 Module de génération de logigrammes à partir de procédures textuelles structurées (tableaux Markdown)
 """
 
-import re
-import graphviz
-import matplotlib.pyplot as plt
-import networkx as nx
-import textwrap
-from matplotlib.patches import Ellipse, Rectangle
+from utils.graphviz_render import render_graph
+from utils.label_layout import wrap_label
+from utils.lazy_import import lazy_import
+from utils.markdown_table import parse_procedure_steps
+
+# Bibliothèques de rendu importées au premier dessin (voir utils.lazy_import) : Matplotlib
+# n'est chargé que pour la vue alternative, Graphviz que pour le logigramme principal
+graphviz = lazy_import("graphviz")
+np = lazy_import("numpy")
+mpl_collections = lazy_import("matplotlib.collections")
+mpl_colors = lazy_import("matplotlib.colors")
+mpl_figure = lazy_import("matplotlib.figure")
 
 sizing = {
     'node_width': 1.5,
@@ -20,66 +26,93 @@ sizing = {
 
 def extract_activities_and_actors(procedure_text):
     activities, actors = [], []
-    lines = procedure_text.split('\n')
-    data_lines = [l for l in lines if re.match(r"^\|\s*\d+\s*\|", l)]
-    for line in data_lines:
-        cols = line.strip().split('|')
-        if len(cols) >= 6:
-            act = cols[2].strip().strip('*')
-            actr = cols[4].split(',')[0].strip().strip('*')
-            activities.append(act)
-            actors.append(actr)
+    for step in parse_procedure_steps(procedure_text):
+        # Seules les étapes numérotées sont dessinées
+        if step.numero.isdigit():
+            activities.append(step.activite)
+            actors.append(step.acteurs.split(',')[0].strip())
     return activities, actors
 
-def draw_flowchart_matplotlib(activities, actors):
+def draw_flowchart_matplotlib(activities, actors, fig=None):
+    """
+    Dessine le logigramme (entrée, activités, acteurs, sortie) avec matplotlib
+    
+    Les formes et les flèches sont regroupées en collections (une par type) au lieu
+    d'un patch et d'une annotation par nœud, ce qui garde le rendu rapide sur les
+    longues procédures.
+    
+    Args:
+        activities (list): Les activités, dans l'ordre
+        actors (list): L'acteur principal de chaque activité
+        fig (matplotlib.figure.Figure, optional): Figure à réutiliser (vidée avant le dessin)
+        
+    Returns:
+        matplotlib.figure.Figure: La figure du logigramme
+    """
     n = len(activities)
-    G = nx.DiGraph()
-    for i in range(1, n+1):
-        G.add_edge(f"A{i}", f"P{i}")
-        if i == 1:
-            G.add_edge("Entrée", f"A{i}")
-        else:
-            G.add_edge(f"A{i-1}", f"A{i}")
-        if i == n:
-            G.add_edge(f"A{i}", "Sortie")
-    pos = {}
-    for i in range(1, n+1):
-        y = n + 1 - i
-        pos[f"A{i}"] = (sizing['x_activity'], y)
-        pos[f"P{i}"] = (sizing['x_actor'], y)
-    pos['Entrée'] = (sizing['x_activity'], n+1)
-    pos['Sortie'] = (sizing['x_activity'], 0)
-    fig, ax = plt.subplots(figsize=(8, n * 1.5 + 3))
-    ax.set_xlim(sizing['x_activity'] - sizing['node_width'] - 1,
-                sizing['x_actor'] + sizing['node_width'] + 1)
-    ax.set_ylim(-1, n+2)
-    for label in ['Entrée', 'Sortie']:
-        x, y = pos[label]
-        rect = Rectangle((x - sizing['io_width']/2, y - sizing['io_height']/2),
-                         sizing['io_width'], sizing['io_height'], facecolor='#aed6f1')
-        ax.add_patch(rect)
-        ax.text(x, y, label, ha='center', va='center', fontsize=10)
-    for i, act in enumerate(activities, start=1):
-        x, y = pos[f"A{i}"]
-        e = Ellipse((x, y), width=sizing['node_width'], height=sizing['node_height'],
-                    facecolor='#5dade2', alpha=0.9)
-        ax.add_patch(e)
-        wrapped = textwrap.fill(act, width=20)
-        ax.text(x, y, wrapped, ha='center', va='center', fontsize=9)
-    for i, actr in enumerate(actors, start=1):
-        x, y = pos[f"P{i}"]
-        rect = Rectangle((x - sizing['node_width']/2, y - sizing['node_height']/2),
-                         sizing['node_width'], sizing['node_height'], facecolor='#52be80', alpha=0.9)
-        ax.add_patch(rect)
-        wrapped = textwrap.fill(actr, width=20)
-        ax.text(x, y, wrapped, ha='center', va='center', fontsize=9)
-    for u, v in G.edges():
-        x1, y1 = pos[u]
-        x2, y2 = pos[v]
-        ax.annotate('', xy=(x2, y2), xytext=(x1, y1),
-                    arrowprops=dict(arrowstyle='->', lw=1.2, color='gray'))
+    width, height = sizing['node_width'], sizing['node_height']
+    io_width, io_height = sizing['io_width'], sizing['io_height']
+    x_act, x_actor = sizing['x_activity'], sizing['x_actor']
+    
+    # Positions : activités en colonne, de haut en bas, entre l'entrée et la sortie
+    y_steps = np.arange(n, 0, -1, dtype=float)
+    
+    # Figure hors de pyplot : pas de registre global, donc pas de fuite à chaque rerun
+    if fig is None:
+        fig = mpl_figure.Figure()
+    else:
+        fig.clear()
+    fig.set_size_inches(8, n * 1.5 + 3)
+    ax = fig.add_subplot()
+    ax.set_xlim(x_act - width - 1, x_actor + width + 1)
+    ax.set_ylim(-1, n + 2)
+    
+    # Rectangles (entrée, sortie, acteurs) : sommets calculés en une fois
+    centers = np.column_stack((
+        np.concatenate(([x_act, x_act], np.full(n, x_actor))),
+        np.concatenate(([n + 1, 0], y_steps))
+    ))
+    half_sizes = np.array([[io_width / 2, io_height / 2]] * 2 + [[width / 2, height / 2]] * n)
+    corners = np.array([[-1, -1], [1, -1], [1, 1], [-1, 1]])
+    vertices = centers[:, None, :] + corners[None, :, :] * half_sizes[:, None, :]
+    facecolors = ['#aed6f1'] * 2 + [mpl_colors.to_rgba('#52be80', 0.9)] * n
+    ax.add_collection(mpl_collections.PolyCollection(vertices, facecolors=facecolors))
+    
+    # Ellipses des activités
+    if n:
+        ax.add_collection(mpl_collections.EllipseCollection(
+            np.full(n, width), np.full(n, height), np.zeros(n), units='xy',
+            offsets=np.column_stack((np.full(n, x_act), y_steps)), offset_transform=ax.transData,
+            facecolors=mpl_colors.to_rgba('#5dade2', 0.9)
+        ))
+    
+    # Flèches : entrée → A1 → ... → An → sortie (verticales) et Ai → acteur i (horizontales),
+    # raccourcies au bord des formes et tracées en un seul appel
+    y_chain = np.concatenate(([n + 1], y_steps, [0]))
+    top_gap = np.concatenate(([io_height / 2], np.full(n, height / 2)))
+    bottom_gap = np.concatenate((np.full(n, height / 2), [io_height / 2]))
+    starts = np.column_stack((
+        np.concatenate((np.full(n + 1, x_act), np.full(n, x_act + width / 2))),
+        np.concatenate((y_chain[:-1] - top_gap, y_steps))
+    ))
+    ends = np.column_stack((
+        np.concatenate((np.full(n + 1, x_act), np.full(n, x_actor - width / 2))),
+        np.concatenate((y_chain[1:] + bottom_gap, y_steps))
+    ))
+    deltas = ends - starts
+    ax.quiver(starts[:, 0], starts[:, 1], deltas[:, 0], deltas[:, 1],
+              angles='xy', scale_units='xy', scale=1, color='gray',
+              width=0.004, headwidth=4, headlength=5)
+    
+    # Libellés (matplotlib n'a pas de collection de textes)
+    for label, y in (('Entrée', n + 1), ('Sortie', 0)):
+        ax.text(x_act, y, label, ha='center', va='center', fontsize=10)
+    for act, actr, y in zip(activities, actors, y_steps):
+        ax.text(x_act, y, wrap_label(act, 20, '\n'), ha='center', va='center', fontsize=9)
+        ax.text(x_actor, y, wrap_label(actr, 20, '\n'), ha='center', va='center', fontsize=9)
+    
     ax.axis('off')
-    plt.tight_layout()
+    fig.tight_layout()
     return fig
 
 # Optionnel : pour compatibilité avec l'ancien code
@@ -114,6 +147,19 @@ def generate_flowchart(steps):
             graph.edge(node_id, 'end')
     return graph
 
+def render_flowchart(steps, fmt='svg'):
+    """
+    Rend le logigramme Graphviz hors du thread Streamlit (voir utils.graphviz_render)
+    
+    Args:
+        steps (list): Les étapes extraites de la procédure
+        fmt (str): Le format de sortie (svg, png, pdf)
+        
+    Returns:
+        tuple: (rendu en bytes, informations du rendu dont la durée)
+    """
+    return render_graph(generate_flowchart(steps), fmt=fmt)
+
 def get_flowchart_from_text(procedure_text):
     """
     Fonction principale pour générer un logigramme à partir d'un texte de procédure
@@ -0,0 +1,118 @@
+"""
+Module de mise en forme des libellés des logigrammes.
+
+Fournit, pour tous les types de nœuds (début, étapes, documents, acteurs, fin) :
+    - la détection des étapes de décision, par une expression compilée une
+      seule fois qui regroupe tous les mots-clés ;
+    - le retour à la ligne des libellés en une seule passe, la largeur de chaque
+      ligne étant mesurée avec les métriques de la police (Helvetica/Arial)
+      plutôt qu'en nombre de caractères.
+
+Les deux fonctions sont mémorisées par libellé : les reruns Streamlit et les
+nœuds répétés (acteurs, documents) ne refont pas le calcul.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+
+# Mots-clés signalant une étape de décision (losange)
+DECISION_KEYWORDS = ('décision', 'vérification', '?', 'si ', 'conditionnel', 'choix')
+
+_DECISION_RE = re.compile('|'.join(re.escape(keyword) for keyword in DECISION_KEYWORDS))
+
+# Largeurs des caractères Helvetica/Arial, en millièmes de cadratin (métriques AFM)
+_CHAR_WIDTHS = {
+    ' ': 278, '!': 278, '"': 355, '%': 889, '&': 667, "'": 191, '(': 333, ')': 333,
+    ',': 278, '-': 333, '.': 278, '/': 278, ':': 278, ';': 278, '?': 556, '°': 400,
+    'A': 667, 'B': 667, 'C': 722, 'D': 722, 'E': 667, 'F': 611, 'G': 778, 'H': 722,
+    'I': 278, 'J': 500, 'K': 667, 'L': 556, 'M': 833, 'N': 722, 'O': 778, 'P': 667,
+    'Q': 778, 'R': 722, 'S': 667, 'T': 611, 'U': 722, 'V': 667, 'W': 944, 'X': 667,
+    'Y': 667, 'Z': 611,
+    'a': 556, 'b': 556, 'c': 500, 'd': 556, 'e': 556, 'f': 278, 'g': 556, 'h': 556,
+    'i': 222, 'j': 222, 'k': 500, 'l': 222, 'm': 833, 'n': 556, 'o': 556, 'p': 556,
+    'q': 556, 'r': 333, 's': 500, 't': 278, 'u': 556, 'v': 500, 'w': 722, 'x': 500,
+    'y': 500, 'z': 500,
+}
+_DEFAULT_CHAR_WIDTH = 556  # chiffres et caractères absents de la table
+
+# Largeur de référence d'un caractère : max_chars caractères "moyens" tiennent sur une ligne
+_REFERENCE_CHAR_WIDTH = _CHAR_WIDTHS['n']
+
+
+@lru_cache(maxsize=4096)
+def _char_width(char: str) -> int:
+    width = _CHAR_WIDTHS.get(char)
+    if width is None:
+        # Lettres accentuées : largeur de la lettre de base (é -> e)
+        base = unicodedata.normalize('NFD', char)[0]
+        width = _CHAR_WIDTHS.get(base, _DEFAULT_CHAR_WIDTH)
+    return width
+
+
+def text_width(text: str) -> int:
+    """
+    Mesure la largeur d'un texte avec les métriques de la police.
+
+    Args:
+        text (str): Le texte à mesurer.
+
+    Returns:
+        int: La largeur en millièmes de cadratin.
+    """
+    return sum(_char_width(char) for char in text)
+
+
+@lru_cache(maxsize=4096)
+def is_decision(activity: str) -> bool:
+    """
+    Indique si une activité est une étape de décision.
+
+    Args:
+        activity (str): Le libellé de l'activité.
+
+    Returns:
+        bool: True si le libellé contient un mot-clé de décision.
+    """
+    return _DECISION_RE.search(activity.lower()) is not None
+
+
+@lru_cache(maxsize=4096)
+def wrap_label(text: str, max_chars: int, separator: str = '\\n') -> str:
+    """
+    Coupe un libellé en lignes dont la largeur ne dépasse pas celle de max_chars caractères moyens.
+
+    Le découpage est glouton et linéaire : la largeur de la ligne courante est
+    tenue à jour mot par mot. Un mot plus large que la limite occupe sa propre ligne.
+
+    Args:
+        text (str): Le libellé.
+        max_chars (int): Largeur maximale d'une ligne, en caractères moyens.
+        separator (str, optional): Séparateur de lignes. Defaults to '\\n'
+            (retour à la ligne échappé des libellés Graphviz).
+
+    Returns:
+        str: Le libellé découpé.
+    """
+    max_width = max_chars * _REFERENCE_CHAR_WIDTH
+    if text_width(text) <= max_width:
+        return text
+
+    space_width = _char_width(' ')
+    lines = []
+    current = []
+    current_width = 0
+    for word in text.split():
+        word_width = text_width(word)
+        if current and current_width + space_width + word_width > max_width:
+            lines.append(' '.join(current))
+            current = []
+            current_width = 0
+        if current:
+            current_width += space_width
+        current.append(word)
+        current_width += word_width
+    if current:
+        lines.append(' '.join(current))
+
+    return separator.join(lines)
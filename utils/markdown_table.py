@@ -0,0 +1,488 @@
+"""
+Module d'analyse des tableaux Markdown produits par les modèles de langage.
+
+Tous les consommateurs du tableau de procédure (sauvegarde, découpage en
+composants, extraction des étapes pour les logigrammes, extraction des
+acteurs) passent par ce module : les lignes et les cellules sont découpées
+par des expressions régulières compilées une seule fois, les intitulés de
+colonnes sont ramenés à des clés canoniques ("numero", "activite",
+"acteurs"...) et le résultat est mémorisé par texte, de sorte qu'un même
+tableau n'est analysé qu'une fois par rendu de page.
+
+Les résultats sont des tuples immuables (NamedTuple) partagés entre les
+appelants : ils ne doivent pas être modifiés.
+
+StreamingTableParser applique les mêmes règles à un texte reçu par
+morceaux (génération en streaming) : chaque ligne d'étape, ligne I/O et
+ligne de scénario est émise dès que sa ligne est terminée.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+# Ligne de tableau : commence par "|" (indentation tolérée)
+_ROW_RE = re.compile(r'^[ \t]*\|(?P<cells>.*?)[ \t]*$')
+
+# Séparateur de cellules (les "\|" échappés ne séparent pas)
+_CELL_SPLIT_RE = re.compile(r'(?<!\\)\|')
+
+# Cellule de ligne de séparation : "---", ":---", "---:" ou ":---:"
+_SEPARATOR_CELL_RE = re.compile(r'^:?-{2,}:?$')
+
+# Cellule entièrement en gras ou en italique
+_EMPHASIS_RE = re.compile(r'^(?P<mark>\*{1,2}|_{1,2})(?P<inner>.+?)(?P=mark)$')
+
+# Séparateurs entre plusieurs acteurs d'une même cellule
+_ACTOR_SPLIT_RE = re.compile(r'[,;/]|\set\s')
+
+# Intitulés de colonnes reconnus, testés dans l'ordre sur l'intitulé
+# normalisé (minuscules, sans accents)
+_HEADER_ALIASES = [
+    ('numero', re.compile(r'^(?:n\s*°|n[o°]\.?|num(?:ero)?\.?|#|etapes?|steps?)$')),
+    ('description_processus', re.compile(r'description.*processus')),
+    ('processus', re.compile(r'processus')),
+    ('evenement', re.compile(r'evenement|event')),
+    ('entree', re.compile(r'^(?:entrees?|inputs?)$')),
+    ('sortie', re.compile(r'^(?:sorties?|outputs?)$')),
+    ('activite', re.compile(r'activit|^taches?$')),
+    ('description', re.compile(r'description|^actions?$|^quoi$')),
+    ('acteurs', re.compile(r'acteur|actor|responsable|intervenant|^qui$')),
+    ('documents', re.compile(r'document|^docs?$|support|formulaire')),
+    ('applications', re.compile(r'application|outil|logiciel|systeme')),
+]
+
+# Titres de sections Markdown et classification des scénarios
+_SECTION_HEADING_RE = re.compile(r'^#{1,6}[ \t]*(?P<titre>.+?)[ \t#]*$')
+_SCENARIO_RE = re.compile(r'sc[ée]nario', re.IGNORECASE)
+_SCENARIO_KO_RE = re.compile(r'\bKO\b|alternatif|[ée]chec', re.IGNORECASE)
+_SCENARIO_OK_RE = re.compile(r'\bOK\b|nominal|r[ée]ussi', re.IGNORECASE)
+_OTHER_SECTION_RE = re.compile(r'[ée]tapes|entr[ée]es\s*/\s*sorties|I/O', re.IGNORECASE)
+
+# En-têtes standard des tableaux générés
+STEP_HEADERS = ("N°", "Activités", "Description", "Acteurs", "Documents", "Applications")
+IO_HEADERS = ("Evènement", "Processus en interface", "Description du processus en interface")
+
+
+class MarkdownTable(NamedTuple):
+    """Tableau Markdown découpé en cellules."""
+    headers: Tuple[str, ...]            # intitulés tels qu'écrits
+    keys: Tuple[Optional[str], ...]     # clé canonique de chaque colonne (ou None)
+    rows: Tuple[Tuple[str, ...], ...]   # cellules des lignes de données
+    first_line: int                     # index de la ligne d'en-tête dans le texte
+    last_line: int                      # index de la dernière ligne du tableau
+
+    def column(self, key: str) -> Optional[int]:
+        """Renvoie l'index de la première colonne portant cette clé, ou None."""
+        try:
+            return self.keys.index(key)
+        except ValueError:
+            return None
+
+
+class ProcedureStep(NamedTuple):
+    """Ligne du tableau des étapes d'une procédure."""
+    numero: str
+    activite: str
+    description: str
+    acteurs: str
+    documents: str
+    applications: str
+
+    @property
+    def acteurs_list(self) -> List[str]:
+        """Acteurs de l'étape, séparés par virgule, point-virgule, "/" ou "et"."""
+        return split_actors(self.acteurs)
+
+
+class IOEvent(NamedTuple):
+    """Ligne du tableau des entrées/sorties."""
+    evenement: str
+    processus: str
+    description: str
+
+
+class TableEvent(NamedTuple):
+    """Élément émis par StreamingTableParser."""
+    kind: str                                   # "etape", "io", "scenarios", "scenarios_ok" ou "scenarios_ko"
+    data: Union[ProcedureStep, IOEvent, str]    # ligne typée, ou ligne de texte du scénario
+
+
+def _normalize_header(header: str) -> str:
+    header = unicodedata.normalize('NFKD', header.lower())
+    return ''.join(char for char in header if not unicodedata.combining(char))
+
+
+@lru_cache(maxsize=128)
+def header_key(header: str) -> Optional[str]:
+    """
+    Ramène un intitulé de colonne à sa clé canonique.
+
+    Args:
+        header (str): Intitulé tel qu'écrit dans le tableau ("N°", "Acteur(s)"...).
+
+    Returns:
+        Optional[str]: La clé canonique, ou None si l'intitulé n'est pas reconnu.
+    """
+    normalized = _normalize_header(header)
+    for key, pattern in _HEADER_ALIASES:
+        if pattern.search(normalized):
+            return key
+    return None
+
+
+def _clean_cell(cell: str) -> str:
+    cell = cell.strip().replace('\\|', '|')
+    match = _EMPHASIS_RE.match(cell)
+    return match.group('inner').strip() if match else cell
+
+
+def _split_cells(cells: str) -> Tuple[str, ...]:
+    parts = _CELL_SPLIT_RE.split(cells)
+    # Le "|" final ferme la ligne : il ne crée pas de cellule vide
+    if len(parts) > 1 and not parts[-1].strip():
+        parts.pop()
+    return tuple(_clean_cell(part) for part in parts)
+
+
+def _is_separator(cells: Tuple[str, ...]) -> bool:
+    return bool(cells) and all(_SEPARATOR_CELL_RE.match(cell.replace(' ', '')) for cell in cells)
+
+
+@lru_cache(maxsize=64)
+def parse_tables(text: str) -> Tuple[MarkdownTable, ...]:
+    """
+    Découpe tous les tableaux Markdown d'un texte.
+
+    Un tableau est une suite de lignes commençant par "|". Sa première ligne
+    est l'en-tête ; la ligne de séparation qui la suit est facultative.
+
+    Args:
+        text (str): Le texte contenant les tableaux.
+
+    Returns:
+        Tuple[MarkdownTable, ...]: Les tableaux, dans l'ordre du texte.
+    """
+    if not text:
+        return ()
+
+    tables = []
+    current = []
+
+    def close_table():
+        if not current:
+            return
+        header_index, headers = current[0]
+        rows = tuple(cells for _, cells in current[1:] if not _is_separator(cells) and any(cells))
+        tables.append(MarkdownTable(
+            headers=headers,
+            keys=tuple(header_key(header) for header in headers),
+            rows=rows,
+            first_line=header_index,
+            last_line=current[-1][0]
+        ))
+        current.clear()
+
+    for index, line in enumerate(text.split('\n')):
+        match = _ROW_RE.match(line)
+        if match:
+            cells = _split_cells(match.group('cells'))
+            # Une ligne de séparation isolée n'ouvre pas de tableau
+            if current or not _is_separator(cells):
+                current.append((index, cells))
+        else:
+            close_table()
+    close_table()
+
+    return tuple(tables)
+
+
+def classify_heading(line: str) -> Optional[str]:
+    """
+    Classe un titre Markdown de la procédure générée.
+
+    Args:
+        line (str): Une ligne du texte.
+
+    Returns:
+        Optional[str]: "scenarios", "scenarios_ok" ou "scenarios_ko" pour un titre de
+            scénario, "section" pour le titre d'une autre partie (étapes, entrées/sorties),
+            None pour une ligne ordinaire.
+    """
+    heading = _SECTION_HEADING_RE.match(line.strip())
+    if not heading:
+        return None
+    titre = heading.group('titre')
+    if _SCENARIO_RE.search(titre):
+        if _SCENARIO_KO_RE.search(titre):
+            return "scenarios_ko"
+        if _SCENARIO_OK_RE.search(titre):
+            return "scenarios_ok"
+        return "scenarios"
+    if _OTHER_SECTION_RE.search(titre):
+        return "section"
+    return None
+
+
+def _keys_are_steps(keys: Tuple[Optional[str], ...]) -> bool:
+    keys = set(keys)
+    return 'numero' in keys and bool(keys & {'activite', 'description'}) and not keys & {'evenement', 'processus'}
+
+
+def _keys_are_io(keys: Tuple[Optional[str], ...]) -> bool:
+    keys = set(keys)
+    return bool(keys & {'evenement', 'processus'}) or {'entree', 'sortie'} <= keys
+
+
+def _step_columns(keys: Tuple[Optional[str], ...]) -> List[Optional[int]]:
+    return [keys.index(key) if key in keys else None for key in ProcedureStep._fields]
+
+
+def _io_columns(keys: Tuple[Optional[str], ...]) -> List[int]:
+    # Colonnes non reconnues : évènement, processus puis description, dans l'ordre
+    return [keys.index(key) if key in keys else position
+            for position, key in enumerate(('evenement', 'processus', 'description_processus'))]
+
+
+def _is_steps_table(table: MarkdownTable) -> bool:
+    return _keys_are_steps(table.keys)
+
+
+def _is_io_table(table: MarkdownTable) -> bool:
+    return _keys_are_io(table.keys)
+
+
+def find_steps_table(text: str) -> Optional[MarkdownTable]:
+    """Renvoie le premier tableau d'étapes (colonne numéro et activité/description) du texte."""
+    return next((table for table in parse_tables(text) if _is_steps_table(table)), None)
+
+
+def find_io_table(text: str) -> Optional[MarkdownTable]:
+    """Renvoie le premier tableau des entrées/sorties du texte."""
+    return next((table for table in parse_tables(text) if _is_io_table(table)), None)
+
+
+def _cell(row: Tuple[str, ...], index: Optional[int]) -> str:
+    return row[index] if index is not None and index < len(row) else ""
+
+
+@lru_cache(maxsize=64)
+def parse_procedure_steps(text: str) -> Tuple[ProcedureStep, ...]:
+    """
+    Extrait les lignes du tableau des étapes d'une procédure.
+
+    Args:
+        text (str): Le texte de la procédure (tableau Markdown).
+
+    Returns:
+        Tuple[ProcedureStep, ...]: Les étapes, dans l'ordre du tableau.
+    """
+    table = find_steps_table(text)
+    if table is None:
+        return ()
+
+    columns = _step_columns(table.keys)
+    return tuple(
+        ProcedureStep(*(_cell(row, index) for index in columns))
+        for row in table.rows
+    )
+
+
+@lru_cache(maxsize=64)
+def parse_io_events(text: str) -> Tuple[IOEvent, ...]:
+    """
+    Extrait les lignes du tableau des entrées/sorties.
+
+    À défaut de tableau aux en-têtes d'entrées/sorties, le premier tableau qui
+    n'est pas un tableau d'étapes est retenu ; ses colonnes sont prises dans
+    l'ordre : la première est l'évènement, la deuxième le processus, la
+    troisième sa description.
+
+    Args:
+        text (str): Le texte contenant le tableau I/O.
+
+    Returns:
+        Tuple[IOEvent, ...]: Les évènements, dans l'ordre du tableau.
+    """
+    table = find_io_table(text)
+    if table is None:
+        # Le tableau des étapes d'une procédure n'est jamais lu comme tableau I/O
+        table = next((table for table in parse_tables(text) if not _is_steps_table(table)), None)
+        if table is None:
+            return ()
+
+    columns = _io_columns(table.keys)
+    return tuple(IOEvent(*(_cell(row, index) for index in columns)) for row in table.rows)
+
+
+def split_actors(acteurs: str) -> List[str]:
+    """
+    Sépare une cellule "Acteurs" en acteurs individuels.
+
+    Args:
+        acteurs (str): Contenu de la cellule.
+
+    Returns:
+        List[str]: Les acteurs non vides, dans l'ordre.
+    """
+    if not acteurs:
+        return []
+    return [acteur.strip() for acteur in _ACTOR_SPLIT_RE.split(acteurs) if acteur.strip()]
+
+
+def steps_to_records(steps: Tuple[ProcedureStep, ...]) -> List[Dict[str, str]]:
+    """
+    Convertit les étapes au format enregistré dans les dossiers (clés "N°", "Activités"...).
+
+    Args:
+        steps (Tuple[ProcedureStep, ...]): Les étapes.
+
+    Returns:
+        List[Dict[str, str]]: Une entrée par étape.
+    """
+    return [dict(zip(STEP_HEADERS, step)) for step in steps]
+
+
+def render_rows(headers: Tuple[str, ...], rows) -> str:
+    """
+    Écrit un tableau Markdown valide (en-tête, ligne de séparation, données).
+
+    Args:
+        headers (Tuple[str, ...]): Les en-têtes ; les lignes sont complétées ou
+            tronquées à leur nombre.
+        rows: Les lignes, chacune étant une suite de cellules (tuple, ProcedureStep...).
+
+    Returns:
+        str: Le tableau Markdown.
+    """
+    width = len(headers)
+    lines = [
+        "| " + " | ".join(headers) + " |",
+        "| " + " | ".join("---" for _ in headers) + " |",
+    ]
+    for row in rows:
+        cells = (tuple(cell.replace('|', '\\|') for cell in row) + ("",) * width)[:width]
+        lines.append("| " + " | ".join(cells) + " |")
+    return "\n".join(lines)
+
+
+def render_table(table: MarkdownTable, headers: Optional[Tuple[str, ...]] = None) -> str:
+    """
+    Réécrit un tableau en Markdown valide (en-tête, ligne de séparation, données).
+
+    Args:
+        table (MarkdownTable): Le tableau à réécrire.
+        headers (Optional[Tuple[str, ...]], optional): En-têtes à utiliser à la place
+            de ceux du tableau ; les lignes sont alors tronquées à leur nombre.
+
+    Returns:
+        str: Le tableau Markdown.
+    """
+    return render_rows(tuple(headers or table.headers), table.rows)
+
+
+class StreamingTableParser:
+    """
+    Analyseur incrémental de la procédure générée, alimenté par morceaux de texte.
+
+    Les règles sont celles de parse_procedure_steps, parse_io_events et
+    classify_heading : seul le premier tableau d'étapes et le premier tableau
+    I/O sont émis, et un scénario s'étend de son titre jusqu'au titre de
+    section ou au tableau suivant. Entre deux appels, l'analyseur ne conserve
+    que la ligne en cours et l'état du tableau ouvert.
+
+    Exemple :
+        parser = StreamingTableParser()
+        for delta in stream:
+            for event in parser.push(delta):
+                ...
+        events = parser.close()
+    """
+
+    def __init__(self):
+        self._pending = ""          # début de la ligne en cours
+        self._table = None          # "etapes", "io", "autre" ou None hors tableau
+        self._columns = None        # index des colonnes du tableau en cours
+        self._done = set()          # tableaux d'étapes / I/O déjà terminés
+        self._scenario = None       # type du scénario en cours
+
+    def push(self, delta: str) -> List[TableEvent]:
+        """
+        Ajoute un morceau de texte et renvoie les éléments des lignes terminées.
+
+        Args:
+            delta (str): Le morceau de texte reçu.
+
+        Returns:
+            List[TableEvent]: Les éléments émis, dans l'ordre du texte.
+        """
+        events = []
+        if '\n' not in delta:
+            self._pending += delta
+            return events
+
+        *lines, self._pending = (self._pending + delta).split('\n')
+        for line in lines:
+            self._feed_line(line, events)
+        return events
+
+    def close(self) -> List[TableEvent]:
+        """Termine l'analyse : traite la dernière ligne, même sans saut de ligne."""
+        events = []
+        if self._pending:
+            self._feed_line(self._pending, events)
+            self._pending = ""
+        self._end_table()
+        return events
+
+    def _end_table(self) -> None:
+        if self._table in ("etapes", "io"):
+            self._done.add(self._table)
+        self._table = None
+        self._columns = None
+
+    def _feed_line(self, line: str, events: List[TableEvent]) -> None:
+        match = _ROW_RE.match(line)
+        if not match:
+            self._end_table()
+            kind = classify_heading(line)
+            if kind == "section":
+                self._scenario = None
+            elif kind:
+                self._scenario = kind
+            if self._scenario and line.strip():
+                events.append(TableEvent(self._scenario, line.strip()))
+            return
+
+        cells = _split_cells(match.group('cells'))
+
+        # En-tête d'un nouveau tableau
+        if self._table is None:
+            if _is_separator(cells):
+                return
+            keys = tuple(header_key(header) for header in cells)
+            if _keys_are_steps(keys) and "etapes" not in self._done:
+                self._table, self._columns = "etapes", _step_columns(keys)
+            elif _keys_are_io(keys) and "io" not in self._done:
+                self._table, self._columns = "io", _io_columns(keys)
+            else:
+                self._table = "autre"
+            if self._table != "autre":
+                self._scenario = None
+            elif self._scenario:
+                events.append(TableEvent(self._scenario, line.strip()))
+            return
+
+        # Les autres tableaux font partie du scénario en cours
+        if self._table == "autre":
+            if self._scenario:
+                events.append(TableEvent(self._scenario, line.strip()))
+            return
+
+        if _is_separator(cells) or not any(cells):
+            return
+        if self._table == "etapes":
+            events.append(TableEvent("etape", ProcedureStep(*(_cell(cells, index) for index in self._columns))))
+        else:
+            events.append(TableEvent("io", IOEvent(*(_cell(cells, index) for index in self._columns))))
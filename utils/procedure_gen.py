@@ -2,48 +2,35 @@ import os
 import json
 from pathlib import Path
 import time
-from langchain_groq import ChatGroq
-from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
-from langchain.schema import Document
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.embeddings import HuggingFaceEmbeddings
-from langchain.vectorstores import Chroma
+from functools import lru_cache
+
+from models.config import DATA_FILE, MODELS, RETRIEVAL_CONFIG
+from utils.article_chunker import chunk_circular
+from utils.lazy_import import lazy_import
+from utils.markdown_table import (
+    IO_HEADERS, classify_heading, find_io_table, find_steps_table, parse_procedure_steps, render_table
+)
+
+# LangChain, les embeddings HuggingFace (torch, sentence-transformers) et Chroma ne sont importés
+# qu'au premier usage : les pages qui n'affichent que MODELS ne les chargent jamais
+langchain_groq = lazy_import("langchain_groq")
+langchain_prompts = lazy_import("langchain.prompts")
+langchain_chains = lazy_import("langchain.chains")
+langchain_callbacks = lazy_import("langchain.callbacks.base")
+langchain_schema = lazy_import("langchain.schema")
+langchain_embeddings = lazy_import("langchain.embeddings")
+langchain_vectorstores = lazy_import("langchain.vectorstores")
 
 # --- Configuration ---
-DATA_PATH = "data/donnees.json"
-VS_DIR = "data/chroma_store"
-
-# Réduire le seuil pour augmenter les chances de trouver des notes similaires
-SIMILARITY_THRESHOLD = 0.4  
-MAX_NOTE_LENGTH = 300       # Limite la taille des notes de référence
-MAX_EXAMPLES = 2            # Limite le nombre d'exemples à utiliser
-MIN_PROCEDURE_ROWS = 4      # Nombre minimum de lignes pour la procédure générée
-MAX_PROCEDURE_ROWS = 55    # Nombre maximum de lignes pour la procédure générée
-# --- Modèles disponibles ---
-MODELS = {
-    "mistral-saba-24b": {
-        "name": "Mistral Saba 24B",
-        "description": "Modèle équilibré pour une génération de qualité avec un bon rapport précision/vitesse",
-        "provider": "Groq",
-        "temperature": 0.3,
-        "max_tokens": 4096
-    },
-    "llama-3.3-70b-versatile": {
-        "name": "LLama 3.3 70B Versatile",
-        "description": "Modèle de grande taille avec des capacités avancées de raisonnement et d'analyse",
-        "provider": "Groq",
-        "temperature": 0.25,
-        "max_tokens": 4096
-    },
-    "qwen-qwq-32b": {
-        "name": "Qwen QWQ 32B",
-        "description": "Modèle performant avec une bonne compréhension contextuelle",
-        "provider": "Groq",
-        "temperature": 0.35,
-        "max_tokens": 4096
-    }
-}
+DATA_PATH = str(DATA_FILE)
+VS_DIR = str(RETRIEVAL_CONFIG["vector_store_dir"])
+
+# Paramètres réglables par déploiement (section [retrieval], voir models.settings)
+SIMILARITY_THRESHOLD = RETRIEVAL_CONFIG["similarity_threshold"]
+MAX_NOTE_LENGTH = RETRIEVAL_CONFIG["max_note_length"]        # Limite la taille des notes de référence
+MAX_EXAMPLES = RETRIEVAL_CONFIG["max_examples"]              # Limite le nombre d'exemples à utiliser
+MIN_PROCEDURE_ROWS = RETRIEVAL_CONFIG["min_procedure_rows"]  # Nombre minimum de lignes pour la procédure générée
+MAX_PROCEDURE_ROWS = RETRIEVAL_CONFIG["max_procedure_rows"]  # Nombre maximum de lignes pour la procédure générée
 
 # --- Chargement des données ---
 def load_data(json_path=DATA_PATH):
@@ -74,7 +61,7 @@ def load_data(json_path=DATA_PATH):
                 # Seulement traiter les dossiers avec une note circulaire
                 if texte:
                     # Créer un document pour la recherche vectorielle
-                    docs.append(Document(
+                    docs.append(langchain_schema.Document(
                         page_content=texte,
                         metadata={'numero': num, 'nom': nom}
                     ))
@@ -106,11 +93,31 @@ def save_data(data, json_path=DATA_PATH):
         print(f"Erreur lors de la sauvegarde des données: {e}")
         return False
 
+# --- Découpage des notes par article ---
+def split_documents_by_article(documents):
+    """Découpe les notes en chunks alignés sur leurs articles, sans recouvrement"""
+    chunks = []
+    for doc in documents:
+        for chunk in chunk_circular(doc.page_content):
+            metadata = dict(doc.metadata)
+            metadata.update({
+                'articles': ", ".join(chunk['articles']),
+                'debut': chunk['debut'],
+                'fin': chunk['fin']
+            })
+            chunks.append(langchain_schema.Document(page_content=chunk['texte'], metadata=metadata))
+    return chunks
+
 # --- Initialisation de la base vectorielle ---
+@lru_cache(maxsize=1)
+def get_embedder():
+    """Modèle d'embedding des notes, chargé une seule fois par processus"""
+    return langchain_embeddings.HuggingFaceEmbeddings(model_name=RETRIEVAL_CONFIG["embedding_model"])
+
 def init_vector_store(documents=None):
     """Initialise ou charge la base vectorielle"""
     try:
-        embedder = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+        embedder = get_embedder()
         
         # CORRECTION: Toujours recréer la base si des documents sont fournis
         if documents and len(documents) > 0:
@@ -122,9 +129,8 @@ def init_vector_store(documents=None):
             
             # Créer une nouvelle base
             Path(VS_DIR).mkdir(parents=True, exist_ok=True)
-            splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-            chunks = splitter.split_documents(documents)
-            vs = Chroma(collection_name='notes', persist_directory=VS_DIR, embedding_function=embedder)
+            chunks = split_documents_by_article(documents)
+            vs = langchain_vectorstores.Chroma(collection_name='notes', persist_directory=VS_DIR, embedding_function=embedder)
             vs.add_documents(chunks)
             vs.persist()
             print(f"Base vectorielle créée avec {len(chunks)} chunks")
@@ -133,7 +139,7 @@ def init_vector_store(documents=None):
         # Si pas de documents fournis et base existante, charger la base
         if Path(VS_DIR).exists() and os.listdir(VS_DIR):
             try:
-                vs = Chroma(collection_name='notes', persist_directory=VS_DIR, embedding_function=embedder)
+                vs = langchain_vectorstores.Chroma(collection_name='notes', persist_directory=VS_DIR, embedding_function=embedder)
                 print(f"Base vectorielle chargée depuis {VS_DIR}")
                 return vs
             except Exception as e:
@@ -144,7 +150,7 @@ def init_vector_store(documents=None):
         
         # Créer une nouvelle base vide
         Path(VS_DIR).mkdir(parents=True, exist_ok=True)
-        vs = Chroma(collection_name='notes', persist_directory=VS_DIR, embedding_function=embedder)
+        vs = langchain_vectorstores.Chroma(collection_name='notes', persist_directory=VS_DIR, embedding_function=embedder)
         vs.persist()
         print("Base vectorielle vide créée")
         return vs
@@ -161,14 +167,18 @@ def find_similar_notes(vectorstore, query, k=MAX_EXAMPLES):
         
     try:
         # CORRECTION: Utiliser search_documents directement avec un seuil plus bas
+        # Plusieurs chunks d'une même note peuvent remonter : élargir puis dédoublonner
         results = vectorstore.similarity_search_with_score(
             query, 
-            k=k
+            k=k * 2
         )
         
         similar_notes = []
+        seen_ids = set()
         for doc, score in results:
             note_id = doc.metadata.get('numero', '')
+            if note_id in seen_ids:
+                continue
             note_title = doc.metadata.get('nom', 'Sans titre')
             
             # Convertir le score en similarité (car souvent c'est une distance)
@@ -176,13 +186,17 @@ def find_similar_notes(vectorstore, query, k=MAX_EXAMPLES):
             
             # N'ajouter que si au-dessus du seuil de similarité
             if similarity >= SIMILARITY_THRESHOLD:
+                seen_ids.add(note_id)
                 similar_notes.append({
                     'id': note_id,
                     'titre': note_title,
                     'score': similarity,
-                    'content': doc.page_content
+                    'content': doc.page_content,
+                    'articles': doc.metadata.get('articles', '')
                 })
         
+        similar_notes = similar_notes[:k]
+        
         print(f"Notes similaires trouvées: {len(similar_notes)}")
         return similar_notes
     except Exception as e:
@@ -223,7 +237,27 @@ def extract_procedure_from_dossier_format(procedures):
     return "\n".join(formatted_steps)
 
 # --- Initialisation du modèle LLM ---
-def init_llm(model_id="mistral-saba-24b", api_key=None):
+@lru_cache(maxsize=1)
+def _token_stream_handler_class():
+    """Crée la classe TokenStreamHandler au premier usage (elle hérite d'une classe LangChain)"""
+    class TokenStreamHandler(langchain_callbacks.BaseCallbackHandler):
+        """Transmet chaque token généré par le LLM à une fonction (affichage progressif)"""
+        
+        def __init__(self, on_token):
+            self.on_token = on_token
+        
+        def on_llm_new_token(self, token, **kwargs):
+            self.on_token(token)
+    
+    return TokenStreamHandler
+
+def __getattr__(name):
+    # utils.procedure_gen.TokenStreamHandler reste importable sans charger LangChain à l'import du module
+    if name == "TokenStreamHandler":
+        return _token_stream_handler_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def init_llm(model_id="mistral-saba-24b", api_key=None, callbacks=None):
     """Initialise le modèle de langage"""
     if not api_key:
         api_key = os.getenv("GROQ_API_KEY")
@@ -234,7 +268,7 @@ def init_llm(model_id="mistral-saba-24b", api_key=None):
     model_config = MODELS.get(model_id, MODELS["mistral-saba-24b"])
     
     try:
-        llm = ChatGroq(
+        llm = langchain_groq.ChatGroq(
             groq_api_key=api_key,
             model_name=model_id,
             temperature=model_config["temperature"],
@@ -242,7 +276,8 @@ def init_llm(model_id="mistral-saba-24b", api_key=None):
             frequency_penalty=0.5,
             presence_penalty=0.0,
             max_tokens=model_config["max_tokens"],
-            streaming=True
+            streaming=True,
+            callbacks=callbacks
         )
         return llm
     except Exception as e:
@@ -250,12 +285,15 @@ def init_llm(model_id="mistral-saba-24b", api_key=None):
         return None
 
 # --- Génération de la procédure avec exemples ---
-def generate_procedure_with_model(query, model_id="mistral-saba-24b", api_key=None, vectorstore=None, notes_map=None, procedures_map=None):
-    """Génère une procédure à partir d'une note circulaire et d'un modèle spécifique"""
+def generate_procedure_with_model(query, model_id="mistral-saba-24b", api_key=None, vectorstore=None, notes_map=None, procedures_map=None, on_token=None):
+    """Génère une procédure à partir d'une note circulaire et d'un modèle spécifique
+    
+    on_token, s'il est fourni, reçoit chaque token au fil de la génération.
+    """
     print("Début de la génération de procédure...")
     
     # Initialisation du LLM
-    llm = init_llm(model_id, api_key)
+    llm = init_llm(model_id, api_key, callbacks=[_token_stream_handler_class()(on_token)] if on_token else None)
     if not llm:
         print("LLM non initialisé, mode simulation activé")
         # Simulation en mode démo si pas de LLM
@@ -394,12 +432,12 @@ Pour chaque scénario, proposez 2 cas :
 
 """
             # Création du prompt et exécution avec la chaîne LangChain
-            prompt = PromptTemplate(
+            prompt = langchain_prompts.PromptTemplate(
                 input_variables=['query', 'examples_context', 'min_rows', 'max_rows'],
                 template=template
             )
             
-            chain = LLMChain(llm=llm, prompt=prompt)
+            chain = langchain_chains.LLMChain(llm=llm, prompt=prompt)
             
             # Exécution avec les paramètres
             try:
@@ -488,12 +526,12 @@ Article 4 : Les secteurs éligibles sont l'industrie, l'agriculture, et les serv
 """
 
         # Création du prompt et exécution avec la chaîne LangChain
-        prompt = PromptTemplate(
+        prompt = langchain_prompts.PromptTemplate(
             input_variables=['query', 'min_rows', 'max_rows'],
             template=template
         )
         
-        chain = LLMChain(llm=llm, prompt=prompt)
+        chain = langchain_chains.LLMChain(llm=llm, prompt=prompt)
         
         # Exécution avec les paramètres
         try:
@@ -507,6 +545,50 @@ Article 4 : Les secteurs éligibles sont l'industrie, l'agriculture, et les serv
             # Fallback en mode démo
             return simulate_procedure_generation(query_truncated, "mistral-saba-24b")
 
+# --- Découpage de la procédure générée ---
+def extract_procedure_components(procedure_text, io_table_text=""):
+    """Extrait le tableau des étapes, le tableau I/O et les scénarios de la procédure"""
+    components = {"etapes": "", "io": "", "scenarios": "", "scenarios_ok": "", "scenarios_ko": ""}
+    procedure_text = procedure_text or ""
+    if not procedure_text and not io_table_text:
+        return components
+    
+    # Tableaux : analyse partagée et mémorisée (utils.markdown_table)
+    steps_table = find_steps_table(procedure_text)
+    procedure_io_table = find_io_table(procedure_text)
+    io_table = find_io_table(io_table_text or "") or procedure_io_table
+    
+    if steps_table:
+        components["etapes"] = render_table(steps_table)
+        # Vrais points de début et de fin : première et dernière activité du tableau
+        activities = [step.activite or step.description for step in parse_procedure_steps(procedure_text)
+                      if step.numero and (step.activite or step.description)]
+        components["real_start"] = activities[0] if activities else None
+        components["real_end"] = activities[-1] if activities else None
+    
+    if io_table:
+        components["io"] = render_table(io_table, IO_HEADERS if 'evenement' in io_table.keys else None)
+    
+    # Scénarios : du titre "Scénario..." jusqu'au titre de section ou au tableau suivant
+    # Seuls les tableaux de procedure_text ont un numéro de ligne valable ici (pas celui de io_table_text)
+    table_starts = {table.first_line for table in (steps_table, procedure_io_table) if table}
+    sections = {}
+    current = None
+    for index, line in enumerate(procedure_text.split("\n")):
+        line = line.strip()
+        kind = classify_heading(line)
+        if kind == "section" or index in table_starts:
+            current = None
+        elif kind:
+            current = sections.setdefault(kind, [])
+        if current is not None and line:
+            current.append(line)
+    
+    for kind, lines in sections.items():
+        components[kind] = "\n".join(lines)
+    
+    return components
+
 # --- Ajout: simulation pour démo ---
 def simulate_procedure_generation(note_circulaire, model_name):
     """Simule la génération d'une procédure pour la démonstration"""
@@ -0,0 +1,209 @@
+"""
+Module de cache sémantique des réponses du chatbot.
+
+Une question déjà posée sur le même contexte, même formulée autrement
+("quels sont les délais ?" / "quel délai ?"), réutilise la réponse stockée
+au lieu de relancer la recherche et la génération. Chaque question est
+représentée par un vecteur normalisé ; une réponse est resservie lorsque la
+similarité cosinus avec une question du même contexte atteint le seuil
+CHATBOT_CONFIG["semantic_threshold"].
+
+Le vecteur vient du modèle d'embedding de la base vectorielle lorsqu'il est
+disponible, sinon d'un sac de termes haché (termes racinisés de utils.bm25 et
+paires de termes consécutifs), qui rapproche déjà les variantes de
+ponctuation, d'accents, de pluriel et de mots vides. Contrairement à la
+recherche BM25, les négations et les prépositions sont conservées : "avec
+garantie" et "sans garantie" ne sont pas la même question.
+
+Une variante (par exemple l'empreinte de l'historique de la conversation)
+peut compléter le contexte : seules les questions de même variante se
+rapprochent, une réponse qui dépend de l'historique n'est donc pas resservie
+dans une autre conversation.
+
+Les entrées sont évincées selon l'ordre LRU (CHATBOT_CONFIG["answer_cache_size"])
+et toutes celles d'un contexte, quelle que soit leur variante, peuvent être
+invalidées lorsque la note ou la procédure change.
+"""
+
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from models.config import CHATBOT_CONFIG
+from utils.bm25 import FRENCH_STOPWORDS, stem
+from utils.lazy_import import lazy_import
+
+# NumPy n'est chargé qu'au premier calcul de similarité
+np = lazy_import("numpy")
+
+# Dimension des vecteurs du sac de termes haché
+LEXICAL_DIMENSION = CHATBOT_CONFIG["lexical_dimension"]
+
+# Mots vides conservés dans les questions : ils en changent le sens
+NEGATIONS = frozenset("n ne ni pas plus aucun aucune sans".split())
+PREPOSITIONS = frozenset("avant avec chez contre dans entre hors par pendant pour selon sous sur vers".split())
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def question_terms(text: str) -> List[str]:
+    """
+    Découpe une question en termes racinisés (négations et prépositions comprises) et paires de termes consécutifs.
+
+    Args:
+        text (str): La question.
+
+    Returns:
+        List[str]: Les termes puis les paires "terme terme", dans l'ordre du texte.
+    """
+    words = [stem(word) for word in _WORD_RE.findall(text.lower())
+             if word not in FRENCH_STOPWORDS or word in NEGATIONS or word in PREPOSITIONS]
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+
+def lexical_embedding(text: str) -> List[float]:
+    """
+    Représente un texte par le sac de ses termes (question_terms), haché sur LEXICAL_DIMENSION composantes.
+
+    Args:
+        text (str): Le texte (question).
+
+    Returns:
+        List[float]: Le vecteur (non normalisé).
+    """
+    vector = np.zeros(LEXICAL_DIMENSION, dtype=np.float32)
+    for term in question_terms(text):
+        vector[zlib.crc32(term.encode('utf-8')) % LEXICAL_DIMENSION] += 1.0
+    return vector.tolist()
+
+
+def _normalized(vector: Sequence[float]) -> 'np.ndarray':
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SemanticCache:
+    """Cache LRU de réponses, interrogé par similarité cosinus des questions d'un même contexte."""
+
+    def __init__(self,
+                 embed: Optional[Callable[[str], Sequence[float]]] = None,
+                 threshold: Optional[float] = None,
+                 max_items: Optional[int] = None):
+        """
+        Args:
+            embed (Optional[Callable[[str], Sequence[float]]], optional): Fonction de vectorisation
+                des questions. Defaults to lexical_embedding.
+            threshold (Optional[float], optional): Similarité cosinus minimale.
+                Defaults to CHATBOT_CONFIG["semantic_threshold"].
+            max_items (Optional[int], optional): Nombre maximal de réponses conservées.
+                Defaults to CHATBOT_CONFIG["answer_cache_size"].
+        """
+        self.embed = embed or lexical_embedding
+        self.threshold = threshold if threshold is not None else CHATBOT_CONFIG.get("semantic_threshold", 0.9)
+        self.max_items = max_items or CHATBOT_CONFIG.get("answer_cache_size", 256)
+        self._entries = OrderedDict()   # (contexte, variante, question) -> {"vecteur", "valeur"}
+        self._matrices = {}             # (contexte, variante) -> (clés, matrice des vecteurs), reconstruite si besoin
+        self._lock = threading.Lock()
+        self.stats = {'exactes': 0, 'similaires': 0, 'manques': 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _context_matrix(self, partition: Tuple[str, str]) -> Tuple[List[Tuple[str, str, str]], Optional['np.ndarray']]:
+        matrix = self._matrices.get(partition)
+        if matrix is None:
+            keys = [key for key in self._entries if key[:2] == partition]
+            vectors = np.vstack([self._entries[key]['vecteur'] for key in keys]) if keys else None
+            matrix = self._matrices[partition] = (keys, vectors)
+        return matrix
+
+    def get(self, context_key: str, question: str, variant: str = "") -> Optional[Tuple[Dict, float]]:
+        """
+        Renvoie la réponse stockée pour la question la plus proche du même contexte.
+
+        Args:
+            context_key (str): Empreinte du contexte (note et procédure).
+            question (str): La question, normalisée par l'appelant.
+            variant (str, optional): Variante du contexte (empreinte de l'historique). Defaults to "".
+
+        Returns:
+            Optional[Tuple[Dict, float]]: (réponse, similarité), ou None sous le seuil.
+        """
+        key = (context_key, variant, question)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats['exactes'] += 1
+                return entry['valeur'], 1.0
+            keys, vectors = self._context_matrix((context_key, variant))
+
+        if vectors is None:
+            with self._lock:
+                self.stats['manques'] += 1
+            return None
+
+        vector = _normalized(self.embed(question))
+        if vector.shape[0] != vectors.shape[1]:
+            with self._lock:
+                self.stats['manques'] += 1
+            return None
+        similarities = vectors @ vector
+        best = int(np.argmax(similarities))
+        similarity = float(similarities[best])
+
+        with self._lock:
+            entry = self._entries.get(keys[best])
+            if similarity < self.threshold or entry is None:
+                self.stats['manques'] += 1
+                return None
+            self._entries.move_to_end(keys[best])
+            self.stats['similaires'] += 1
+            return entry['valeur'], similarity
+
+    def put(self, context_key: str, question: str, value: Dict, variant: str = "") -> None:
+        """
+        Enregistre la réponse d'une question.
+
+        Args:
+            context_key (str): Empreinte du contexte.
+            question (str): La question, normalisée par l'appelant.
+            value (Dict): La réponse à resservir.
+            variant (str, optional): Variante du contexte (empreinte de l'historique). Defaults to "".
+        """
+        vector = _normalized(self.embed(question))
+        key = (context_key, variant, question)
+        with self._lock:
+            self._entries[key] = {'vecteur': vector, 'valeur': value}
+            self._entries.move_to_end(key)
+            self._matrices.pop(key[:2], None)
+            while len(self._entries) > self.max_items:
+                evicted_key, _ = self._entries.popitem(last=False)
+                self._matrices.pop(evicted_key[:2], None)
+
+    def invalidate(self, context_key: str) -> int:
+        """
+        Supprime toutes les réponses d'un contexte, toutes variantes confondues (note ou procédure modifiée).
+
+        Args:
+            context_key (str): Empreinte du contexte.
+
+        Returns:
+            int: Nombre de réponses supprimées.
+        """
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == context_key]
+            for key in keys:
+                del self._entries[key]
+            for partition in [partition for partition in self._matrices if partition[0] == context_key]:
+                del self._matrices[partition]
+            return len(keys)
+
+    def clear(self) -> None:
+        """Vide le cache."""
+        with self._lock:
+            self._entries.clear()
+            self._matrices.clear()